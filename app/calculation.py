@@ -1,19 +1,29 @@
 # app/calculation.py
 
 from decimal import Decimal, InvalidOperation
-from typing import Callable
+from typing import Callable, Sequence
 
 # Import Subject and Observer from logger.py to break the circular dependency
 from app.logger import Subject, Observer, app_logger
+from app.metrics import METRICS
+
+# Shared, immutable "no observers" value so calculations allocate no list of their own.
+_NO_OBSERVERS: tuple = ()
 
 class ArithmeticCalculation(Subject):
     """
     A class to represent a single arithmetic calculation.
     It acts as a "Subject" in the Observer design pattern.
+
+    Calculations are slot-based records. Observers that should see every
+    calculation are registered once on the Calculator; per-instance observers
+    are only needed for ad-hoc use and are stored as an immutable tuple.
     """
+    __slots__ = ('a', 'b', 'operation', 'result', '_observers')
+
     def __init__(self, a: Decimal, b: Decimal, operation: Callable[[Decimal, Decimal], Decimal]):
         """Initializes the calculation with two operands and an operation."""
-        self._observers = []
+        self._observers = _NO_OBSERVERS
         self.a = a
         self.b = b
         self.operation = operation
@@ -23,19 +33,21 @@ class ArithmeticCalculation(Subject):
     def attach(self, observer: Observer) -> None:
         """Attach an observer to the subject."""
         if observer not in self._observers:
-            self._observers.append(observer)
+            self._observers = self._observers + (observer,)
             app_logger.info(f"Attached observer: {observer.__class__.__name__}")
 
     def detach(self, observer: Observer) -> None:
         """Detach an observer from the subject."""
-        try:
-            self._observers.remove(observer)
+        if observer in self._observers:
+            self._observers = tuple(o for o in self._observers if o is not observer)
             app_logger.info(f"Detached observer: {observer.__class__.__name__}")
-        except ValueError:
+        else:
             app_logger.warning(f"Observer {observer.__class__.__name__} not found for detachment.") # pragma: no cover
 
     def notify(self) -> None:
-        """Notify all observers about an event."""
+        """Notify all observers attached to this calculation."""
+        if not self._observers:
+            return
         app_logger.info("Notifying observers...")
         for observer in self._observers:
             observer.update(self)
@@ -52,7 +64,8 @@ class ArithmeticCalculation(Subject):
         Handles potential calculation errors.
         """
         try:
-            self.result = self.operation(self.a, self.b)
+            with METRICS.timer('perform', self.operation.__name__):
+                self.result = self.operation(self.a, self.b)
             app_logger.info(f"Calculation successful: {self.a} {self.operation.__name__} {self.b} = {self.result}")
             self.notify()  # Notify observers after a successful calculation
             return self.result
@@ -64,4 +77,77 @@ class ArithmeticCalculation(Subject):
     def __repr__(self):
         """Return a string representation of the calculation."""
         op_name = self.operation.__name__.replace('_', ' ').title()
-        return f"Calculation({self.a}, {self.b}, Operation={op_name})"
\ No newline at end of file
+        return f"Calculation({self.a}, {self.b}, Operation={op_name})"
+
+
+class ReductionCalculation(ArithmeticCalculation):
+    """
+    An n-ary calculation (sum, product, min, max, mean) over many operands.
+    It is recorded as a single history entry. For compatibility with the
+    two-operand history schema, `a` holds the operand count and `b` is 0.
+    The operand list is released once the result is known, so history
+    entries and checkpoints keep only the count and the result.
+    """
+    __slots__ = ('operands',)
+
+    def __init__(self, operands: Sequence[Decimal], reduction: Callable[[Sequence[Decimal]], Decimal]):
+        """Initializes the calculation with its operands and a reduction function."""
+        super().__init__(Decimal(len(operands)), Decimal('0'), reduction)
+        self.operands = operands
+
+    @classmethod
+    def from_record(cls, count: Decimal, reduction: Callable[[Sequence[Decimal]], Decimal],
+                    result: Decimal | None) -> 'ReductionCalculation':
+        """Rebuilds a finished reduction from its operand count and result."""
+        calculation = cls((), reduction)
+        calculation.a, calculation.result, calculation.operands = count, result, None
+        return calculation
+
+    def perform(self) -> Decimal:
+        """Performs the reduction and notifies attached observers."""
+        try:
+            with METRICS.timer('perform', self.operation.__name__):
+                self.result = self.operation(self.operands)
+            self.operands = None
+            app_logger.info(f"Reduction successful: {self.operation.__name__} of {self.a} operands = {self.result}")
+            self.notify()
+            return self.result
+        except (ValueError, InvalidOperation, ZeroDivisionError) as e:
+            app_logger.error(f"Error performing reduction ({self.operation.__name__} of {self.a} operands): {e}")
+            raise
+
+    def __repr__(self):
+        """Return a string representation of the reduction."""
+        return f"Calculation({self.operation.__name__.title()} of {self.a} operands)"
+
+
+class MacroCalculation(ArithmeticCalculation):
+    """
+    A call of a user-defined macro, recorded as a single history entry.
+    `arguments` holds all the arguments. For the two-operand history schema
+    (autosave files, checkpoints), `a` and `b` hold the first two of them, or
+    0 where the macro takes fewer.
+    """
+    __slots__ = ('arguments',)
+
+    def __init__(self, arguments: Sequence[Decimal], function: Callable[..., Decimal]):
+        """Initializes the call with its arguments and the compiled macro function."""
+        a, b = (list(arguments[:2]) + [Decimal('0'), Decimal('0')])[:2]
+        super().__init__(a, b, function)
+        self.arguments = tuple(arguments)
+
+    def perform(self) -> Decimal:
+        """Calls the macro and notifies attached observers."""
+        try:
+            with METRICS.timer('perform', self.operation.__name__):
+                self.result = self.operation(*self.arguments)
+            app_logger.info(f"Macro successful: {self!r} = {self.result}")
+            self.notify()
+            return self.result
+        except (ValueError, InvalidOperation, ZeroDivisionError) as e:
+            app_logger.error(f"Error performing macro {self!r}: {e}")
+            raise
+
+    def __repr__(self):
+        """Return a string representation of the macro call."""
+        return f"Calculation({self.operation.__name__}({', '.join(map(str, self.arguments))}))"
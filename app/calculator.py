@@ -1,33 +1,69 @@
 # app/calculator.py
 
 from decimal import Decimal
+from typing import Iterator
 from app.calculation import ArithmeticCalculation
 from app.calculator_memento import CalculatorMemento
-from app.history import HistoryManager
+from app.history import create_history_manager
 from app.exceptions import InsufficientHistoryError
-from app.logger import app_logger
+from app.logger import app_logger, Observer
+from app.metrics import METRICS
+
+def initial_state(a: Decimal, b: Decimal) -> Decimal:
+    """Operation of the initial history entry; it simply keeps the first operand."""
+    return a
 
 class Calculator:
     """
     The Originator. It holds the current state and can create or restore mementos.
+
+    Observers registered on the calculator are notified of every executed
+    command, so individual calculations do not need their own observer lists.
     """
     def __init__(self):
         self._current_value = Decimal('0')
-        self._history_manager = HistoryManager()
-        initial_command = ArithmeticCalculation(Decimal('0'), Decimal('0'), lambda a, b: a)
+        self._history_manager = create_history_manager()
+        self._observers: tuple[Observer, ...] = ()
+        initial_command = ArithmeticCalculation(Decimal('0'), Decimal('0'), initial_state)
         self._save_state(initial_command)
         app_logger.info("Calculator initialized and initial state saved.")
 
-    def _save_state(self, command: ArithmeticCalculation):
+    def _save_state(self, command: ArithmeticCalculation, replayable: bool = False):
         """Creates a memento of the current state and saves it."""
         memento = CalculatorMemento(self._current_value, command)
-        self._history_manager.save_state(memento)
+        self._history_manager.save_state(memento, replayable)
+
+    def register_observer(self, observer: Observer) -> None:
+        """Registers an observer that is notified after every executed command."""
+        if observer not in self._observers:
+            self._observers = self._observers + (observer,)
+            app_logger.info(f"Registered observer: {observer.__class__.__name__}")
+
+    def unregister_observer(self, observer: Observer) -> None:
+        """Removes a previously registered observer."""
+        self._observers = tuple(o for o in self._observers if o is not observer)
+        app_logger.info(f"Unregistered observer: {observer.__class__.__name__}")
+
+    def _notify(self, command: ArithmeticCalculation) -> None:
+        """Notifies the registered observers about a completed command."""
+        with METRICS.timer('notify', command.operation.__name__):
+            for observer in self._observers:
+                observer.update(command)
 
     def execute_command(self, command: ArithmeticCalculation) -> Decimal:
-        """Executes a command, updates the value, and saves the new state."""
-        result = command.perform() 
-        self._current_value = result
-        self._save_state(command)
+        """Executes a command, notifies observers, updates the value, and saves the new state."""
+        command.perform()
+        # Only plain two-operand commands computed here can be re-executed by a delta history.
+        return self.commit_calculation(command, replayable=type(command) is ArithmeticCalculation)
+
+    def commit_calculation(self, command: ArithmeticCalculation, replayable: bool = False) -> Decimal:
+        """
+        Records a command whose result is already set, e.g. one computed by a
+        background worker: notifies observers, updates the value and saves the state.
+        """
+        self._notify(command)
+        self._current_value = command.result
+        self._save_state(command, replayable)
         app_logger.info(f"Command executed. New value: {self._current_value}")
         return self._current_value
 
@@ -55,11 +91,32 @@ class Calculator:
         """Retrieves the calculation history from the history manager."""
         return self._history_manager.get_history()
 
+    def history_size(self) -> int:
+        """Returns the number of states in the history (including the initial state)."""
+        return self._history_manager.history_size()
+
+    def iter_history(self, start: int = 0, stop: int | None = None) -> Iterator[CalculatorMemento]:
+        """Lazily iterates over history states [start, stop) without copying the history."""
+        return self._history_manager.iter_history(start, stop)
+
+    def get_redo_history(self) -> list[CalculatorMemento]:
+        """Retrieves the undone states that 'redo' would restore (next redo is last)."""
+        return self._history_manager.get_redo_history()
+
+    def restore_state(self, current_value: Decimal, undo_mementos: list[CalculatorMemento],
+                      redo_mementos: list[CalculatorMemento]):
+        """Replaces the whole calculator state, e.g. from a checkpoint."""
+        if not undo_mementos:
+            raise InsufficientHistoryError("Cannot restore a state without an initial history entry.")
+        self._current_value = current_value
+        self._history_manager.restore(undo_mementos, redo_mementos)
+        app_logger.info(f"Calculator state restored. Current value: {current_value}")
+
     def clear_history(self):
         """Resets the calculator and clears the history manager."""
         self._current_value = Decimal('0')
         self._history_manager.clear()
-        initial_command = ArithmeticCalculation(Decimal('0'), Decimal('0'), lambda a, b: a)
+        initial_command = ArithmeticCalculation(Decimal('0'), Decimal('0'), initial_state)
         self._save_state(initial_command)
         app_logger.info("Calculator history cleared and reset to initial state.")
 
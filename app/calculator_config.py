@@ -21,8 +21,34 @@ class CalculatorConfig:
     except (ValueError, TypeError): # pragma: no cover
         MAX_HISTORY_SIZE = 50
 
+    # Entries per page of the 'history' command
+    try:
+        HISTORY_PAGE_SIZE = int(os.getenv('CALCULATOR_HISTORY_PAGE_SIZE', 50))
+    except (ValueError, TypeError): # pragma: no cover
+        HISTORY_PAGE_SIZE = 50
+
+    # 'full' keeps every state; 'delta' keeps periodic keyframes and replays the states in between
+    HISTORY_ENCODING = os.getenv('CALCULATOR_HISTORY_ENCODING', 'full').lower()
+
+    try:
+        HISTORY_KEYFRAME_INTERVAL = int(os.getenv('CALCULATOR_HISTORY_KEYFRAME_INTERVAL', 32))
+    except (ValueError, TypeError): # pragma: no cover
+        HISTORY_KEYFRAME_INTERVAL = 32
+
     AUTO_SAVE = os.getenv('CALCULATOR_AUTO_SAVE', 'false').lower() in ('true', '1', 't')
 
+    # Autosave format: csv (one appended line per calculation) or parquet (buffered part files)
+    AUTO_SAVE_FORMAT = os.getenv('CALCULATOR_AUTO_SAVE_FORMAT', 'csv').lower()
+
+    # Rows per Parquet row group; also how many calculations Parquet autosave buffers per part file
+    try:
+        PARQUET_ROW_GROUP_SIZE = int(os.getenv('CALCULATOR_PARQUET_ROW_GROUP_SIZE', 10000))
+    except (ValueError, TypeError): # pragma: no cover
+        PARQUET_ROW_GROUP_SIZE = 10000
+
+    # Compression of 'save' checkpoints: none, zlib or lzma
+    SNAPSHOT_COMPRESSION = os.getenv('CALCULATOR_SNAPSHOT_COMPRESSION', 'none').lower()
+
     # --- Calculation Settings ---
     try:
         PRECISION = int(os.getenv('CALCULATOR_PRECISION', 10))
@@ -34,4 +60,31 @@ class CalculatorConfig:
     except (ValueError, TypeError): # pragma: no cover
         MAX_INPUT_VALUE = Decimal('1000000000')
     
-    DEFAULT_ENCODING = os.getenv('CALCULATOR_DEFAULT_ENCODING', 'utf-8')
\ No newline at end of file
+    # Operations that run in a cancelable background worker process
+    BACKGROUND_OPERATIONS = [
+        op.strip() for op in os.getenv('CALCULATOR_BACKGROUND_OPERATIONS', 'power,root').lower().split(',') if op.strip()
+    ]
+
+    # Decimal precision from which fractional powers and roots are worth a worker process
+    try:
+        JOB_MIN_PRECISION = int(os.getenv('CALCULATOR_JOB_MIN_PRECISION', 500))
+    except (ValueError, TypeError): # pragma: no cover
+        JOB_MIN_PRECISION = 500
+
+    # Seconds to wait for a background operation before handing the prompt back
+    try:
+        JOB_INLINE_TIMEOUT = float(os.getenv('CALCULATOR_JOB_INLINE_TIMEOUT', 0.5))
+    except (ValueError, TypeError): # pragma: no cover
+        JOB_INLINE_TIMEOUT = 0.5
+
+    DEFAULT_ENCODING = os.getenv('CALCULATOR_DEFAULT_ENCODING', 'utf-8')
+
+    # --- Metrics Settings ---
+    METRICS_ENABLED = os.getenv('CALCULATOR_METRICS_ENABLED', 'true').lower() in ('true', '1', 't')
+    # Optional Prometheus text-format file; empty disables the exporter
+    METRICS_FILE = os.getenv('CALCULATOR_METRICS_FILE', '')
+
+    try:
+        METRICS_INTERVAL = float(os.getenv('CALCULATOR_METRICS_INTERVAL', 15))
+    except (ValueError, TypeError): # pragma: no cover
+        METRICS_INTERVAL = 15.0
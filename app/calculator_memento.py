@@ -9,11 +9,22 @@ class CalculatorMemento:
     Implements the Memento Design Pattern. 
     It stores the state of the Calculator (Originator) at a point in time.
     """
+    __slots__ = ('_state_value', '_last_command')
+
     # The type hint for last_command has been corrected to ArithmeticCalculation
     def __init__(self, state_value: Decimal, last_command: ArithmeticCalculation):
         self._state_value = state_value
         self._last_command = last_command
-        app_logger.debug(f"Created Memento with value: {self._state_value}")
+        # Lazy %-formatting: this runs once per command and DEBUG is normally off.
+        app_logger.debug("Created Memento with value: %s", state_value)
+
+    @classmethod
+    def restore(cls, state_value: Decimal, last_command: ArithmeticCalculation) -> 'CalculatorMemento':
+        """Rebuilds a saved memento without per-instance logging (used for bulk restores)."""
+        memento = cls.__new__(cls)
+        memento._state_value = state_value
+        memento._last_command = last_command
+        return memento
 
     def get_state_value(self) -> Decimal:
         """Returns the stored numerical state."""
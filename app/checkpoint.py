@@ -0,0 +1,340 @@
+# app/checkpoint.py
+
+import json
+import lzma
+import os
+import re
+import struct
+import sys
+import zlib
+from array import array
+from decimal import Decimal, InvalidOperation
+from itertools import accumulate
+from typing import Iterator
+from app.calculation import ArithmeticCalculation, ReductionCalculation
+from app.calculator import Calculator, initial_state
+from app.calculator_config import CalculatorConfig
+from app.calculator_memento import CalculatorMemento
+from app.exceptions import PersistenceError
+from app.logger import app_logger
+from app.operations import OperationFactory
+from app.reductions import ReductionFactory
+
+MAGIC = b'CALCSNAP'
+# v1 payloads were pickled and v2 payloads were JSON; v3 stores binary columns
+# that are decoded lazily on restore.
+SCHEMA_VERSION = 3
+# magic, schema version, compression codec
+HEADER = struct.Struct('<8sHB')
+# Length of the JSON manifest at the start of the payload
+MANIFEST_LENGTH = struct.Struct('<I')
+# Offsets of the decimal columns are little-endian unsigned 32-bit integers.
+OFFSET_TYPE = 'I'
+DECIMAL_COLUMNS = 3  # a, b, result
+
+CODECS = {
+    'none': (0, lambda data: data, lambda data: data),
+    'zlib': (1, lambda data: zlib.compress(data, 1), zlib.decompress),
+    'lzma': (2, lambda data: lzma.compress(data, preset=1), lzma.decompress),
+}
+_DECOMPRESSORS = {code: decompress for code, _, decompress in CODECS.values()}
+
+NAME_PATTERN = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+
+def _operation_registry() -> dict:
+    """Maps the __name__ of every operation that can appear in history to its function."""
+    functions = list(OperationFactory.OPERATION_MAP.values()) + list(ReductionFactory.REDUCTION_MAP.values())
+    functions.append(initial_state)
+    return {func.__name__: func for func in functions}
+
+
+def _offsets_to_bytes(offsets: array) -> bytes:
+    if sys.byteorder == 'big': # pragma: no cover
+        offsets.byteswap()
+    return offsets.tobytes()
+
+
+def _encode_column(values: list[str]) -> list[bytes]:
+    """
+    Encodes decimal strings as an offset array plus one ASCII blob (str() of a
+    Decimal is always ASCII, so character and byte offsets are the same).
+    """
+    blob = ''.join(values).encode('ascii')
+    if len(blob) >= 2 ** 32:
+        raise PersistenceError("History is too large for a checkpoint.") # pragma: no cover
+    return [_offsets_to_bytes(array(OFFSET_TYPE, accumulate(map(len, values), initial=0))), blob]
+
+
+def _encode_stack(mementos: list[CalculatorMemento], op_codes: dict, op_names: list) -> tuple[dict, list[bytes]]:
+    """
+    Encodes a stack column-wise: one operation code byte per entry plus the
+    a, b and result columns. The state value is only stored when it differs
+    from the command result, which is rare.
+
+    Returns:
+        The stack's manifest entry and its binary sections.
+    """
+    ops, a_col, b_col, results = bytearray(), [], [], []
+    no_result, states, reductions = [], {}, []
+    for index, memento in enumerate(mementos):
+        command = memento.get_last_command()
+        name = command.operation.__name__
+        code = op_codes.get(name)
+        if code is None:
+            code = op_codes[name] = len(op_names)
+            op_names.append(name)
+        ops.append(code)
+        a_col.append(str(command.a))
+        b_col.append(str(command.b))
+        result = command.result
+        state = memento.get_state_value()
+        if result is None:
+            no_result.append(index)
+            results.append('0')
+            states[index] = str(state)
+        else:
+            results.append(str(result))
+            if state != result:
+                states[index] = str(state)
+        if isinstance(command, ReductionCalculation):
+            reductions.append(index)
+    sections = [bytes(ops)]
+    for column in (a_col, b_col, results):
+        sections.extend(_encode_column(column))
+    manifest = {'size': len(ops), 'no_result': no_result, 'state': states, 'reductions': reductions}
+    return manifest, sections
+
+
+def _check_indices(indices, size: int, what: str) -> None:
+    """Rejects (possibly crafted) indices outside [0, size), which would otherwise wrap or truncate."""
+    if indices and not (0 <= min(indices) and max(indices) < size):
+        raise ValueError(f"{what} index out of range")
+
+
+class SnapshotStack:
+    """
+    An undo or redo stack backed by the columns of a restored snapshot.
+
+    Entries are decoded into mementos only when they are accessed, so restoring
+    costs the same whatever the history length; a full pass (get_history, a new
+    'save') decodes every entry. Each access decodes a new memento. States
+    pushed after the restore are kept in an ordinary list above the snapshot
+    entries. It supports the list operations HistoryManager uses: len, indexing,
+    iteration, append, pop and clear.
+    """
+    __slots__ = ('_ops', '_functions', '_columns', '_no_result', '_states', '_reductions', '_size', '_top')
+
+    def __init__(self, ops: bytes, functions: list, columns: list[tuple[array, str]],
+                 no_result: set[int], states: dict[int, Decimal], reductions: set[int]):
+        self._ops = ops
+        self._functions = functions
+        self._columns = columns
+        self._no_result = no_result
+        self._states = states
+        self._reductions = reductions
+        self._size = len(ops)
+        self._top: list[CalculatorMemento] = []
+
+    def _decimal(self, column: int, index: int) -> Decimal:
+        offsets, text = self._columns[column]
+        try:
+            return Decimal(text[offsets[index]:offsets[index + 1]])
+        except InvalidOperation:
+            raise PersistenceError(f"Checkpoint entry {index} is corrupt.")
+
+    def _memento(self, index: int) -> CalculatorMemento:
+        operation = self._functions[self._ops[index]]
+        a = self._decimal(0, index)
+        result = None if index in self._no_result else self._decimal(2, index)
+        if index in self._reductions:
+            command = ReductionCalculation.from_record(a, operation, result)
+        else:
+            command = ArithmeticCalculation(a, self._decimal(1, index), operation)
+            command.result = result
+        state = self._states.get(index)
+        return CalculatorMemento.restore(result if state is None else state, command)
+
+    def __len__(self) -> int:
+        return self._size + len(self._top)
+
+    def __getitem__(self, index: int) -> CalculatorMemento:
+        if index < 0:
+            index += len(self)
+        if index >= self._size:
+            return self._top[index - self._size]
+        if index < 0:
+            raise IndexError("history index out of range")
+        return self._memento(index)
+
+    def __iter__(self) -> Iterator[CalculatorMemento]:
+        for index in range(self._size):
+            yield self._memento(index)
+        yield from self._top
+
+    def append(self, memento: CalculatorMemento) -> None:
+        self._top.append(memento)
+
+    def pop(self) -> CalculatorMemento:
+        if self._top:
+            return self._top.pop()
+        if not self._size:
+            raise IndexError("pop from empty history")
+        self._size -= 1
+        return self._memento(self._size)
+
+    def clear(self) -> None:
+        self._size = 0
+        self._top.clear()
+
+
+def _decode_stack(stack: dict, view: memoryview, position: int, functions: list) -> tuple[SnapshotStack, int]:
+    """
+    Reads one stack's sections starting at `position`, without decoding its
+    entries. Only checks that cost no per-entry Python work are made here: the
+    section sizes, operation codes and column ends. Malformed decimals inside
+    a crafted file are reported when their entry is accessed.
+
+    Returns:
+        The stack and the position after its sections.
+    """
+    size = stack['size']
+    if not isinstance(size, int) or size < 0:
+        raise ValueError("invalid stack size")
+    ops = bytes(view[position:position + size])
+    position += size
+    if len(ops) != size:
+        raise ValueError("truncated operation column")
+    if ops.translate(None, bytes(range(len(functions)))):
+        raise ValueError("operation index out of range")
+    columns = []
+    for _ in range(DECIMAL_COLUMNS):
+        offsets = array(OFFSET_TYPE)
+        length = (size + 1) * offsets.itemsize
+        chunk = view[position:position + length]
+        if len(chunk) != length:
+            raise ValueError("truncated column")
+        offsets.frombytes(chunk)
+        if sys.byteorder == 'big': # pragma: no cover
+            offsets.byteswap()
+        position += length
+        end = position + offsets[-1]
+        if offsets[0] != 0 or end > len(view):
+            raise ValueError("column offsets out of range")
+        columns.append((offsets, str(view[position:end], 'ascii')))
+        position = end
+    no_result, reductions = set(stack['no_result']), set(stack['reductions'])
+    states = {int(index): Decimal(state) for index, state in stack['state'].items()}
+    for indices, what in ((no_result, 'no_result'), (reductions, 'reductions'), (states, 'state')):
+        _check_indices(indices, size, what)
+    if not no_result <= states.keys():
+        raise ValueError("entry without result has no state")
+    return SnapshotStack(ops, functions, columns, no_result, states, reductions), position
+
+
+def checkpoint_path(name: str) -> str:
+    """Returns the file path of a named checkpoint."""
+    if not NAME_PATTERN.match(name):
+        raise PersistenceError(f"Invalid checkpoint name '{name}'. Use letters, digits, '_', '-' or '.'.")
+    return os.path.join(CalculatorConfig.HISTORY_DIR, 'checkpoints', f"{name}.snap")
+
+
+def list_checkpoints() -> list[str]:
+    """Returns the names of the saved checkpoints."""
+    directory = os.path.join(CalculatorConfig.HISTORY_DIR, 'checkpoints')
+    if not os.path.isdir(directory):
+        return []
+    return sorted(f[:-len('.snap')] for f in os.listdir(directory) if f.endswith('.snap'))
+
+
+def save_checkpoint(calculator: Calculator, name: str, compression: str | None = None) -> str:
+    """
+    Writes the whole calculator state (current value, undo stack, redo stack)
+    to a versioned binary snapshot. The file is replaced atomically.
+
+    The payload is a JSON manifest (current value, operation names and the rare
+    per-entry exceptions) followed by binary columns: one operation code byte
+    per entry and, for a, b and result, an offset array plus an ASCII blob.
+
+    Returns:
+        The path of the written snapshot.
+    """
+    compression = (compression or CalculatorConfig.SNAPSHOT_COMPRESSION).lower()
+    if compression not in CODECS:
+        raise PersistenceError(f"Unknown snapshot compression '{compression}'. Use one of: {', '.join(CODECS)}.")
+    codec, compress, _ = CODECS[compression]
+    path = checkpoint_path(name)
+
+    op_codes, op_names = {}, []
+    undo = calculator.get_history()
+    undo_manifest, undo_sections = _encode_stack(undo, op_codes, op_names)
+    redo_manifest, redo_sections = _encode_stack(calculator.get_redo_history(), op_codes, op_names)
+    manifest = json.dumps({
+        'current_value': str(calculator.get_current_value()),
+        'undo': undo_manifest,
+        'redo': redo_manifest,
+        'operations': op_names,
+    }, separators=(',', ':')).encode('utf-8')
+    data = compress(b''.join([MANIFEST_LENGTH.pack(len(manifest)), manifest, *undo_sections, *redo_sections]))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, SCHEMA_VERSION, codec))
+        f.write(data)
+    os.replace(tmp_path, path)
+    app_logger.info(f"Checkpoint '{name}' saved to {path} ({len(undo)} undo states, {compression}).")
+    return path
+
+
+def restore_checkpoint(calculator: Calculator, name: str, operations: dict | None = None) -> None:
+    """
+    Replaces the calculator state with a snapshot written by save_checkpoint.
+    `operations` adds functions by name to the built-in operations, e.g. the
+    session's macros, whose calls are recorded in history under their names.
+    The stacks are restored as SnapshotStacks, which decode entries on access,
+    so the restore reads and checks the file but builds no per-entry objects.
+
+    Raises:
+        PersistenceError: If the snapshot is missing, corrupt or of an unsupported version.
+    """
+    path = checkpoint_path(name)
+    if not os.path.exists(path):
+        raise PersistenceError(f"Checkpoint '{name}' not found.")
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+        data = f.read()
+    if len(header) < HEADER.size:
+        raise PersistenceError(f"Checkpoint '{name}' is not a calculator snapshot.")
+    magic, version, codec = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise PersistenceError(f"Checkpoint '{name}' is not a calculator snapshot.")
+    if version != SCHEMA_VERSION:
+        raise PersistenceError(f"Checkpoint '{name}' uses schema v{version}; this version reads v{SCHEMA_VERSION}. Save it again.")
+    if codec not in _DECOMPRESSORS:
+        raise PersistenceError(f"Checkpoint '{name}' uses an unknown compression codec ({codec}).")
+    try:
+        view = memoryview(_DECOMPRESSORS[codec](data))
+        (manifest_length,) = MANIFEST_LENGTH.unpack_from(view)
+        position = MANIFEST_LENGTH.size + manifest_length
+        manifest = json.loads(bytes(view[MANIFEST_LENGTH.size:position]))
+        operation_names = manifest['operations']
+    except Exception as e:
+        raise PersistenceError(f"Checkpoint '{name}' is corrupt: {e}")
+
+    registry = _operation_registry()
+    registry.update(operations or {})
+    try:
+        functions = [registry[op_name] for op_name in operation_names]
+    except (KeyError, TypeError) as e:
+        raise PersistenceError(f"Checkpoint '{name}' references an unknown operation: {e}")
+    try:
+        undo, position = _decode_stack(manifest['undo'], view, position, functions)
+        redo, position = _decode_stack(manifest['redo'], view, position, functions)
+        if position != len(view):
+            raise ValueError("unexpected data after the redo stack")
+        current_value = Decimal(manifest['current_value'])
+    except Exception as e:
+        raise PersistenceError(f"Checkpoint '{name}' is corrupt: {e}")
+    calculator.restore_state(current_value, undo, redo)
+    app_logger.info(f"Checkpoint '{name}' restored ({len(undo)} undo states, {len(redo)} redo states).")
@@ -22,4 +22,12 @@ class InvalidInputError(ValidationError):
 
 class InsufficientHistoryError(CalculatorError):
     """Raised when an undo or redo operation is attempted with no history."""
-    pass
\ No newline at end of file
+    pass
+
+class CircularReferenceError(ValidationError):
+    """Raised when a register definition would create a dependency cycle."""
+    pass
+
+class PersistenceError(CalculatorError):
+    """Raised when calculator state cannot be saved to or restored from disk."""
+    pass
@@ -1,11 +1,33 @@
 # app/history.py
 
+import csv
+import io
 import os
-import pandas as pd
 from datetime import datetime # Import the datetime module
+from decimal import Context, Decimal, getcontext, localcontext
+from typing import Iterator
+from app.calculation import ArithmeticCalculation
 from app.calculator_memento import CalculatorMemento
 from app.logger import app_logger, Observer
 from app.calculator_config import CalculatorConfig
+from app.metrics import METRICS
+
+try:
+    import fcntl
+except ImportError: # pragma: no cover
+    fcntl = None  # Advisory locks are unavailable (e.g. Windows)
+
+
+def _lock(fd: int) -> None:
+    """Takes an exclusive advisory lock on an open file descriptor."""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+
+def _unlock(fd: int) -> None:
+    """Releases an advisory lock taken with _lock."""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
 
 class HistoryManager:
     """
@@ -16,13 +38,18 @@ class HistoryManager:
         self._redo_mementos: list[CalculatorMemento] = []
         app_logger.info("HistoryManager initialized.")
 
-    def save_state(self, memento: CalculatorMemento):
-        """Saves a new state to the undo history and clears the redo history."""
-        self._undo_mementos.append(memento)
-        if self._redo_mementos:
-            self._redo_mementos.clear()
-            app_logger.info("Redo history cleared after new state saved.")
-        app_logger.info(f"State saved. Undo stack size: {len(self._undo_mementos)}")
+    def save_state(self, memento: CalculatorMemento, replayable: bool = False):
+        """
+        Saves a new state to the undo history and clears the redo history.
+        `replayable` says the state can be recomputed from its command; it is
+        only used by DeltaHistoryManager.
+        """
+        with METRICS.timer('save_state'):
+            self._undo_mementos.append(memento)
+            if self._redo_mementos:
+                self._redo_mementos.clear()
+                app_logger.info("Redo history cleared after new state saved.")
+            app_logger.info(f"State saved. Undo stack size: {len(self._undo_mementos)}")
 
     def undo(self) -> CalculatorMemento | None:
         """Restores the previous state, moving the current state to the redo stack."""
@@ -49,6 +76,33 @@ class HistoryManager:
     def get_history(self) -> list[CalculatorMemento]:
         """Returns the current list of mementos in the undo stack."""
         return list(self._undo_mementos)
+
+    def history_size(self) -> int:
+        """Returns the number of mementos in the undo stack."""
+        return len(self._undo_mementos)
+
+    def iter_history(self, start: int = 0, stop: int | None = None) -> Iterator[CalculatorMemento]:
+        """
+        Lazily yields the undo-stack mementos in [start, stop) without copying
+        the stack. Cost is proportional to the slice, not to the history size.
+        """
+        size = len(self._undo_mementos)
+        stop = size if stop is None else min(stop, size)
+        return map(self._undo_mementos.__getitem__, range(max(start, 0), stop))
+
+    def get_redo_history(self) -> list[CalculatorMemento]:
+        """Returns the mementos in the redo stack (the next redo is last)."""
+        return list(self._redo_mementos)
+
+    def restore(self, undo_mementos: list[CalculatorMemento], redo_mementos: list[CalculatorMemento]):
+        """
+        Replaces both stacks, e.g. when restoring a checkpoint. The stacks are kept
+        as given; besides lists they may be any sequence with the same append, pop,
+        indexing, len, iteration and clear (such as a checkpoint's SnapshotStack).
+        """
+        self._undo_mementos = undo_mementos
+        self._redo_mementos = redo_mementos
+        app_logger.info(f"HistoryManager restored. Undo stack: {len(undo_mementos)}, Redo stack: {len(redo_mementos)}")
     
     def clear(self):
         """Clears the undo and redo stacks."""
@@ -56,23 +110,294 @@ class HistoryManager:
         self._redo_mementos.clear()
         app_logger.info("HistoryManager cleared.")
 
+# --- Delta-encoded history ---
+
+class _Keyframe:
+    """A fully stored state, with the decimal context its successors are replayed in."""
+    __slots__ = ('memento', 'context')
+
+    def __init__(self, memento: CalculatorMemento, context: Context):
+        self.memento = memento
+        self.context = context
+
+
+class _Delta:
+    """
+    A state stored as the command that produced it, without its result.
+    `a` is None when the first operand was the previous state (a chained calculation).
+    """
+    __slots__ = ('operation', 'a', 'b')
+
+    def __init__(self, operation, a: Decimal | None, b: Decimal):
+        self.operation = operation
+        self.a = a
+        self.b = b
+
+
+def _same_decimal(x: Decimal, y: Decimal | None) -> bool:
+    """True if x and y are the same value with the same representation (5.0 is not 5)."""
+    return x is y or (y is not None and x == y and x.as_tuple() == y.as_tuple())
+
+
+class DeltaHistoryManager(HistoryManager):
+    """
+    A HistoryManager that stores most states as compact deltas.
+
+    Some entries are stored as full keyframes: every `keyframe_interval`-th
+    position, and every state that cannot be replayed (initial and loaded
+    states, reductions, background job results, and restored states whose
+    command does not reproduce their result in the current decimal context). Every other entry
+    keeps only its operation and operands. It drops the result, and drops the
+    first operand when that is the previous state. A state is rebuilt by
+    re-executing the operations since its keyframe, in the decimal context
+    recorded with the keyframe. The rebuilt segment is cached, so consecutive
+    undo/redo steps cost O(1) amortized. At most one segment of full states is
+    held in memory.
+    """
+    def __init__(self, keyframe_interval: int | None = None):
+        super().__init__()
+        self.keyframe_interval = max(1, keyframe_interval or CalculatorConfig.HISTORY_KEYFRAME_INTERVAL)
+        self._top_state: Decimal | None = None
+        # Decimal context of the keyframe the top of the undo stack belongs to
+        self._top_context: Context = getcontext().copy()
+        # Rebuilt mementos for positions [_cache_start, _cache_start + len(_cache)) of one segment.
+        self._cache_start = 0
+        self._cache: list[CalculatorMemento] = []
+        self._cache_context: Context = self._top_context
+
+    def _entry(self, position: int):
+        """Entry at a position of the whole timeline: the undo stack followed by the redo stack."""
+        undo = self._undo_mementos
+        if position < len(undo):
+            return undo[position]
+        return self._redo_mementos[len(undo) + len(self._redo_mementos) - 1 - position]
+
+    @staticmethod
+    def _replay(delta: _Delta, previous_state: Decimal, context: Context) -> CalculatorMemento:
+        a = previous_state if delta.a is None else delta.a
+        command = ArithmeticCalculation(a, delta.b, delta.operation)
+        with localcontext(context):
+            command.result = delta.operation(a, delta.b)
+        return CalculatorMemento.restore(command.result, command)
+
+    def _context_changed(self) -> bool:
+        current = getcontext()
+        return current.prec != self._top_context.prec or current.rounding != self._top_context.rounding
+
+    def save_state(self, memento: CalculatorMemento, replayable: bool = False):
+        """Saves a new state (as a delta when possible) and clears the redo history."""
+        with METRICS.timer('save_state'):
+            position = len(self._undo_mementos)
+            if self._redo_mementos:
+                self._redo_mementos.clear()
+                app_logger.info("Redo history cleared after new state saved.")
+            del self._cache[max(0, position - self._cache_start):]
+
+            command = memento.get_last_command()
+            state = memento.get_state_value()
+            if (not replayable or position % self.keyframe_interval == 0
+                    or state is not command.result or self._context_changed()):
+                self._top_context = getcontext().copy()
+                self._undo_mementos.append(_Keyframe(memento, self._top_context))
+                self._cache_start, self._cache, self._cache_context = position, [memento], self._top_context
+            else:
+                a = None if _same_decimal(command.a, self._top_state) else command.a
+                self._undo_mementos.append(_Delta(command.operation, a, command.b))
+                if self._cache_start + len(self._cache) == position:
+                    self._cache.append(memento)
+            self._top_state = state
+            app_logger.info(f"State saved. Undo stack size: {len(self._undo_mementos)}")
+
+    def _memento_at(self, position: int) -> CalculatorMemento:
+        """Returns the state at a timeline position, rebuilding its segment if needed."""
+        offset = position - self._cache_start
+        if 0 <= offset < len(self._cache):
+            return self._cache[offset]
+        entry = self._entry(position)
+        if offset == len(self._cache) and self._cache and isinstance(entry, _Delta):
+            # The step right after the cached part of the segment (e.g. redo).
+            memento = self._replay(entry, self._cache[-1].get_state_value(), self._cache_context)
+            self._cache.append(memento)
+            return memento
+        start = position
+        while not isinstance(self._entry(start), _Keyframe):
+            start -= 1
+        keyframe = self._entry(start)
+        cache = [keyframe.memento]
+        for p in range(start + 1, position + 1):
+            cache.append(self._replay(self._entry(p), cache[-1].get_state_value(), keyframe.context))
+        self._cache_start, self._cache, self._cache_context = start, cache, keyframe.context
+        return cache[-1]
+
+    def undo(self) -> CalculatorMemento | None:
+        """Restores the previous state, moving the current state to the redo stack."""
+        if len(self._undo_mementos) > 1:
+            self._redo_mementos.append(self._undo_mementos.pop())
+            memento = self._memento_at(len(self._undo_mementos) - 1)
+            # _memento_at leaves the cache on the segment of the new top.
+            self._top_state, self._top_context = memento.get_state_value(), self._cache_context
+            app_logger.info(f"Undo operation. Restoring state. Undo stack: {len(self._undo_mementos)}, Redo stack: {len(self._redo_mementos)}")
+            return memento
+        app_logger.warning("Undo operation failed: No more states in undo history.")
+        return None
+
+    def redo(self) -> CalculatorMemento | None:
+        """Moves a state from the redo stack back to the undo stack."""
+        if not self._redo_mementos:
+            app_logger.warning("Redo operation failed: No states in redo history.")
+            return None
+        self._undo_mementos.append(self._redo_mementos.pop())
+        memento = self._memento_at(len(self._undo_mementos) - 1)
+        self._top_state, self._top_context = memento.get_state_value(), self._cache_context
+        app_logger.info(f"Redo operation. Restoring state. Undo stack: {len(self._undo_mementos)}, Redo stack: {len(self._redo_mementos)}")
+        return memento
+
+    def _iter_timeline(self, start: int, stop: int) -> Iterator[CalculatorMemento]:
+        """Yields the states at timeline positions [start, stop), replaying from the keyframe before start."""
+        first = start
+        while not isinstance(self._entry(first), _Keyframe):
+            first -= 1
+        state, context = None, None
+        for position in range(first, stop):
+            entry = self._entry(position)
+            offset = position - self._cache_start
+            if isinstance(entry, _Keyframe):
+                memento, context = entry.memento, entry.context
+            elif 0 <= offset < len(self._cache):
+                memento = self._cache[offset]
+            else:
+                memento = self._replay(entry, state, context)
+            state = memento.get_state_value()
+            if position >= start:
+                yield memento
+
+    def iter_history(self, start: int = 0, stop: int | None = None) -> Iterator[CalculatorMemento]:
+        """Lazily rebuilds the undo-stack states in [start, stop)."""
+        size = len(self._undo_mementos)
+        stop = size if stop is None else min(stop, size)
+        start = max(start, 0)
+        if start >= stop:
+            return iter(())
+        return self._iter_timeline(start, stop)
+
+    def get_history(self) -> list[CalculatorMemento]:
+        """Returns the (rebuilt) mementos of the undo stack."""
+        return list(self.iter_history())
+
+    def get_redo_history(self) -> list[CalculatorMemento]:
+        """Returns the (rebuilt) mementos of the redo stack (the next redo is last)."""
+        size = len(self._undo_mementos)
+        if not self._redo_mementos:
+            return []
+        return list(self._iter_timeline(size, size + len(self._redo_mementos)))[::-1]
+
+    def _encode_restored(self, position: int, memento: CalculatorMemento, previous_state: Decimal | None):
+        """
+        Encodes a restored state as a delta when replaying its command in the
+        current decimal context gives back exactly the same result.
+        """
+        command = memento.get_last_command()
+        if (position % self.keyframe_interval == 0 or type(command) is not ArithmeticCalculation
+                or not _same_decimal(memento.get_state_value(), command.result)):
+            return _Keyframe(memento, self._top_context)
+        try:
+            with localcontext(self._top_context):
+                replayed = command.operation(command.a, command.b)
+        except Exception:
+            return _Keyframe(memento, self._top_context)
+        if not _same_decimal(replayed, command.result):
+            return _Keyframe(memento, self._top_context)
+        a = None if _same_decimal(command.a, previous_state) else command.a
+        return _Delta(command.operation, a, command.b)
+
+    def restore(self, undo_mementos: list[CalculatorMemento], redo_mementos: list[CalculatorMemento]):
+        """
+        Replaces both stacks, re-encoding the restored states. A restored state
+        becomes a delta only if its command replays to the same result in the
+        current decimal context; otherwise it is kept as a keyframe.
+        """
+        self._top_context = getcontext().copy()
+        # The redo stack continues the timeline in reverse (the next redo is last).
+        timeline = list(undo_mementos) + list(redo_mementos)[::-1]
+        entries, previous_state = [], None
+        for position, memento in enumerate(timeline):
+            entries.append(self._encode_restored(position, memento, previous_state))
+            previous_state = memento.get_state_value()
+        size = len(undo_mementos)
+        super().restore(entries[:size], entries[size:][::-1])
+        self._top_state = timeline[size - 1].get_state_value() if size else None
+        self._cache_start, self._cache, self._cache_context = 0, [], self._top_context
+
+    def clear(self):
+        """Clears the undo and redo stacks."""
+        super().clear()
+        self._top_state = None
+        self._cache_start, self._cache = 0, []
+
+
+def create_history_manager() -> HistoryManager:
+    """Returns the history manager for the configured CALCULATOR_HISTORY_ENCODING."""
+    if CalculatorConfig.HISTORY_ENCODING == 'delta':
+        return DeltaHistoryManager(CalculatorConfig.HISTORY_KEYFRAME_INTERVAL)
+    return HistoryManager()
+
 # --- AutoSaveObserver Class ---
 
+HISTORY_COLUMNS = ['timestamp', 'operation', 'operand_a', 'operand_b', 'result']
+
 class AutoSaveObserver(Observer):
     """
     An observer that automatically saves the calculation history to a CSV file.
+
+    Several calculator processes may share the same history file. Every row is
+    written with a single O_APPEND write so rows never interleave, and the
+    advisory file lock is only taken while the file is still empty so that the
+    header is written exactly once.
     """
-    def __init__(self):
-        self.history_file_path = os.path.join(CalculatorConfig.HISTORY_DIR, 'calculations.csv')
+    def __init__(self, history_file_path: str | None = None):
+        self.history_file_path = history_file_path or os.path.join(CalculatorConfig.HISTORY_DIR, 'calculations.csv')
+        self._encoding = CalculatorConfig.DEFAULT_ENCODING
+        self._header = self._format_row(HISTORY_COLUMNS)
         self._ensure_directory_exists()
 
     def _ensure_directory_exists(self):
         """Creates the history directory if it doesn't exist."""
         directory = os.path.dirname(self.history_file_path)
-        if not os.path.exists(directory):
-            os.makedirs(directory)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
             app_logger.info(f"Created history directory: {directory}")
 
+    def _format_row(self, values) -> bytes:
+        """Formats one CSV line (including the newline) as encoded bytes."""
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerow(values)
+        return buffer.getvalue().encode(self._encoding)
+
+    def _append(self, row: bytes) -> None:
+        """
+        Appends a row to the history file.
+
+        The lock-free fast path is safe because every writer goes through the
+        locked path while the file is empty, so a non-empty file always starts
+        with the header.
+        """
+        fd = os.open(self.history_file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size > 0:
+                os.write(fd, row)
+                return
+            _lock(fd)
+            try:
+                # Re-check under the lock: another process may have won the race.
+                if os.fstat(fd).st_size == 0:
+                    os.write(fd, self._header + row)
+                else:
+                    os.write(fd, row)
+            finally:
+                _unlock(fd)
+        finally:
+            os.close(fd)
+
     def update(self, subject) -> None:
         """
         Saves the latest calculation to the CSV file.
@@ -82,25 +407,17 @@ class AutoSaveObserver(Observer):
             # Get the current time and format it as a string
             timestamp = datetime.now().isoformat()
 
-            # Create a DataFrame for the new calculation
-            new_data = {
-                'timestamp': [timestamp], 
-                'operation': [subject.operation.__name__],
-                'operand_a': [subject.a],
-                'operand_b': [subject.b],
-                'result': [subject.result]
-            }
-            df = pd.DataFrame(new_data)
-            
-            # Re-order columns to match the rubric
-            df = df[['timestamp', 'operation', 'operand_a', 'operand_b', 'result']]
-            
-            if os.path.exists(self.history_file_path):
-                df.to_csv(self.history_file_path, mode='a', header=False, index=False)
-            else:
-                df.to_csv(self.history_file_path, mode='w', header=True, index=False)
-                
+            # Column order matches HISTORY_COLUMNS (the rubric order)
+            row = self._format_row([
+                timestamp,
+                subject.operation.__name__,
+                subject.a,
+                subject.b,
+                subject.result
+            ])
+            self._append(row)
+
             app_logger.info(f"Auto-saved calculation to {self.history_file_path}")
-            
+
         except Exception as e:
-            app_logger.error(f"Failed to auto-save history: {e}")
\ No newline at end of file
+            app_logger.error(f"Failed to auto-save history: {e}")
@@ -0,0 +1,162 @@
+# app/history_follower.py
+
+import csv
+import os
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Iterator
+from app.calculator_config import CalculatorConfig
+from app.history import HISTORY_COLUMNS
+from app.logger import app_logger
+
+# (timestamp, operation, operand_a, operand_b, result), as read from the autosave CSV
+FollowedRow = tuple[datetime, str, Decimal, Decimal, Decimal]
+
+
+class OperationStats:
+    """
+    Running aggregates of the results of one operation.
+    NaN and Infinity results are counted but left out of total/minimum/maximum.
+    """
+    __slots__ = ('count', 'total', 'minimum', 'maximum', 'last')
+
+    def __init__(self):
+        self.count = 0
+        self.total = Decimal(0)
+        self.minimum: Decimal | None = None
+        self.maximum: Decimal | None = None
+        self.last: Decimal | None = None
+
+    def update(self, value: Decimal) -> None:
+        self.count += 1
+        self.last = value
+        if not value.is_finite():
+            return
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def __repr__(self):
+        return (f"OperationStats(count={self.count}, total={self.total}, minimum={self.minimum}, "
+                f"maximum={self.maximum}, last={self.last})")
+
+
+class HistoryFollower:
+    """
+    Reads the rows appended to the autosave CSV since the previous poll.
+
+    The follower keeps the file open and remembers the byte offset after the
+    last complete line it consumed, so each poll reads only new data. A
+    trailing line without its newline is still being written: it is left in
+    the file and read once it is complete. If the file is truncated (it becomes
+    shorter than the offset), the follower starts again from its beginning. If
+    the path is rotated (renamed or deleted, and possibly recreated), the rest
+    of the old file is read before the follower switches to the new one. A
+    truncation that regrows the file past the old offset between two polls
+    cannot be detected from its size.
+
+    Attributes:
+        path: The followed CSV file.
+        offset: Byte offset of the next unread line in the current file.
+        stats: Running aggregates per operation name.
+        rows: Number of rows consumed.
+        skipped: Number of malformed lines skipped.
+    """
+    def __init__(self, path: str | None = None, from_end: bool = False):
+        self.path = path or os.path.join(CalculatorConfig.HISTORY_DIR, 'calculations.csv')
+        self.offset = 0
+        self.stats: dict[str, OperationStats] = {}
+        self.rows = 0
+        self.skipped = 0
+        self._encoding = CalculatorConfig.DEFAULT_ENCODING
+        self._file = None
+        self._identity: tuple[int, int] | None = None
+        if from_end and self._open():
+            self.offset = os.fstat(self._file.fileno()).st_size
+
+    def _open(self) -> bool:
+        """Opens the file at self.path (if it exists) and starts at offset 0."""
+        try:
+            self._file = open(self.path, 'rb')
+        except FileNotFoundError:
+            return False
+        status = os.fstat(self._file.fileno())
+        self._identity = (status.st_dev, status.st_ino)
+        self.offset = 0
+        return True
+
+    def close(self) -> None:
+        """Closes the followed file. The next poll reopens the path from its beginning."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _rotated(self) -> bool:
+        """True if self.path no longer names the open file."""
+        try:
+            status = os.stat(self.path)
+        except FileNotFoundError:
+            return True
+        return (status.st_dev, status.st_ino) != self._identity
+
+    def poll(self) -> list[FollowedRow]:
+        """Returns the complete rows appended since the last poll, and updates the aggregates."""
+        rows = []
+        if self._file is not None and self._rotated():
+            rows.extend(self._read_new())
+            app_logger.info(f"History file {self.path} was rotated; following the new file.")
+            self.close()
+        if self._file is None and not self._open():
+            return rows
+        if os.fstat(self._file.fileno()).st_size < self.offset:
+            app_logger.info(f"History file {self.path} was truncated; reading from the start.")
+            self.offset = 0
+        rows.extend(self._read_new())
+        return rows
+
+    def _read_new(self) -> list[FollowedRow]:
+        """Reads the complete lines after self.offset in the open file."""
+        self._file.seek(self.offset)
+        data = self._file.read()
+        end = data.rfind(b'\n') + 1
+        if not end:
+            return []
+        self.offset += end
+        rows = []
+        for record in csv.reader(data[:end].decode(self._encoding, errors='replace').splitlines()):
+            if record == HISTORY_COLUMNS:
+                continue
+            row = self._parse(record)
+            if row is None:
+                self.skipped += 1
+                continue
+            stats = self.stats.get(row[1])
+            if stats is None:
+                stats = self.stats[row[1]] = OperationStats()
+            stats.update(row[4])
+            rows.append(row)
+        self.rows += len(rows)
+        return rows
+
+    @staticmethod
+    def _parse(record: list[str]) -> FollowedRow | None:
+        if len(record) != len(HISTORY_COLUMNS):
+            app_logger.warning(f"Skipping malformed history row: {record}")
+            return None
+        try:
+            return (datetime.fromisoformat(record[0]), record[1],
+                    Decimal(record[2]), Decimal(record[3]), Decimal(record[4]))
+        except (ValueError, InvalidOperation):
+            app_logger.warning(f"Skipping malformed history row: {record}")
+            return None
+
+    def follow(self, interval: float = 1.0) -> Iterator[FollowedRow]:
+        """Yields rows as they are appended, polling every `interval` seconds while there is nothing new."""
+        while True:
+            rows = self.poll()
+            yield from rows
+            if not rows:
+                time.sleep(interval)
@@ -1,13 +1,58 @@
 # app/input_validators.py
 
 from decimal import Decimal, InvalidOperation
+from typing import Sequence
 from app.exceptions import InvalidInputError
 from app.logger import app_logger
 from app.calculator_config import CalculatorConfig
 
+# validate_many converts values in chunks of this size; a chunk with a bad value is re-checked one by one.
+BULK_CHUNK_SIZE = 1024
+
+
+class ValidationResult:
+    """
+    The outcome of InputValidator.validate_many.
+
+    Attributes:
+        values: The converted Decimals, with None at invalid positions.
+        mask: True where the value at that position is valid.
+        errors: (position, message) pairs for the invalid values, in input order.
+    """
+    __slots__ = ('values', 'mask', 'errors')
+
+    def __init__(self, values: list[Decimal | None], mask: list[bool], errors: list[tuple[int, str]]):
+        self.values = values
+        self.mask = mask
+        self.errors = errors
+
+    @property
+    def valid(self) -> bool:
+        """True if every value passed validation."""
+        return not self.errors
+
+    def valid_values(self) -> list[Decimal]:
+        """Returns only the values that passed validation."""
+        return self.values if not self.errors else [v for v, ok in zip(self.values, self.mask) if ok]
+
+    def summary(self, limit: int = 3) -> str:
+        """Describes the first `limit` errors (positions are 1-based)."""
+        shown = "; ".join(f"#{position + 1}: {message.rstrip('.')}" for position, message in self.errors[:limit])
+        more = f" (and {len(self.errors) - limit} more)" if len(self.errors) > limit else ""
+        return f"{len(self.errors)} of {len(self.values)} values are invalid: {shown}{more}."
+
+
 class InputValidator:
     """A static class for validating user inputs."""
 
+    @staticmethod
+    def _convert(value: str, max_val: Decimal | None) -> Decimal:
+        """Converts and range-checks one value without logging."""
+        decimal_value = Decimal(value)
+        if max_val is not None and abs(decimal_value) > max_val:
+            raise InvalidInputError(f"Input {decimal_value} exceeds maximum allowed value of {max_val}.")
+        return decimal_value
+
     @staticmethod
     def validate_operand(value: str) -> Decimal:
         """
@@ -23,16 +68,56 @@ class InputValidator:
             InvalidInputError: If the input is not a valid number.
         """
         try:
-            # Convert to Decimal, which handles floats, integers, and scientific notation
-            decimal_value = Decimal(value)
-            
-            # Optional: Check against a max value from config if it exists
-            max_val = CalculatorConfig.MAX_INPUT_VALUE
-            if max_val is not None and abs(decimal_value) > max_val:
-                raise InvalidInputError(f"Input {decimal_value} exceeds maximum allowed value of {max_val}.")
-
-            return decimal_value
+            # Convert to Decimal, which handles floats, integers, and scientific notation,
+            # and check it against the max value from config
+            return InputValidator._convert(value, CalculatorConfig.MAX_INPUT_VALUE)
         except InvalidOperation:
             # This is the fix: Raise the specific error with the expected message
             app_logger.warning(f"Validation Failed: '{value}' is not a valid number.")
-            raise InvalidInputError(f"Invalid input: '{value}' is not a valid number.")
\ No newline at end of file
+            raise InvalidInputError(f"Invalid input: '{value}' is not a valid number.")
+
+    @staticmethod
+    def validate_many(values: Sequence[str]) -> ValidationResult:
+        """
+        Validates a whole sequence of strings (e.g. a file or column of operands)
+        with the same rules as validate_operand, without raising on the first
+        bad value.
+
+        Values are converted a chunk at a time with map(Decimal, ...). The parse
+        itself rejects malformed numbers, and the range check is a single
+        max(abs) per chunk. Only chunks that contain an invalid or out-of-range
+        value are re-checked value by value. At most one warning is logged.
+        """
+        max_val = CalculatorConfig.MAX_INPUT_VALUE
+        convert = InputValidator._convert
+        converted: list[Decimal | None] = []
+        mask: list[bool] = []
+        errors: list[tuple[int, str]] = []
+
+        for offset in range(0, len(values), BULK_CHUNK_SIZE):
+            chunk = values[offset:offset + BULK_CHUNK_SIZE]
+            try:
+                decimals = list(map(Decimal, chunk))
+                # A NaN makes the comparison raise, which also sends the chunk to the slow path.
+                if max_val is None or max(map(abs, decimals)) <= max_val:
+                    converted.extend(decimals)
+                    mask.extend([True] * len(decimals))
+                    continue
+            except InvalidOperation:
+                pass
+            for position, value in enumerate(chunk, offset):
+                try:
+                    converted.append(convert(value, max_val))
+                    mask.append(True)
+                    continue
+                except InvalidOperation:
+                    errors.append((position, f"Invalid input: '{value}' is not a valid number."))
+                except InvalidInputError as e:
+                    errors.append((position, str(e)))
+                converted.append(None)
+                mask.append(False)
+
+        result = ValidationResult(converted, mask, errors)
+        if errors:
+            app_logger.warning(f"Bulk validation failed: {result.summary()}")
+        return result
@@ -0,0 +1,183 @@
+# app/jobs.py
+
+import multiprocessing
+import signal
+import time
+from collections import deque
+from decimal import localcontext, getcontext
+from app.calculation import ArithmeticCalculation
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.exceptions import CalculatorError
+from app.logger import app_logger
+from app.operations import Operations
+
+
+def _run_in_worker(operation, a, b, precision, connection) -> None:
+    """Worker process entry point: computes one operation and sends back the outcome."""
+    # The worker shares the REPL's process group; Ctrl-C must detach from a job, not kill it.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        with localcontext() as ctx:
+            ctx.prec = precision
+            connection.send(('done', operation(a, b)))
+    except Exception as e:
+        connection.send(('failed', str(e) or e.__class__.__name__))
+    finally:
+        connection.close()
+
+
+def worth_a_worker(calculation: ArithmeticCalculation, precision: int | None = None) -> bool:
+    """
+    Estimates whether a power or root is slow enough to outweigh starting a worker
+    process (a few milliseconds with fork, far more with spawn).
+
+    Integer powers are a few squarings and stay fast at any precision. Fractional
+    exponents, including every root, go through exp/ln, whose cost grows roughly
+    with the cube of the precision: about 0.1 ms at 28 digits, 8 ms at 500 and
+    2.5 s at 5000. Those run in a worker from JOB_MIN_PRECISION digits on.
+    """
+    operation, b = calculation.operation, calculation.b
+    if operation is not Operations.power and operation is not Operations.root:
+        # Other BACKGROUND_OPERATIONS have no cost model; they always use a worker.
+        return True
+    if (precision or getcontext().prec) < CalculatorConfig.JOB_MIN_PRECISION or not b.is_finite() or b == 0:
+        return False
+    exponent = 1 / b if operation is Operations.root else b
+    return exponent != exponent.to_integral_value()
+
+
+class Job:
+    """A calculation running in its own worker process."""
+    __slots__ = ('id', 'command', 'calculation', 'status', 'error', 'submitted', 'finished',
+                 '_process', '_connection')
+
+    RUNNING, DONE, FAILED, CANCELLED, COMMITTED = 'running', 'done', 'failed', 'cancelled', 'committed'
+
+    def __init__(self, job_id: int, command: str, calculation: ArithmeticCalculation):
+        self.id = job_id
+        self.command = command
+        self.calculation = calculation
+        self.status = Job.RUNNING
+        self.error: str | None = None
+        self.submitted = time.monotonic()
+        self.finished: float | None = None
+        self._process = None
+        self._connection = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.submitted
+
+    def describe(self) -> str:
+        calc = self.calculation
+        return f"{self.command} {calc.a} {calc.b}"
+
+
+class JobManager:
+    """
+    Runs long calculations in worker processes so the REPL stays responsive.
+
+    Each job gets its own process, which makes cancellation a simple terminate.
+    Finished jobs are committed to the Calculator strictly in submission order:
+    a finished job waits until every job submitted before it has completed,
+    failed or been cancelled.
+    """
+    def __init__(self, calculator: Calculator):
+        self.calculator = calculator
+        self._jobs: dict[int, Job] = {}
+        self._uncommitted: deque[Job] = deque()
+        self._next_id = 1
+
+    def jobs(self) -> list[Job]:
+        """Returns all jobs of the session in submission order."""
+        return list(self._jobs.values())
+
+    def get(self, job_id: int) -> Job:
+        try:
+            return self._jobs[job_id]
+        except KeyError:
+            raise CalculatorError(f"Unknown job #{job_id}.")
+
+    def submit(self, command: str, calculation: ArithmeticCalculation) -> Job:
+        """Starts computing a calculation in a new worker process."""
+        job = Job(self._next_id, command, calculation)
+        self._next_id += 1
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(
+            target=_run_in_worker,
+            args=(calculation.operation, calculation.a, calculation.b, getcontext().prec, sender),
+            name=f"calculator-job-{job.id}", daemon=True
+        )
+        process.start()
+        sender.close()
+        job._process, job._connection = process, receiver
+        self._jobs[job.id] = job
+        self._uncommitted.append(job)
+        app_logger.info(f"Submitted job #{job.id}: {job.describe()}")
+        return job
+
+    def _collect(self, job: Job, timeout: float | None = 0) -> None:
+        """Picks up the outcome of a running job if it is available within timeout."""
+        if job.status != Job.RUNNING or not job._connection.poll(timeout):
+            return
+        try:
+            status, payload = job._connection.recv()
+        except EOFError:
+            status, payload = Job.FAILED, "Worker exited without a result."
+        if status == Job.DONE:
+            job.calculation.result = payload
+        else:
+            job.error = payload
+        job.status = status
+        job.finished = time.monotonic()
+        self._release(job)
+
+    @staticmethod
+    def _release(job: Job) -> None:
+        job._connection.close()
+        job._process.join()
+
+    def wait(self, job_id: int, timeout: float | None = None) -> Job:
+        """Blocks until the job finishes (or timeout elapses) and returns it."""
+        job = self.get(job_id)
+        self._collect(job, timeout)
+        return job
+
+    def cancel(self, job_id: int) -> Job:
+        """Terminates a running job. Finished jobs cannot be cancelled."""
+        job = self.get(job_id)
+        self._collect(job)
+        if job.status != Job.RUNNING:
+            raise CalculatorError(f"Job #{job.id} is already {job.status}.")
+        job._process.terminate()
+        job.status = Job.CANCELLED
+        job.finished = time.monotonic()
+        self._release(job)
+        app_logger.info(f"Cancelled job #{job.id}")
+        return job
+
+    def commit_ready(self) -> list[Job]:
+        """
+        Commits finished jobs to the calculator in submission order, stopping at
+        the first job that is still running. Returns the jobs settled by this call
+        (committed, failed or cancelled).
+        """
+        settled = []
+        while self._uncommitted:
+            job = self._uncommitted[0]
+            self._collect(job)
+            if job.status == Job.RUNNING:
+                break
+            self._uncommitted.popleft()
+            if job.status == Job.DONE:
+                self.calculator.commit_calculation(job.calculation)
+                job.status = Job.COMMITTED
+            settled.append(job)
+        return settled
+
+    def cancel_all(self) -> None:
+        """Terminates every running job (used on exit)."""
+        for job in self._jobs.values():
+            if job.status == Job.RUNNING:
+                self.cancel(job.id)
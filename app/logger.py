@@ -8,11 +8,15 @@ from app.calculator_config import CalculatorConfig
 
 # --- Observer Pattern Base Classes ---
 class Observer(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def update(self, subject) -> None:
         pass # pragma: no cover
 
 class Subject(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def attach(self, observer: Observer) -> None:
         pass # pragma: no cover
@@ -0,0 +1,258 @@
+# app/macros.py
+
+import json
+import os
+import re
+from decimal import Decimal
+from app.calculator_config import CalculatorConfig
+from app.exceptions import ValidationError
+from app.input_validators import InputValidator
+from app.logger import app_logger
+from app.operations import OperationFactory
+
+NAME_PATTERN = re.compile(r'^[a-z_][a-z0-9_]*$')
+TOKEN_PATTERN = re.compile(r'[(),=]|[^\s(),=]+')
+
+
+class Macro:
+    """
+    A user-defined, parameterized formula such as
+    `margin(p, c) = percent (subtract p c) p`.
+
+    The definition is parsed and validated once and compiled into a plain
+    Python function, so calling a macro costs the same as calling the
+    Operations functions directly. `uses` names the other macros it calls.
+    """
+    __slots__ = ('name', 'params', 'definition', 'function', 'uses')
+
+    def __init__(self, name: str, params: tuple[str, ...], definition: str, function,
+                 uses: frozenset[str] = frozenset()):
+        self.name = name
+        self.params = params
+        self.definition = definition
+        self.function = function
+        self.uses = uses
+
+    @property
+    def arity(self) -> int:
+        return len(self.params)
+
+    def check_arity(self, args) -> None:
+        """Raises ValidationError unless `args` has one value per parameter."""
+        if len(args) != self.arity:
+            raise ValidationError(f"Macro '{self.name}' expects {self.arity} argument(s), got {len(args)}.")
+
+    def __call__(self, *args: Decimal) -> Decimal:
+        self.check_arity(args)
+        return self.function(*args)
+
+    def __repr__(self):
+        return f"Macro({self.definition})"
+
+
+class _Compiler:
+    """Recursive-descent parser that emits Python source for a macro body."""
+
+    def __init__(self, tokens: list[str], params: tuple[str, ...], macros: dict[str, Macro]):
+        self.tokens = tokens
+        self.position = 0
+        self.params = {name: f"_p{i}" for i, name in enumerate(params)}
+        self.macros = macros
+        self.callables: list = []
+        self.constants: list[Decimal] = []
+        self.used_macros: set[str] = set()
+
+    def _next(self) -> str:
+        if self.position >= len(self.tokens):
+            raise ValidationError("Unexpected end of macro body.")
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def compile(self) -> str:
+        source = self._expression()
+        if self.position != len(self.tokens):
+            raise ValidationError(f"Unexpected token '{self.tokens[self.position]}' in macro body.")
+        return source
+
+    def _expression(self) -> str:
+        token = self._next()
+        if token == '(':
+            source = self._expression()
+            if self._next() != ')':
+                raise ValidationError("Expected ')' in macro body.")
+            return source
+        if token in self.params:
+            return self.params[token]
+        function, arity = self._lookup(token)
+        if function is None:
+            self.constants.append(InputValidator.validate_operand(token))
+            return f"_consts[{len(self.constants) - 1}]"
+        index = len(self.callables)
+        self.callables.append(function)
+        args = ', '.join(self._expression() for _ in range(arity))
+        return f"_calls[{index}]({args})"
+
+    def _lookup(self, token: str):
+        """Resolves an operation or previously defined macro, binding it now."""
+        if token in OperationFactory.OPERATION_MAP:
+            return OperationFactory.OPERATION_MAP[token], 2
+        if token in self.macros:
+            macro = self.macros[token]
+            self.used_macros.add(token)
+            return macro.function, macro.arity
+        if NAME_PATTERN.match(token) and token not in ('nan', 'inf', 'infinity'):
+            raise ValidationError(f"Unknown name '{token}' in macro body.")
+        return None, 0
+
+
+class MacroRegistry:
+    """
+    Holds the user's macros and persists their definitions as JSON.
+    Definitions are recompiled once when the file is loaded. Macros are kept
+    in dependency order (a macro after every macro it calls), so the saved
+    definitions load back to the same functions.
+    """
+    def __init__(self, file_path: str | None = None, reserved: set[str] | None = None):
+        self.file_path = file_path or os.path.join(CalculatorConfig.HISTORY_DIR, 'macros.json')
+        self.reserved = set(reserved or ()) | set(OperationFactory.OPERATION_MAP)
+        self._macros: dict[str, Macro] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._macros
+
+    def get(self, name: str) -> Macro:
+        try:
+            return self._macros[name]
+        except KeyError:
+            raise ValidationError(f"Unknown macro '{name}'.")
+
+    def macros(self) -> list[Macro]:
+        """Returns all macros in definition order."""
+        return list(self._macros.values())
+
+    @staticmethod
+    def _parse_header(tokens: list[str]) -> tuple[str, tuple[str, ...], list[str]]:
+        """Splits `name ( p1 , p2 ) = body...` into its parts."""
+        if len(tokens) < 5 or tokens[1] != '(':
+            raise ValidationError("Usage: def <name>(<params>) = <expression>")
+        name = tokens[0]
+        try:
+            close = tokens.index(')')
+        except ValueError:
+            raise ValidationError("Expected ')' after macro parameters.")
+        param_tokens = tokens[2:close]
+        params = tuple(param_tokens[0::2])
+        if (param_tokens and len(param_tokens) % 2 == 0) or any(sep != ',' for sep in param_tokens[1::2]):
+            raise ValidationError("Macro parameters must be separated by commas.")
+        if close + 1 >= len(tokens) or tokens[close + 1] != '=':
+            raise ValidationError("Expected '=' after macro parameters.")
+        return name, params, tokens[close + 2:]
+
+    def _dependents(self, name: str) -> list[str]:
+        """Names of the macros that call `name`, directly or indirectly, in definition order."""
+        dependents: list[str] = []
+        for macro in self._macros.values():
+            if name in macro.uses or not macro.uses.isdisjoint(dependents):
+                dependents.append(macro.name)
+        return dependents
+
+    @staticmethod
+    def _compile(name: str, params: tuple[str, ...], body: list[str], macros: dict[str, Macro]) -> Macro:
+        """Compiles a parsed definition against the given macros."""
+        if not body:
+            raise ValidationError("Macro body is empty.")
+        compiler = _Compiler(body, params, macros)
+        expression = compiler.compile()
+        arguments = ', '.join(compiler.params[p] for p in params)
+        namespace = {'_calls': tuple(compiler.callables), '_consts': tuple(compiler.constants)}
+        # Only generated identifiers reach the source; names and numbers stay in the namespace.
+        code = compile(f"def _macro({arguments}):\n    return {expression}\n", f"<macro {name}>", 'exec')
+        exec(code, namespace)
+        function = namespace['_macro']
+        function.__name__ = name
+
+        body_text = ' '.join(body).replace('( ', '(').replace(' )', ')')
+        definition = f"{name}({', '.join(params)}) = {body_text}"
+        return Macro(name, params, definition, function, frozenset(compiler.used_macros))
+
+    def define(self, text: str, persist: bool = True) -> Macro:
+        """
+        Parses, validates and compiles a macro definition.
+
+        Redefining a macro also recompiles the macros that call it, so the
+        session computes what the saved definitions compute after a restart.
+        The macro and its dependents move to the end of the definition order.
+
+        Raises:
+            ValidationError: If the definition is malformed or uses unknown names,
+                or if a redefinition would break or call back into its dependents.
+        """
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        name, params, body = self._parse_header(tokens)
+        if not NAME_PATTERN.match(name) or name in self.reserved:
+            raise ValidationError(f"Invalid macro name '{name}'.")
+        for param in params:
+            if not NAME_PATTERN.match(param) or param in OperationFactory.OPERATION_MAP or param in self._macros:
+                raise ValidationError(f"Invalid parameter name '{param}'.")
+        if len(set(params)) != len(params):
+            raise ValidationError("Macro parameters must be unique.")
+
+        dependents = self._dependents(name) if name in self._macros else []
+        for token in body:
+            if token == name or token in dependents:
+                raise ValidationError(f"Macro '{name}' cannot call '{token}', which would call '{name}' back.")
+        # Everything else keeps its order; the new macro and its recompiled dependents follow.
+        macros = {key: m for key, m in self._macros.items() if key != name and key not in dependents}
+        macro = macros[name] = self._compile(name, params, body, macros)
+        for dependent in dependents:
+            d_name, d_params, d_body = self._parse_header(TOKEN_PATTERN.findall(self._macros[dependent].definition))
+            try:
+                macros[dependent] = self._compile(d_name, d_params, d_body, macros)
+            except ValidationError as e:
+                raise ValidationError(f"Redefining '{name}' would break macro '{dependent}': {e}")
+        self._macros = macros
+        app_logger.info(f"Macro defined: {macro.definition}")
+        if persist:
+            self.save()
+        return macro
+
+    def remove(self, name: str) -> None:
+        """
+        Deletes a macro.
+
+        Raises:
+            ValidationError: If the macro is unknown or other macros call it.
+        """
+        self.get(name)
+        dependents = self._dependents(name)
+        if dependents:
+            raise ValidationError(f"Macro '{name}' is used by {', '.join(dependents)}. Remove or redefine them first.")
+        del self._macros[name]
+        self.save()
+
+    def save(self) -> None:
+        """Writes all definitions to the macro file."""
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.file_path, 'w', encoding=CalculatorConfig.DEFAULT_ENCODING) as f:
+            json.dump([m.definition for m in self._macros.values()], f, indent=2)
+
+    def load(self) -> int:
+        """
+        Loads and compiles the definitions stored in the macro file.
+        Invalid entries are logged and skipped. Returns the number loaded.
+        """
+        if not os.path.exists(self.file_path):
+            return 0
+        with open(self.file_path, encoding=CalculatorConfig.DEFAULT_ENCODING) as f:
+            definitions = json.load(f)
+        loaded = 0
+        for definition in definitions:
+            try:
+                self.define(definition, persist=False)
+                loaded += 1
+            except ValidationError as e:
+                app_logger.warning(f"Skipping stored macro '{definition}': {e}")
+        return loaded
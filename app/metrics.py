@@ -0,0 +1,219 @@
+# app/metrics.py
+
+import os
+import threading
+import time
+from app.calculator_config import CalculatorConfig
+from app.logger import app_logger
+
+# Each power of two is split into 2**SUB_BUCKET_BITS linear sub-buckets, which
+# keeps the relative error of any recorded latency below ~6%.
+SUB_BUCKET_BITS = 4
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+_LINEAR_LIMIT = SUB_BUCKET_COUNT * 2
+
+
+def _bucket_index(value: int) -> int:
+    """Maps a latency in nanoseconds to its log-linear bucket index."""
+    if value < _LINEAR_LIMIT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return _LINEAR_LIMIT + (shift - 1) * SUB_BUCKET_COUNT + ((value >> shift) - SUB_BUCKET_COUNT)
+
+
+def _bucket_upper_bound(index: int) -> int:
+    """Returns the highest latency (in nanoseconds) that falls into a bucket."""
+    if index < _LINEAR_LIMIT:
+        return index
+    shift = (index - _LINEAR_LIMIT) // SUB_BUCKET_COUNT + 1
+    mantissa = (index - _LINEAR_LIMIT) % SUB_BUCKET_COUNT + SUB_BUCKET_COUNT
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    An HDR-style latency histogram with log-linear buckets.
+    Recording is O(1) and memory grows only with the range of observed values.
+    """
+    __slots__ = ('_counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self._counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, nanoseconds: int) -> None:
+        """Records a single latency sample in nanoseconds."""
+        index = _bucket_index(nanoseconds)
+        self._counts[index] = self._counts.get(index, 0) + 1
+        if self.count == 0 or nanoseconds < self.min:
+            self.min = nanoseconds
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+        self.count += 1
+        self.total += nanoseconds
+
+    def mean(self) -> float:
+        """Returns the mean latency in nanoseconds."""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> int:
+        """Returns the latency (in nanoseconds) at the given percentile (0-100)."""
+        if self.count == 0:
+            return 0
+        threshold = max(1, int(round(self.count * percent / 100.0)))
+        seen = 0
+        for index, bucket_count in sorted(dict(self._counts).items()):
+            seen += bucket_count
+            if seen >= threshold:
+                return min(_bucket_upper_bound(index), self.max)
+        return self.max # pragma: no cover
+
+
+class _Timer:
+    """Context manager that records the elapsed time into a histogram."""
+    __slots__ = ('_histogram', '_start')
+
+    def __init__(self, histogram: LatencyHistogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._histogram.record(time.perf_counter_ns() - self._start)
+        return False
+
+
+class _NullTimer:
+    """No-op timer used when metrics are disabled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """
+    Holds one latency histogram per (stage, operation) pair.
+    Stages are the hot-path steps of a command: validate, lookup, perform,
+    notify, save_state and the end-to-end command.
+    """
+    QUANTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._histograms: dict[tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str, operation: str = 'all') -> LatencyHistogram:
+        """Returns (creating if needed) the histogram for a stage and operation."""
+        key = (stage, operation)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram())
+        return histogram
+
+    def timer(self, stage: str, operation: str = 'all'):
+        """Returns a context manager that times the enclosed block."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.histogram(stage, operation))
+
+    def reset(self) -> None:
+        """Discards all recorded samples."""
+        with self._lock:
+            self._histograms = {}
+
+    def snapshot(self) -> list[tuple[str, str, LatencyHistogram]]:
+        """Returns the recorded histograms sorted by stage and operation."""
+        return [(stage, op, hist) for (stage, op), hist in sorted(dict(self._histograms).items())]
+
+    def render(self) -> str:
+        """Formats all histograms as a human-readable table (latencies in microseconds)."""
+        rows = self.snapshot()
+        if not rows:
+            return "No metrics recorded yet."
+        lines = [f"{'stage':<12}{'operation':<22}{'count':>8}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}"]
+        for stage, op, hist in rows:
+            lines.append(
+                f"{stage:<12}{op:<22}{hist.count:>8}{hist.mean() / 1000:>10.1f}"
+                f"{hist.percentile(50) / 1000:>10.1f}{hist.percentile(90) / 1000:>10.1f}"
+                f"{hist.percentile(99) / 1000:>10.1f}{hist.max / 1000:>10.1f}"
+            )
+        return "\n".join(lines)
+
+    def to_prometheus(self) -> str:
+        """Formats all histograms in the Prometheus text exposition format."""
+        name = 'calculator_stage_latency_seconds'
+        lines = [
+            f"# HELP {name} Latency of calculator hot-path stages.",
+            f"# TYPE {name} summary",
+        ]
+        for stage, op, hist in self.snapshot():
+            labels = f'stage="{stage}",operation="{op}"'
+            for quantile in self.QUANTILES:
+                value = hist.percentile(quantile * 100) / 1e9
+                lines.append(f'{name}{{{labels},quantile="{quantile}"}} {value:.9f}')
+            lines.append(f"{name}_sum{{{labels}}} {hist.total / 1e9:.9f}")
+            lines.append(f"{name}_count{{{labels}}} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+class PrometheusFileExporter:
+    """
+    Periodically writes the registry in Prometheus text format to a file,
+    so a local node agent (e.g. the textfile collector) can scrape it.
+    """
+    def __init__(self, registry: MetricsRegistry, file_path: str, interval: float):
+        self.registry = registry
+        self.file_path = file_path
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def write_once(self) -> None:
+        """Atomically replaces the metrics file with the current values."""
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.file_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding=CalculatorConfig.DEFAULT_ENCODING) as f:
+            f.write(self.registry.to_prometheus())
+        os.replace(tmp_path, self.file_path)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.write_once()
+            except OSError as e: # pragma: no cover
+                app_logger.error(f"Failed to export metrics: {e}")
+
+    def start(self) -> None:
+        """Starts the background export thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='metrics-exporter', daemon=True)
+            self._thread.start()
+            app_logger.info(f"Prometheus metrics exporter writing to {self.file_path}")
+
+    def stop(self) -> None:
+        """Stops the export thread and writes a final snapshot."""
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+            self.write_once()
+
+
+# Shared registry used by the calculator hot path.
+METRICS = MetricsRegistry(enabled=CalculatorConfig.METRICS_ENABLED)
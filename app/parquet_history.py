@@ -0,0 +1,375 @@
+# app/parquet_history.py
+
+import csv
+import os
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Iterable, Iterator
+from app.calculator_config import CalculatorConfig
+from app.exceptions import PersistenceError
+from app.history import HISTORY_COLUMNS
+from app.logger import app_logger, Observer
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError: # pragma: no cover
+    pa = pc = pq = None  # Parquet support is optional
+
+# A history row: (timestamp, operation, operand_a, operand_b, result)
+HistoryRow = tuple[datetime, str, Decimal, Decimal, Decimal | None]
+
+DECIMAL128_MAX_PRECISION = 38
+DECIMAL256_MAX_PRECISION = 76
+
+
+def _require_pyarrow() -> None:
+    if pq is None: # pragma: no cover
+        raise PersistenceError("Parquet support requires pyarrow. Install it with 'pip install pyarrow'.")
+
+
+def parquet_export_path() -> str:
+    """Default destination of 'export --format parquet'."""
+    return os.path.join(CalculatorConfig.HISTORY_DIR, 'calculations.parquet')
+
+
+def parquet_parts_dir() -> str:
+    """Directory of the part files written by the Parquet autosave mode."""
+    return os.path.join(CalculatorConfig.HISTORY_DIR, 'calculations_parquet')
+
+
+class _DecimalShape:
+    """
+    Tracks the integer digits and scale needed to hold a column of decimals
+    exactly, so the narrowest Arrow decimal type can be chosen per file.
+    """
+    __slots__ = ('integer_digits', 'scale', 'finite')
+
+    def __init__(self):
+        self.integer_digits = 1
+        self.scale = 0
+        self.finite = True
+
+    def add(self, value: Decimal | None) -> None:
+        if value is None:
+            return
+        if not value.is_finite():
+            self.finite = False
+            return
+        _, digits, exponent = value.as_tuple()
+        if -exponent > self.scale:
+            self.scale = -exponent
+        if len(digits) + exponent > self.integer_digits:
+            self.integer_digits = len(digits) + exponent
+
+    def arrow_type(self):
+        """decimal128 up to 38 digits, decimal256 up to 76, otherwise strings."""
+        precision = self.integer_digits + self.scale
+        if not self.finite or precision > DECIMAL256_MAX_PRECISION:
+            return pa.string()
+        if precision > DECIMAL128_MAX_PRECISION:
+            return pa.decimal256(precision, self.scale)
+        return pa.decimal128(precision, self.scale)
+
+
+def history_schema(operand_a_type, operand_b_type, result_type):
+    """The Parquet schema of the calculation history."""
+    _require_pyarrow()
+    return pa.schema([
+        ('timestamp', pa.timestamp('us')),
+        ('operation', pa.dictionary(pa.int32(), pa.string())),
+        ('operand_a', operand_a_type),
+        ('operand_b', operand_b_type),
+        ('result', result_type),
+    ])
+
+
+def _schema_for(rows: Iterable[HistoryRow]):
+    """Infers the decimal types of one file from all of its rows."""
+    shapes = (_DecimalShape(), _DecimalShape(), _DecimalShape())
+    for row in rows:
+        shapes[0].add(row[2])
+        shapes[1].add(row[3])
+        shapes[2].add(row[4])
+    return history_schema(*(shape.arrow_type() for shape in shapes))
+
+
+def _column(values: list, arrow_type):
+    if pa.types.is_string(arrow_type):
+        values = [None if value is None else str(value) for value in values]
+    return pa.array(values, type=arrow_type)
+
+
+def _build_table(rows: list[HistoryRow], schema):
+    columns = list(zip(*rows)) if rows else [[] for _ in HISTORY_COLUMNS]
+    arrays = [
+        pa.array(columns[0], type=pa.timestamp('us')),
+        pa.array(columns[1], type=pa.string()).dictionary_encode(),
+    ]
+    arrays.extend(_column(list(columns[i]), schema.field(i).type) for i in (2, 3, 4))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _write_atomically(path: str, schema, batches: Iterable[list[HistoryRow]], row_group_size: int) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with pq.ParquetWriter(tmp_path, schema, write_statistics=True) as writer:
+            for batch in batches:
+                writer.write_table(_build_table(batch, schema), row_group_size=row_group_size)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _batched(rows: Iterable[HistoryRow], size: int) -> Iterator[list[HistoryRow]]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def write_history(rows: list[HistoryRow], path: str, row_group_size: int | None = None) -> int:
+    """
+    Writes history rows to a Parquet file with typed columns and row-group
+    statistics. The file is replaced atomically.
+
+    Returns:
+        The number of rows written.
+    """
+    _require_pyarrow()
+    row_group_size = row_group_size or CalculatorConfig.PARQUET_ROW_GROUP_SIZE
+    _write_atomically(path, _schema_for(rows), _batched(rows, row_group_size), row_group_size)
+    return len(rows)
+
+
+def _parse_decimal(text: str, line: int) -> Decimal | None:
+    if text == '':
+        return None
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        raise PersistenceError(f"Invalid number '{text}' on line {line} of the history file.")
+
+
+def read_history_csv(csv_path: str) -> Iterator[HistoryRow]:
+    """Streams typed rows from an autosave CSV file."""
+    with open(csv_path, newline='', encoding=CalculatorConfig.DEFAULT_ENCODING) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is not None and header != HISTORY_COLUMNS:
+            raise PersistenceError(f"{csv_path} is not a calculation history file.")
+        for line, record in enumerate(reader, start=2):
+            if len(record) != len(HISTORY_COLUMNS):
+                raise PersistenceError(f"Malformed row on line {line} of the history file.")
+            try:
+                timestamp = datetime.fromisoformat(record[0])
+            except ValueError:
+                raise PersistenceError(f"Invalid timestamp '{record[0]}' on line {line} of the history file.")
+            yield (timestamp, record[1], _parse_decimal(record[2], line),
+                   _parse_decimal(record[3], line), _parse_decimal(record[4], line))
+
+
+def export_csv(csv_path: str, parquet_path: str, row_group_size: int | None = None) -> int:
+    """
+    Converts an autosave CSV file to Parquet. The CSV is streamed twice (once to
+    infer the decimal types, once to write row groups), so memory stays bounded
+    by the row-group size however large the history is.
+
+    Returns:
+        The number of rows exported.
+    """
+    _require_pyarrow()
+    if not os.path.exists(csv_path):
+        raise PersistenceError(f"History file not found at {csv_path}")
+    row_group_size = row_group_size or CalculatorConfig.PARQUET_ROW_GROUP_SIZE
+    count = 0
+
+    def counted_rows():
+        nonlocal count
+        for row in read_history_csv(csv_path):
+            count += 1
+            yield row
+
+    schema = _schema_for(counted_rows())
+    if count == 0:
+        raise PersistenceError(f"History file {csv_path} has no calculations to export.")
+    _write_atomically(parquet_path, schema, _batched(read_history_csv(csv_path), row_group_size), row_group_size)
+    app_logger.info(f"Exported {count} calculations from {csv_path} to {parquet_path}")
+    return count
+
+
+def _parquet_files(path: str) -> list[str]:
+    if os.path.isdir(path):
+        return [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.parquet')]
+    if os.path.exists(path):
+        return [path]
+    raise PersistenceError(f"Parquet history not found at {path}")
+
+
+def _decimal_column(column) -> list:
+    """
+    Converts a decimal (or string) column to Decimals. The conversion goes
+    through Arrow strings, which is several times faster than to_pylist() on
+    decimal columns. Zeros padded by a fixed column scale are dropped on the
+    way (1.50 -> 1.5, 2.00 -> 2).
+    """
+    if pa.types.is_decimal(column.type):
+        if column.type.scale > 0:
+            column = pc.replace_substring_regex(pc.cast(column, pa.string()), r'(\.\d*?)0+$', r'\1')
+            column = pc.replace_substring_regex(column, r'\.$', '')
+        else:
+            column = pc.cast(column, pa.string())
+    return [None if value is None else Decimal(value) for value in column.to_pylist()]
+
+
+def read_history(path: str, since: datetime | None = None, until: datetime | None = None,
+                 operations: Iterable[str] | None = None) -> list[HistoryRow]:
+    """
+    Reads history rows from a Parquet file or a directory of part files,
+    ordered by timestamp.
+
+    The time range (since <= timestamp <= until) and operation filters are
+    pushed down to the Parquet reader: row groups whose min/max statistics
+    cannot match are skipped without being read or decoded.
+    """
+    _require_pyarrow()
+    filters = []
+    if since is not None:
+        filters.append(('timestamp', '>=', since))
+    if until is not None:
+        filters.append(('timestamp', '<=', until))
+    if operations:
+        filters.append(('operation', 'in', sorted(operations)))
+
+    rows: list[HistoryRow] = []
+    # Files are read one by one because part files may use different decimal types.
+    for file_path in _parquet_files(path):
+        table = pq.read_table(file_path, filters=filters or None)
+        if table.num_rows == 0:
+            continue
+        rows.extend(zip(
+            # Via numpy: to_pylist() on timestamp and dictionary columns is slow.
+            table.column('timestamp').to_numpy().astype(object).tolist(),
+            pc.cast(table.column('operation'), pa.string()).to_pylist(),
+            _decimal_column(table.column('operand_a')),
+            _decimal_column(table.column('operand_b')),
+            _decimal_column(table.column('result')),
+        ))
+    rows.sort(key=lambda row: row[0])
+    return rows
+
+
+class ParquetAutoSaveObserver(Observer):
+    """
+    Parquet-native autosave. Calculations are buffered in memory and written as
+    one immutable part file per PARQUET_ROW_GROUP_SIZE rows (and on flush), so
+    several processes can share the directory without locking. Rows that have
+    not been flushed yet are lost if the process is killed.
+    """
+    def __init__(self, directory: str | None = None, flush_rows: int | None = None):
+        _require_pyarrow()
+        self.directory = directory or parquet_parts_dir()
+        self.flush_rows = flush_rows or CalculatorConfig.PARQUET_ROW_GROUP_SIZE
+        self._rows: list[HistoryRow] = []
+        self._sequence = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered rows not yet written to disk."""
+        return len(self._rows)
+
+    def update(self, subject) -> None:
+        self._rows.append((datetime.now(), subject.operation.__name__, subject.a, subject.b, subject.result))
+        if len(self._rows) >= self.flush_rows:
+            self.flush()
+
+    def read_history(self, since: datetime | None = None, until: datetime | None = None,
+                     operations: Iterable[str] | None = None) -> list[HistoryRow]:
+        """
+        Reads the part files like read_history() and adds the matching rows that
+        are still buffered, without flushing them: a flush per query would leave
+        many tiny part files behind.
+        """
+        rows = read_history(self.directory, since, until, operations)
+        wanted = set(operations) if operations else None
+        buffered = [row for row in self._rows
+                    if (since is None or row[0] >= since) and (until is None or row[0] <= until)
+                    and (wanted is None or row[1] in wanted)]
+        if buffered:
+            rows.extend(buffered)
+            rows.sort(key=lambda row: row[0])
+        return rows
+
+    def flush(self) -> str | None:
+        """
+        Writes the buffered rows to a new part file and returns its path. If the
+        write fails, the rows stay buffered and the next flush tries again.
+        """
+        rows = self._rows
+        if not rows:
+            return None
+        stamp = rows[0][0].strftime('%Y%m%d-%H%M%S-%f')
+        path = os.path.join(self.directory, f"part-{stamp}-{os.getpid()}-{self._sequence:05d}.parquet")
+        try:
+            write_history(rows, path, self.flush_rows)
+        except Exception as e:
+            app_logger.error(f"Failed to auto-save history ({len(rows)} calculations kept in memory): {e}")
+            return None
+        self._rows = []
+        self._sequence += 1
+        app_logger.info(f"Auto-saved {len(rows)} calculations to {path}")
+        return path
+
+
+def parquet_history_path() -> str:
+    """Where Parquet history is read from: the autosave parts, or the exported file."""
+    if CalculatorConfig.AUTO_SAVE_FORMAT == 'parquet':
+        return parquet_parts_dir()
+    return parquet_export_path()
+
+
+def refresh_export() -> str:
+    """
+    Returns the default export of the CSV history for filtered reads, exporting
+    the CSV again first if it changed after the export was written. Without
+    this, 'query' and filtered 'load' would read whatever the last 'export'
+    wrote.
+    """
+    csv_path = os.path.join(CalculatorConfig.HISTORY_DIR, 'calculations.csv')
+    parquet_path = parquet_export_path()
+    try:
+        csv_modified = os.stat(csv_path).st_mtime_ns
+    except FileNotFoundError:
+        return parquet_path
+    if not os.path.exists(parquet_path) or csv_modified >= os.stat(parquet_path).st_mtime_ns:
+        export_csv(csv_path, parquet_path)
+    return parquet_path
+
+
+def export_history(parquet_path: str | None = None,
+                   autosave: ParquetAutoSaveObserver | None = None) -> tuple[str, int]:
+    """
+    Exports the autosaved history to a single Parquet file: the CSV history is
+    converted, or the Parquet autosave parts are compacted. Pass the running
+    Parquet `autosave` observer to include the rows it has not flushed yet.
+
+    Returns:
+        The destination path and the number of rows written.
+    """
+    parquet_path = parquet_path or parquet_export_path()
+    if CalculatorConfig.AUTO_SAVE_FORMAT == 'parquet':
+        rows = autosave.read_history() if autosave is not None else read_history(parquet_parts_dir())
+        if not rows:
+            raise PersistenceError("No calculations to export.")
+        count = write_history(rows, parquet_path)
+        app_logger.info(f"Compacted {count} autosaved calculations into {parquet_path}")
+        return parquet_path, count
+    csv_path = os.path.join(CalculatorConfig.HISTORY_DIR, 'calculations.csv')
+    return parquet_path, export_csv(csv_path, parquet_path)
@@ -0,0 +1,140 @@
+# app/profiler.py
+
+import cProfile
+import io
+import os
+import pstats
+import tracemalloc
+from datetime import datetime
+from app.calculator_config import CalculatorConfig
+from app.exceptions import CalculatorError
+from app.logger import app_logger
+
+
+def _timestamped_path(prefix: str, extension: str) -> str:
+    """Builds a unique output path in the log directory."""
+    os.makedirs(CalculatorConfig.LOG_DIR, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    return os.path.join(CalculatorConfig.LOG_DIR, f"{prefix}-{stamp}.{extension}")
+
+
+class CommandProfiler:
+    """
+    Wraps REPL command dispatch with cProfile so a live session can be
+    profiled without restarting it under an external profiler.
+    Only the time spent inside command handlers is collected.
+    """
+    def __init__(self):
+        self._profile: cProfile.Profile | None = None
+
+    @property
+    def active(self) -> bool:
+        return self._profile is not None
+
+    def start(self) -> None:
+        """Starts collecting a new profile."""
+        if self.active:
+            raise CalculatorError("Profiler is already running.")
+        self._profile = cProfile.Profile()
+        app_logger.info("Command profiler started.")
+
+    def run(self, func, *args):
+        """Calls func(*args), recording it in the profile when active."""
+        profile = self._profile
+        if profile is None:
+            return func(*args)
+        # Keep a local reference: the handler itself may stop the profiler.
+        profile.enable()
+        try:
+            return func(*args)
+        finally:
+            profile.disable()
+
+    def _report(self, top_n: int) -> str:
+        stream = io.StringIO()
+        pstats.Stats(self._profile, stream=stream).sort_stats('cumulative').print_stats(top_n)
+        return stream.getvalue()
+
+    def dump(self, top_n: int = 20) -> tuple[str, str]:
+        """
+        Writes the collected profile to a .prof file in the log directory.
+
+        Returns:
+            The file path and a report of the top_n functions by cumulative time.
+        """
+        if self._profile is None:
+            raise CalculatorError("Profiler is not running. Use 'profile start' first.")
+        path = _timestamped_path('profile', 'prof')
+        self._profile.dump_stats(path)
+        app_logger.info(f"Profile written to {path}")
+        return path, self._report(top_n)
+
+    def stop(self, top_n: int = 20) -> tuple[str, str]:
+        """Dumps the profile and stops collecting."""
+        result = self.dump(top_n)
+        self._profile = None
+        app_logger.info("Command profiler stopped.")
+        return result
+
+
+class MemoryTracer:
+    """
+    Controls tracemalloc from the REPL. Snapshots are written to the log
+    directory and can be diffed to find the sites that allocate the most.
+    Only the latest snapshot is kept in memory, as the base of the next diff.
+    """
+    def __init__(self, frames: int = 10):
+        self.frames = frames
+        self._previous: tracemalloc.Snapshot | None = None
+
+    @property
+    def active(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        """Starts tracing allocations."""
+        if self.active:
+            raise CalculatorError("Memory tracing is already running.")
+        self._previous = None
+        tracemalloc.start(self.frames)
+        app_logger.info("Memory tracing started.")
+
+    def stop(self) -> None:
+        """Stops tracing and forgets collected snapshots."""
+        tracemalloc.stop()
+        self._previous = None
+        app_logger.info("Memory tracing stopped.")
+
+    def _take_snapshot(self) -> tuple[tracemalloc.Snapshot, str]:
+        """Takes a snapshot, writes it to the log directory and makes it the diff base."""
+        if not self.active:
+            raise CalculatorError("Memory tracing is not running. Use 'memtrace start' first.")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        path = _timestamped_path('memtrace', 'snapshot')
+        snapshot.dump(path)
+        app_logger.info(f"Memory snapshot written to {path}")
+        self._previous = snapshot
+        return snapshot, path
+
+    def snapshot(self, top_n: int = 10) -> tuple[str, list[str]]:
+        """
+        Takes a snapshot, writes it to the log directory and returns the
+        file path with the top_n allocation sites.
+        """
+        snapshot, path = self._take_snapshot()
+        return path, [str(stat) for stat in snapshot.statistics('lineno')[:top_n]]
+
+    def diff(self, top_n: int = 10) -> tuple[str, list[str]]:
+        """
+        Compares a fresh snapshot with the previous one, writes the fresh one
+        to the log directory and returns its path with the top_n allocation
+        sites by size growth.
+        """
+        previous = self._previous
+        if previous is None:
+            raise CalculatorError("No previous snapshot. Use 'memtrace snapshot' first.")
+        current, path = self._take_snapshot()
+        return path, [str(stat) for stat in current.compare_to(previous, 'lineno')[:top_n]]
@@ -0,0 +1,99 @@
+# app/reductions.py
+
+import os
+from decimal import Decimal
+from typing import Callable, Sequence
+from app.calculator_config import CalculatorConfig
+from app.exceptions import ValidationError
+
+
+def _tree_reduce(func: Callable[[Decimal, Decimal], Decimal], values: Sequence[Decimal]) -> Decimal:
+    """
+    Pairwise (tree) reduction: combines neighbours level by level, so rounding
+    error grows with log(n) instead of n and operand sizes stay balanced.
+    """
+    items = list(values)
+    while len(items) > 1:
+        paired = [func(items[i], items[i + 1]) for i in range(0, len(items) - 1, 2)]
+        if len(items) % 2:
+            paired.append(items[-1])
+        items = paired
+    return items[0]
+
+
+def _add(a: Decimal, b: Decimal) -> Decimal:
+    return a + b
+
+
+def _multiply(a: Decimal, b: Decimal) -> Decimal:
+    return a * b
+
+
+# How each reduction folds its operands.
+_REDUCERS = {
+    'sum': lambda values: _tree_reduce(_add, values),
+    'product': lambda values: _tree_reduce(_multiply, values),
+    'min': min,
+    'max': max,
+}
+
+
+class Reductions:
+    """
+    A static class of n-ary reductions over a sequence of operands.
+    Arithmetic runs in the current decimal context, like the binary Operations.
+    """
+
+    @staticmethod
+    def _reduce(kind: str, values: Sequence[Decimal]) -> Decimal:
+        if not values:
+            raise ValidationError(f"'{kind}' requires at least one operand.")
+        return _REDUCERS[kind](values)
+
+    @staticmethod
+    def sum(values: Sequence[Decimal]) -> Decimal:
+        return Reductions._reduce('sum', values)
+
+    @staticmethod
+    def product(values: Sequence[Decimal]) -> Decimal:
+        return Reductions._reduce('product', values)
+
+    @staticmethod
+    def min(values: Sequence[Decimal]) -> Decimal:
+        return Reductions._reduce('min', values)
+
+    @staticmethod
+    def max(values: Sequence[Decimal]) -> Decimal:
+        return Reductions._reduce('max', values)
+
+    @staticmethod
+    def mean(values: Sequence[Decimal]) -> Decimal:
+        return Reductions._reduce('sum', values) / len(values)
+
+
+class ReductionFactory:
+    """The Factory class for n-ary reductions, mirroring OperationFactory."""
+
+    REDUCTION_MAP = {
+        'sum': Reductions.sum,
+        'product': Reductions.product,
+        'min': Reductions.min,
+        'max': Reductions.max,
+        'mean': Reductions.mean
+    }
+
+    @staticmethod
+    def get_reduction(reduction_name: str):
+        reduction_name = reduction_name.lower()
+        reduction = ReductionFactory.REDUCTION_MAP.get(reduction_name)
+        if not reduction:
+            raise ValidationError(f"Error: Invalid reduction '{reduction_name}'.")
+        return reduction
+
+
+def read_operands_file(file_path: str) -> list[str]:
+    """Reads whitespace- or comma-separated numbers from a text file."""
+    if not os.path.exists(file_path):
+        raise ValidationError(f"Operand file not found: {file_path}")
+    with open(file_path, encoding=CalculatorConfig.DEFAULT_ENCODING) as f:
+        return f.read().replace(',', ' ').split()
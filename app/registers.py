@@ -0,0 +1,167 @@
+# app/registers.py
+
+import re
+from decimal import Decimal
+from app.exceptions import CalculatorError, ValidationError, CircularReferenceError
+from app.input_validators import InputValidator
+from app.logger import app_logger
+from app.operations import OperationFactory
+
+NAME_PATTERN = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+
+class Register:
+    """
+    A named cell. It is either a constant or a formula `<operation> <arg> <arg>`,
+    where each argument is a literal Decimal or the name of another register.
+    """
+    __slots__ = ('name', 'operation_name', 'operation', 'args', 'value', 'error')
+
+    def __init__(self, name: str, operation_name: str | None, args: tuple):
+        self.name = name
+        self.operation_name = operation_name
+        self.operation = OperationFactory.get_operation(operation_name) if operation_name else None
+        self.args = args
+        self.value: Decimal | None = None
+        self.error: str | None = None
+
+    @property
+    def references(self) -> set[str]:
+        """Names of the registers this one reads."""
+        return {arg for arg in self.args if isinstance(arg, str)}
+
+    def formula(self) -> str:
+        """Returns the definition as the user would type it."""
+        parts = ([self.operation_name] if self.operation_name else []) + [str(arg) for arg in self.args]
+        return ' '.join(parts)
+
+    def __repr__(self):
+        return f"Register({self.name} = {self.formula()} -> {self.error or self.value})"
+
+
+class RegisterSheet:
+    """
+    Spreadsheet-style named registers built on OperationFactory.
+
+    Dependencies form a DAG. Redefining a register marks it and everything
+    downstream of it dirty, and only that dirty subgraph is re-evaluated, in
+    topological order. Registers that do not depend on the change are not touched.
+    """
+    def __init__(self):
+        self._registers: dict[str, Register] = {}
+        self._dependents: dict[str, set[str]] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._registers
+
+    def __len__(self) -> int:
+        return len(self._registers)
+
+    def get(self, name: str) -> Register:
+        """Returns a register by name."""
+        try:
+            return self._registers[name]
+        except KeyError:
+            raise ValidationError(f"Unknown register '{name}'.")
+
+    def registers(self) -> list[Register]:
+        """Returns all registers sorted by name."""
+        return [self._registers[name] for name in sorted(self._registers)]
+
+    def _parse_argument(self, token: str):
+        """A token is a register reference if it looks like a name, otherwise a number."""
+        if NAME_PATTERN.match(token) and token not in ('nan', 'inf', 'infinity'):
+            if token not in self._registers:
+                raise ValidationError(f"Unknown register '{token}'.")
+            return token
+        return InputValidator.validate_operand(token)
+
+    def _parse(self, name: str, tokens: list[str]) -> Register:
+        if not NAME_PATTERN.match(name) or name in OperationFactory.OPERATION_MAP:
+            raise ValidationError(f"Invalid register name '{name}'.")
+        if len(tokens) == 1:
+            return Register(name, None, (self._parse_argument(tokens[0]),))
+        if len(tokens) == 3:
+            operation_name = tokens[0].lower()
+            args = (self._parse_argument(tokens[1]), self._parse_argument(tokens[2]))
+            return Register(name, operation_name, args)
+        raise ValidationError("A register is defined as '<value>' or '<operation> <a> <b>'.")
+
+    def _downstream(self, name: str) -> set[str]:
+        """Returns every register that (transitively) depends on `name`."""
+        seen: set[str] = set()
+        stack = list(self._dependents.get(name, ()))
+        while stack:
+            current = stack.pop()
+            if current not in seen:
+                seen.add(current)
+                stack.extend(self._dependents.get(current, ()))
+        return seen
+
+    def define(self, name: str, tokens: list[str]) -> list[Register]:
+        """
+        Defines or redefines a register and incrementally recomputes its dependents.
+
+        Returns:
+            The registers that were re-evaluated, in evaluation order.
+
+        Raises:
+            ValidationError: If the definition is malformed or references unknown registers.
+            CircularReferenceError: If the definition would create a dependency cycle.
+        """
+        register = self._parse(name, tokens)
+        references = register.references
+        downstream = self._downstream(name)
+        if name in references or references & downstream:
+            raise CircularReferenceError(f"Defining '{name}' would create a circular reference.")
+
+        previous = self._registers.get(name)
+        if previous is not None:
+            for ref in previous.references:
+                self._dependents[ref].discard(name)
+        for ref in references:
+            self._dependents.setdefault(ref, set()).add(name)
+        self._registers[name] = register
+
+        dirty = downstream | {name}
+        recomputed = [self._evaluate(self._registers[n]) for n in self._topological_order(dirty)]
+        app_logger.info(f"Register '{name}' defined; recomputed {len(recomputed)} register(s).")
+        return recomputed
+
+    def _topological_order(self, dirty: set[str]) -> list[str]:
+        """Kahn's algorithm restricted to the dirty subgraph."""
+        pending = {n: len(self._registers[n].references & dirty) for n in dirty}
+        ready = sorted(n for n, count in pending.items() if count == 0)
+        order = []
+        while ready:
+            current = ready.pop()
+            order.append(current)
+            for dependent in self._dependents.get(current, ()):
+                if dependent in pending:
+                    pending[dependent] -= 1
+                    if pending[dependent] == 0:
+                        ready.append(dependent)
+        return order
+
+    def _evaluate(self, register: Register) -> Register:
+        """Recomputes one register from its (already up-to-date) inputs."""
+        register.value, register.error = None, None
+        values = []
+        for arg in register.args:
+            if isinstance(arg, str):
+                source = self._registers[arg]
+                if source.error:
+                    register.error = f"depends on failed register '{arg}'"
+                    return register
+                values.append(source.value)
+            else:
+                values.append(arg)
+        if register.operation is None:
+            register.value = values[0]
+            return register
+        try:
+            register.value = register.operation(*values)
+        except (CalculatorError, ArithmeticError, ValueError) as e:
+            register.error = str(e) or e.__class__.__name__
+            app_logger.warning(f"Register '{register.name}' failed to evaluate: {register.error}")
+        return register
@@ -0,0 +1,106 @@
+# benchmarks/bench_cli.py
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks.harness import PROJECT_ROOT, result, time_once
+
+BATCH = ('add 1 2', 'subtract 10 4', 'multiply 3.5 2', 'divide 22 7', 'power 2 10', 'percent 25 200')
+
+
+def bench_batch(commands: int) -> dict:
+    """
+    Measures end-to-end throughput of Cli.dispatch for a batch of commands.
+    When autosave is configured it stays enabled, but writes to a scratch file.
+    'power 2 10' runs inline, as in the REPL: an integer power is never worth a
+    worker process (bench_job_round_trip measures that path).
+    """
+    import main
+    from app.history import AutoSaveObserver
+    calculator = main.Calculator()
+    calculator.register_observer(main.LOGGING_OBSERVER)
+    lines = [BATCH[i % len(BATCH)] for i in range(commands)]
+    with tempfile.TemporaryDirectory() as tmp:
+        if main.AUTOSAVE_OBSERVER:
+            calculator.register_observer(AutoSaveObserver(os.path.join(tmp, 'calculations.csv')))
+        cli = main.Cli(calculator)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            for line in lines:
+                cli.dispatch(line)
+            seconds = time.perf_counter() - start
+    return result(f"cli.batch[commands={commands}]", commands / seconds, 'cmds/s', 'higher', commands=commands)
+
+
+def bench_job_round_trip(repeat: int) -> dict:
+    """Measures submit-to-commit latency of a background job (worker start-up included)."""
+    import main
+    from app.calculation import ArithmeticCalculation
+    from app.jobs import JobManager
+    from app.operations import Operations
+    manager = JobManager(main.Calculator())
+
+    def round_trip():
+        job = manager.submit('power', ArithmeticCalculation(main.Decimal(2), main.Decimal(10), Operations.power))
+        manager.wait(job.id)
+        manager.commit_ready()
+    return result("cli.job_round_trip", time_once(round_trip, repeat=repeat) * 1e3, 'ms')
+
+
+def bench_retained_memory(commands: int) -> dict:
+    """Measures the bytes retained (history, records) per executed command."""
+    import main
+    from app.calculation import ArithmeticCalculation
+    from app.operations import OperationFactory
+    calculator = main.Calculator()
+    add = OperationFactory.get_operation('add')
+    operands = [(main.Decimal(i), main.Decimal(1)) for i in range(commands)]
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for a, b in operands:
+            calculator.execute_command(ArithmeticCalculation(a, b, add))
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return result(f"cli.retained_bytes[commands={commands}]", retained / commands, 'B/cmd', commands=commands)
+
+
+def bench_history_page(depth: int) -> dict:
+    """Measures 'history --last 50' against a history of `depth` entries."""
+    import main
+    from app.calculation import ArithmeticCalculation
+    from app.operations import OperationFactory
+    calculator = main.Calculator()
+    add = OperationFactory.get_operation('add')
+    for i in range(depth):
+        calculator.execute_command(ArithmeticCalculation(main.Decimal(i), main.Decimal(1), add))
+    cli = main.Cli(calculator)
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds = time_once(lambda: cli.dispatch('history --last 50'), repeat=5)
+    return result(f"cli.history_page[depth={depth}]", seconds * 1e3, 'ms', depth=depth)
+
+
+def bench_cold_start(repeat: int) -> dict:
+    """Measures the wall time to start the REPL in a fresh interpreter and exit."""
+    def start_and_exit():
+        subprocess.run(
+            [sys.executable, 'main.py'], input='exit\n', cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=False
+        )
+    return result("cli.cold_start", time_once(start_and_exit, repeat=repeat), 's')
+
+
+def run(quick: bool) -> list[dict]:
+    return [
+        bench_batch(1_000 if quick else 20_000),
+        bench_job_round_trip(5 if quick else 20),
+        bench_retained_memory(10_000 if quick else 100_000),
+        bench_history_page(10_000 if quick else 1_000_000),
+        bench_cold_start(3 if quick else 7),
+    ]
@@ -0,0 +1,105 @@
+# benchmarks/bench_history.py
+
+import os
+import tempfile
+import time
+import tracemalloc
+from decimal import Decimal, localcontext
+from benchmarks.harness import result
+from app.calculation import ArithmeticCalculation
+from app.calculator_memento import CalculatorMemento
+from app.history import HistoryManager, DeltaHistoryManager, AutoSaveObserver
+from app.operations import Operations
+
+
+def _mementos(count: int) -> list[CalculatorMemento]:
+    records = []
+    for i in range(count):
+        calc = ArithmeticCalculation(Decimal(i), Decimal(1), Operations.add)
+        calc.result = Decimal(i + 1)
+        records.append(CalculatorMemento(calc.result, calc))
+    return records
+
+
+def bench_history_manager(depth: int) -> list[dict]:
+    """Measures save, undo and redo throughput at a given history depth."""
+    mementos = _mementos(depth)
+    manager = HistoryManager()
+
+    start = time.perf_counter()
+    for memento in mementos:
+        manager.save_state(memento)
+    save_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    while manager.undo() is not None:
+        pass
+    undo_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    while manager.redo() is not None:
+        pass
+    redo_seconds = time.perf_counter() - start
+
+    return [
+        result(f"history.save[depth={depth}]", depth / save_seconds, 'ops/s', 'higher', depth=depth),
+        result(f"history.undo[depth={depth}]", (depth - 1) / undo_seconds, 'ops/s', 'higher', depth=depth),
+        result(f"history.redo[depth={depth}]", (depth - 1) / redo_seconds, 'ops/s', 'higher', depth=depth),
+    ]
+
+
+def bench_history_encoding(depth: int, precision: int = 100) -> list[dict]:
+    """
+    Measures the bytes retained per state, and the undo rate, of a chained
+    session ('multiply <previous> 1.0001') with full and with delta encoding.
+    """
+    records = []
+    for encoding, manager in (('full', HistoryManager()), ('delta', DeltaHistoryManager())):
+        factor = Decimal('1.0001')
+        with localcontext() as ctx:
+            ctx.prec = precision
+            tracemalloc.start()
+            try:
+                before = tracemalloc.get_traced_memory()[0]
+                value = Decimal(1)
+                manager.save_state(CalculatorMemento(value, ArithmeticCalculation(value, value, Operations.multiply)))
+                for _ in range(depth):
+                    calc = ArithmeticCalculation(value, factor, Operations.multiply)
+                    calc.perform()
+                    value = calc.result
+                    manager.save_state(CalculatorMemento(value, calc), replayable=True)
+                retained = tracemalloc.get_traced_memory()[0] - before
+            finally:
+                tracemalloc.stop()
+            start = time.perf_counter()
+            while manager.undo() is not None:
+                pass
+            undo_seconds = time.perf_counter() - start
+        records.append(result(f"history.retained_bytes[encoding={encoding},depth={depth}]",
+                              retained / depth, 'B/state', encoding=encoding, depth=depth, precision=precision))
+        records.append(result(f"history.undo[encoding={encoding},depth={depth}]",
+                              depth / undo_seconds, 'ops/s', 'higher', encoding=encoding, depth=depth))
+    return records
+
+
+def bench_autosave(rows: int) -> dict:
+    """Measures AutoSaveObserver rows per second into a fresh file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        observer = AutoSaveObserver(os.path.join(tmp, 'calculations.csv'))
+        calc = ArithmeticCalculation(Decimal('12.5'), Decimal('3'), Operations.multiply)
+        calc.result = Decimal('37.5')
+        start = time.perf_counter()
+        for _ in range(rows):
+            observer.update(calc)
+        seconds = time.perf_counter() - start
+    return result(f"autosave.rows[rows={rows}]", rows / seconds, 'rows/s', 'higher', rows=rows)
+
+
+def run(quick: bool) -> list[dict]:
+    depths = (1_000, 10_000) if quick else (1_000, 10_000, 100_000, 1_000_000)
+    records = []
+    for depth in depths:
+        records.extend(bench_history_manager(depth))
+    records.extend(bench_history_encoding(2_000 if quick else 50_000))
+    records.append(bench_autosave(1_000 if quick else 20_000))
+    return records
@@ -0,0 +1,37 @@
+# benchmarks/bench_operations.py
+
+from decimal import Decimal, localcontext
+from benchmarks.harness import result, time_per_call
+from app.operations import Operations
+
+# power and root get a small second operand; large exponents would measure
+# Decimal overflow handling rather than the operation itself.
+SMALL_B_OPERATIONS = {'power': Decimal('3'), 'root': Decimal('3')}
+
+
+def _operand(digits: int, seed: int) -> Decimal:
+    """Builds a deterministic operand with the given number of significant digits."""
+    text = ''.join(str((seed + i * 7) % 9 + 1) for i in range(digits))
+    return Decimal(text) / Decimal(10) ** (digits // 2)
+
+
+def run(quick: bool) -> list[dict]:
+    """Micro-benchmarks every Operations function across operand sizes and precisions."""
+    digit_sizes = (1, 10) if quick else (1, 10, 50, 200)
+    precisions = (10, 28) if quick else (10, 28, 100)
+    functions = [name for name, value in vars(Operations).items() if isinstance(value, staticmethod)]
+    records = []
+    for op_name in functions:
+        op_func = getattr(Operations, op_name)
+        for digits in digit_sizes:
+            a = _operand(digits, 3)
+            b = SMALL_B_OPERATIONS.get(op_name, _operand(digits, 5))
+            for prec in precisions:
+                with localcontext() as ctx:
+                    ctx.prec = prec
+                    seconds = time_per_call(lambda: op_func(a, b), repeat=3 if quick else 5)
+                records.append(result(
+                    f"operations.{op_name}[digits={digits},prec={prec}]", seconds, 's/op',
+                    operation=op_name, digits=digits, precision=prec
+                ))
+    return records
@@ -0,0 +1,93 @@
+# benchmarks/bench_persistence.py
+
+import contextlib
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime
+from benchmarks.harness import result, time_once
+from app.calculator_config import CalculatorConfig
+from app.history import HISTORY_COLUMNS
+
+OPERATIONS = ('add', 'subtract', 'multiply', 'divide', 'power', 'modulus')
+
+
+def write_history_csv(path: str, rows: int) -> None:
+    """Writes a synthetic autosave file with the given number of rows."""
+    timestamp = datetime.now().isoformat()
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(HISTORY_COLUMNS)
+        for i in range(rows):
+            op = OPERATIONS[i % len(OPERATIONS)]
+            writer.writerow([timestamp, op, i % 1000 + 1, i % 7 + 1, i % 997])
+
+
+def bench_load(rows: int) -> dict:
+    """Measures Cli._handle_load against an autosave file of `rows` rows."""
+    import main
+    cli = main.Cli(main.Calculator())
+    original_dir = CalculatorConfig.HISTORY_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        write_history_csv(os.path.join(tmp, 'calculations.csv'), rows)
+        CalculatorConfig.HISTORY_DIR = tmp
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                seconds = time_once(cli._handle_load, repeat=1 if rows >= 100_000 else 3)
+        finally:
+            CalculatorConfig.HISTORY_DIR = original_dir
+    return result(f"load.csv[rows={rows}]", seconds, 's', rows=rows)
+
+
+def bench_checkpoint(depth: int) -> list[dict]:
+    """Measures 'save' and 'restore' of a checkpoint with `depth` history entries."""
+    from decimal import Decimal
+    from app.calculation import ArithmeticCalculation
+    from app.calculator import Calculator
+    from app.checkpoint import save_checkpoint, restore_checkpoint
+    from app.operations import Operations
+    calculator = Calculator()
+    for i in range(depth):
+        calculator.execute_command(ArithmeticCalculation(Decimal(i), Decimal('1.5'), Operations.multiply))
+    original_dir = CalculatorConfig.HISTORY_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        CalculatorConfig.HISTORY_DIR = tmp
+        try:
+            repeat = 1 if depth >= 100_000 else 3
+            save_seconds = time_once(lambda: save_checkpoint(calculator, 'bench'), repeat=repeat)
+            restore_seconds = time_once(lambda: restore_checkpoint(Calculator(), 'bench'), repeat=repeat)
+        finally:
+            CalculatorConfig.HISTORY_DIR = original_dir
+    return [
+        result(f"checkpoint.save[depth={depth}]", save_seconds, 's', depth=depth),
+        result(f"checkpoint.restore[depth={depth}]", restore_seconds, 's', depth=depth),
+    ]
+
+
+def bench_parquet(rows: int) -> list[dict]:
+    """Measures Parquet export of an autosave file and full vs. filtered reads of the result."""
+    from app.parquet_history import export_csv, read_history
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'calculations.csv')
+        parquet_path = os.path.join(tmp, 'calculations.parquet')
+        write_history_csv(csv_path, rows)
+        repeat = 1 if rows >= 100_000 else 3
+        export_seconds = time_once(lambda: export_csv(csv_path, parquet_path), repeat=repeat)
+        read_seconds = time_once(lambda: read_history(parquet_path), repeat=repeat)
+        filtered_seconds = time_once(lambda: read_history(parquet_path, operations=['divide']), repeat=repeat)
+    return [
+        result(f"parquet.export[rows={rows}]", export_seconds, 's', rows=rows),
+        result(f"parquet.read[rows={rows}]", read_seconds, 's', rows=rows),
+        result(f"parquet.read_filtered[rows={rows}]", filtered_seconds, 's', rows=rows),
+    ]
+
+
+def run(quick: bool) -> list[dict]:
+    sizes = (1_000, 10_000) if quick else (10_000, 100_000, 1_000_000)
+    records = [bench_load(rows) for rows in sizes]
+    for rows in sizes:
+        records.extend(bench_parquet(rows))
+    for depth in sizes:
+        records.extend(bench_checkpoint(depth))
+    return records
@@ -0,0 +1,57 @@
+# benchmarks/compare.py
+"""
+Compares a results file against a saved baseline and flags regressions.
+
+Usage:
+    python -m benchmarks.compare BASELINE CURRENT [--threshold 0.10]
+
+Exits with status 1 when any benchmark regressed by more than the threshold.
+"""
+
+import argparse
+from benchmarks.harness import load_results
+
+
+def compare(baseline: dict[str, dict], current: dict[str, dict], threshold: float) -> list[dict]:
+    """
+    Returns one row per benchmark present in both files. `change` is the relative
+    change in the "worse" direction, so a positive value is always a slowdown.
+    """
+    rows = []
+    for name in sorted(baseline.keys() & current.keys()):
+        old, new = baseline[name]['value'], current[name]['value']
+        if old == 0:
+            continue
+        change = (new - old) / old
+        if current[name].get('better', 'lower') == 'higher':
+            change = -change
+        rows.append({'name': name, 'baseline': old, 'current': new, 'change': change,
+                     'regressed': change > threshold})
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Flag benchmark regressions against a baseline.")
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Allowed relative slowdown before flagging (default: 0.10).")
+    args = parser.parse_args(argv)
+
+    baseline, current = load_results(args.baseline), load_results(args.current)
+    rows = compare(baseline, current, args.threshold)
+    for row in rows:
+        flag = 'REGRESSION' if row['regressed'] else ''
+        print(f"{row['name']:<55} {row['baseline']:>12.6g} -> {row['current']:>12.6g} {row['change']:>+8.1%} {flag}")
+
+    missing = sorted(baseline.keys() - current.keys())
+    if missing:
+        print(f"Missing from current run: {', '.join(missing)}")
+
+    regressions = [row for row in rows if row['regressed']]
+    print(f"\n{len(regressions)} regression(s) out of {len(rows)} compared benchmark(s).")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,81 @@
+# benchmarks/harness.py
+
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+# Benchmarks must not pay for (or drown in) the application's INFO logging.
+logging.disable(logging.CRITICAL)
+
+# Make `app` and `main` importable when run as `python -m benchmarks.run`.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def result(name: str, value: float, unit: str, better: str = 'lower', **params) -> dict:
+    """Builds one benchmark record. `better` is 'lower' or 'higher'."""
+    return {'name': name, 'value': value, 'unit': unit, 'better': better, 'params': params}
+
+
+def time_per_call(func, repeat: int = 5, min_time: float = 0.05) -> float:
+    """
+    Returns the median seconds per call of func().
+    The number of calls per repetition is calibrated so each one lasts at least min_time.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return statistics.median(samples)
+
+
+def time_once(func, repeat: int = 3) -> float:
+    """Returns the median wall time in seconds of a single (expensive) call of func()."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def write_results(results: list[dict], path: str, quick: bool) -> None:
+    """Writes benchmark records and environment metadata as JSON."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    payload = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'quick': quick,
+        },
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2)
+
+
+def load_results(path: str) -> dict[str, dict]:
+    """Loads a results file and indexes the records by name."""
+    with open(path, encoding='utf-8') as f:
+        payload = json.load(f)
+    return {record['name']: record for record in payload['results']}
@@ -0,0 +1,210 @@
+# benchmarks/replay.py
+"""
+Replays a synthetic workload through the REPL dispatcher and reports
+throughput, latency percentiles, RSS growth and autosave file growth.
+
+Usage:
+    python -m benchmarks.replay [--commands N] [--seed S] [--rate CMDS_PER_SEC]
+        [--mix add=3,divide=1] [--distribution loguniform|uniform] [--low X] [--high Y]
+        [--decimals D] [--negative F] [--undo R] [--redo R] [--history R] [--load R] [--errors R]
+        [--script FILE] [--save-script FILE] [--no-autosave] [--output PATH]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Iterable
+from benchmarks.harness import result, write_results
+from benchmarks.workload import WorkloadGenerator, WorkloadProfile, parse_mix
+from app.calculator_config import CalculatorConfig
+from app.metrics import LatencyHistogram
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+SPIN_NS = 200_000
+
+
+def rss_bytes() -> int:
+    """Current resident set size from /proc/self/statm (0 where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm', encoding='ascii') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _file_size(path: str | None) -> int:
+    return os.path.getsize(path) if path and os.path.exists(path) else 0
+
+
+def replay(lines: Iterable[str], dispatch: Callable[[str], None], rate: float = 0.0,
+           history_file: str | None = None, rss_every: int = 1000) -> dict:
+    """
+    Sends each line to dispatch(), optionally paced at `rate` commands per second.
+
+    Latency is reported two ways. Service time covers the command alone.
+    Response time is measured from the command's scheduled start. A slow
+    command therefore also counts against the commands queued behind it,
+    so paced runs do not hide stalls (coordinated omission).
+    """
+    service, response = LatencyHistogram(), LatencyHistogram()
+    interval_ns = int(1e9 / rate) if rate > 0 else 0
+    rss_start = rss_peak = rss_bytes()
+    file_start = _file_size(history_file)
+    count = 0
+    start = time.perf_counter_ns()
+    for count, line in enumerate(lines, 1):
+        scheduled = start + (count - 1) * interval_ns
+        if interval_ns:
+            # Sleep most of the gap, then spin: time.sleep() overshoots by tens of microseconds.
+            delay = scheduled - time.perf_counter_ns()
+            if delay > SPIN_NS:
+                time.sleep((delay - SPIN_NS) / 1e9)
+            while time.perf_counter_ns() < scheduled:
+                pass
+        begin = time.perf_counter_ns()
+        dispatch(line)
+        end = time.perf_counter_ns()
+        service.record(end - begin)
+        response.record(end - (scheduled if interval_ns else begin))
+        if count % rss_every == 0:
+            rss_peak = max(rss_peak, rss_bytes())
+    elapsed = (time.perf_counter_ns() - start) / 1e9
+    rss_end = rss_bytes()
+    return {
+        'commands': count,
+        'seconds': elapsed,
+        'throughput': count / elapsed if elapsed else 0.0,
+        'target_rate': rate,
+        'service_us': _percentiles(service),
+        'response_us': _percentiles(response),
+        'rss_start': rss_start,
+        'rss_end': rss_end,
+        'rss_peak': max(rss_peak, rss_end),
+        'history_file_bytes': _file_size(history_file) - file_start,
+    }
+
+
+def _percentiles(histogram: LatencyHistogram) -> dict:
+    values = {f"p{p}": histogram.percentile(p) / 1000 for p in (50, 90, 99, 99.9)}
+    values.update(mean=histogram.mean() / 1000, max=histogram.max / 1000)
+    return values
+
+
+def replay_through_cli(lines: Iterable[str], rate: float = 0.0, autosave: bool = True) -> dict:
+    """Replays lines through a fresh Cli whose history lives in a scratch directory."""
+    import main
+    from app.history import AutoSaveObserver
+    saved = CalculatorConfig.HISTORY_DIR
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, 'w') as devnull:
+        CalculatorConfig.HISTORY_DIR = tmp
+        try:
+            calculator = main.Calculator()
+            calculator.register_observer(main.LOGGING_OBSERVER)
+            history_file = None
+            if autosave:
+                observer = AutoSaveObserver(os.path.join(tmp, 'calculations.csv'))
+                calculator.register_observer(observer)
+                history_file = observer.history_file_path
+            cli = main.Cli(calculator)
+            with contextlib.redirect_stdout(devnull):
+                report = replay(lines, cli.dispatch, rate, history_file)
+                cli.jobs.cancel_all()
+            report['history_depth'] = calculator.history_size()
+        finally:
+            CalculatorConfig.HISTORY_DIR = saved
+    return report
+
+
+def render(report: dict) -> str:
+    """Formats a replay report for the terminal."""
+    mb = 1024 * 1024
+    commands = report['commands'] or 1
+    lines = [
+        f"Commands:            {report['commands']} in {report['seconds']:.2f}s",
+        f"Throughput:          {report['throughput']:.0f} cmds/s"
+        + (f" (target {report['target_rate']:.0f})" if report['target_rate'] else ''),
+    ]
+    for label, key in (('Service time (us)', 'service_us'), ('Response time (us)', 'response_us')):
+        p = report[key]
+        lines.append(f"{label + ':':<21}p50 {p['p50']:.1f}  p90 {p['p90']:.1f}  p99 {p['p99']:.1f}  "
+                     f"p99.9 {p['p99.9']:.1f}  max {p['max']:.1f}")
+    growth = report['rss_end'] - report['rss_start']
+    lines.append(f"RSS:                 {report['rss_start'] / mb:.1f} -> {report['rss_end'] / mb:.1f} MiB "
+                 f"(peak {report['rss_peak'] / mb:.1f}, {growth / commands:.0f} B/cmd)")
+    lines.append(f"History file:        +{report['history_file_bytes'] / mb:.2f} MiB "
+                 f"({report['history_file_bytes'] / commands:.0f} B/cmd), history depth {report.get('history_depth', '-')}")
+    return "\n".join(lines)
+
+
+def to_results(report: dict, label: str) -> list[dict]:
+    """Converts a report into benchmark records that benchmarks.compare understands."""
+    commands = report['commands'] or 1
+    records = [result(f"{label}.throughput", report['throughput'], 'cmds/s', 'higher', commands=report['commands'])]
+    for p in ('p50', 'p99', 'max'):
+        records.append(result(f"{label}.response_{p}", report['response_us'][p], 'us'))
+    records.append(result(f"{label}.rss_growth", (report['rss_end'] - report['rss_start']) / commands, 'B/cmd'))
+    records.append(result(f"{label}.history_file_growth", report['history_file_bytes'] / commands, 'B/cmd'))
+    return records
+
+
+def run(quick: bool) -> list[dict]:
+    """Benchmark suite entry point: the default profile, unpaced, with a fixed seed."""
+    generator = WorkloadGenerator(WorkloadProfile(), seed=1)
+    commands = 2_000 if quick else 50_000
+    report = replay_through_cli(list(generator.commands(commands)))
+    return to_results(report, f"replay[commands={commands}]")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a synthetic workload through the calculator REPL.")
+    parser.add_argument('--commands', type=int, default=10_000, help="Number of commands to generate.")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same stream.")
+    parser.add_argument('--rate', type=float, default=0.0, help="Target commands per second (0 = as fast as possible).")
+    parser.add_argument('--mix', default='', help="Operation weights, e.g. 'add=3,divide=1' (default: built-in mix).")
+    parser.add_argument('--distribution', default='loguniform', help="Operand distribution: loguniform or uniform.")
+    parser.add_argument('--low', type=float, default=0.01, help="Smallest operand magnitude.")
+    parser.add_argument('--high', type=float, default=1e6, help="Largest operand magnitude.")
+    parser.add_argument('--decimals', type=int, default=4, help="Maximum decimal places of an operand.")
+    parser.add_argument('--negative', type=float, default=0.1, help="Fraction of negative operands.")
+    parser.add_argument('--undo', type=float, default=0.05, help="Fraction of 'undo' commands.")
+    parser.add_argument('--redo', type=float, default=0.03, help="Fraction of 'redo' commands.")
+    parser.add_argument('--history', type=float, default=0.01, help="Fraction of 'history' commands.")
+    parser.add_argument('--load', type=float, default=0.0, help="Fraction of 'load' commands.")
+    parser.add_argument('--errors', type=float, default=0.02, help="Fraction of deliberately invalid commands.")
+    parser.add_argument('--script', help="Replay the command lines of this file instead of generating them.")
+    parser.add_argument('--save-script', help="Write the generated commands to this file.")
+    parser.add_argument('--no-autosave', action='store_true', help="Do not autosave (no history file growth).")
+    parser.add_argument('--output', help="Also write the results as JSON (benchmarks.compare format).")
+    args = parser.parse_args(argv)
+
+    if args.script:
+        with open(args.script, encoding='utf-8') as f:
+            lines = [line.strip() for line in f if line.strip()]
+        profile_info = {'script': args.script}
+    else:
+        try:
+            profile = WorkloadProfile(
+                parse_mix(args.mix) or None, args.distribution, args.low, args.high, args.decimals,
+                args.negative, args.undo, args.redo, args.history, args.load, args.errors)
+        except ValueError as e:
+            parser.error(str(e))
+        lines = list(WorkloadGenerator(profile, args.seed).commands(args.commands))
+        profile_info = dict(profile.describe(), seed=args.seed)
+        if args.save_script:
+            with open(args.save_script, 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+
+    print(f"Replaying {len(lines)} commands ({json.dumps(profile_info)})...")
+    report = replay_through_cli(lines, args.rate, autosave=not args.no_autosave)
+    print(render(report))
+    if args.output:
+        write_results(to_results(report, 'replay'), args.output, quick=False)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
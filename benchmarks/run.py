@@ -0,0 +1,50 @@
+# benchmarks/run.py
+"""
+Runs the benchmark suite and writes the results as JSON.
+
+Usage:
+    python -m benchmarks.run [--quick] [--only operations,history,...] [--output PATH]
+"""
+
+import argparse
+from benchmarks.harness import write_results
+from benchmarks import bench_operations, bench_history, bench_persistence, bench_cli, replay
+
+SUITES = {
+    'operations': bench_operations.run,
+    'history': bench_history.run,
+    'persistence': bench_persistence.run,
+    'cli': bench_cli.run,
+    'replay': replay.run,
+}
+
+DEFAULT_OUTPUT = 'benchmarks/results/latest.json'
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the calculator benchmark suite.")
+    parser.add_argument('--quick', action='store_true', help="Use small sizes for a fast smoke run.")
+    parser.add_argument('--only', default='', help="Comma-separated suites to run: " + ', '.join(SUITES))
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Where to write the JSON results.")
+    args = parser.parse_args(argv)
+
+    selected = [name.strip() for name in args.only.split(',') if name.strip()] or list(SUITES)
+    unknown = [name for name in selected if name not in SUITES]
+    if unknown:
+        parser.error(f"Unknown suite(s): {', '.join(unknown)}")
+
+    results = []
+    for name in selected:
+        print(f"Running {name} benchmarks...")
+        records = SUITES[name](args.quick)
+        for record in records:
+            print(f"  {record['name']:<55} {record['value']:>14.6g} {record['unit']}")
+        results.extend(records)
+
+    write_results(results, args.output, args.quick)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
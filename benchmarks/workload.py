@@ -0,0 +1,166 @@
+# benchmarks/workload.py
+"""
+Deterministic generator of synthetic REPL command streams.
+
+The same profile and seed always produce the same commands, so a stream can
+be replayed against two versions of the calculator and the results compared.
+"""
+
+import math
+import random
+from typing import Iterator
+from app.calculator_config import CalculatorConfig
+from app.operations import OperationFactory
+
+# Weights used when no operation mix is given: mostly the four basic operations.
+DEFAULT_OPERATION_WEIGHTS = {
+    'add': 4, 'subtract': 3, 'multiply': 3, 'divide': 2, 'power': 1,
+    'root': 1, 'modulus': 1, 'int_divide': 1, 'percent': 1, 'abs_diff': 1,
+}
+
+# Kinds of deliberately failing commands and what each one exercises.
+ERROR_KINDS = (
+    'bad_operand',      # InputValidator rejects a non-number
+    'out_of_range',     # InputValidator rejects a value above MAX_INPUT_VALUE
+    'divide_by_zero',   # the operation itself raises
+    'wrong_arity',      # the handler rejects the argument count
+    'unknown_command',  # dispatch finds no handler
+)
+
+DISTRIBUTIONS = ('uniform', 'loguniform')
+
+
+class WorkloadProfile:
+    """
+    Describes a synthetic session.
+
+    Attributes:
+        operation_weights: Relative frequency of each OPERATION_MAP command.
+        distribution: 'uniform' (values evenly spread over [low, high]) or
+            'loguniform' (magnitudes evenly spread over the decades of [low, high]).
+        low, high: Range of operand magnitudes. `low` must be > 0 for 'loguniform'.
+        decimal_places: Maximum digits after the decimal point; each operand picks 0..max.
+        negative_fraction: Fraction of operands that are negative.
+        undo_rate, redo_rate, history_rate, load_rate, error_rate: Fraction of
+            commands that are undo, redo, history, load or a deliberate error.
+    """
+    def __init__(self, operation_weights: dict[str, float] | None = None, distribution: str = 'loguniform',
+                 low: float = 0.01, high: float = 1e6, decimal_places: int = 4, negative_fraction: float = 0.1,
+                 undo_rate: float = 0.05, redo_rate: float = 0.03, history_rate: float = 0.01,
+                 load_rate: float = 0.0, error_rate: float = 0.02):
+        self.operation_weights = dict(operation_weights or DEFAULT_OPERATION_WEIGHTS)
+        self.distribution = distribution
+        self.low = low
+        self.high = high
+        self.decimal_places = decimal_places
+        self.negative_fraction = negative_fraction
+        self.undo_rate = undo_rate
+        self.redo_rate = redo_rate
+        self.history_rate = history_rate
+        self.load_rate = load_rate
+        self.error_rate = error_rate
+        self.validate()
+
+    def validate(self) -> None:
+        """Raises ValueError if the profile cannot generate a stream."""
+        unknown = [op for op in self.operation_weights if op not in OperationFactory.OPERATION_MAP]
+        if unknown:
+            raise ValueError(f"Unknown operation(s) in mix: {', '.join(unknown)}")
+        if not any(weight > 0 for weight in self.operation_weights.values()):
+            raise ValueError("The operation mix needs at least one positive weight.")
+        if self.distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution '{self.distribution}'. Use one of: {', '.join(DISTRIBUTIONS)}.")
+        if not 0 <= self.low <= self.high or (self.distribution == 'loguniform' and self.low <= 0):
+            raise ValueError("Operand range must satisfy 0 <= low <= high (low > 0 for loguniform).")
+        rates = (self.undo_rate, self.redo_rate, self.history_rate, self.load_rate, self.error_rate)
+        if any(rate < 0 for rate in rates) or sum(rates) > 1:
+            raise ValueError("Command rates must be non-negative and sum to at most 1.")
+
+    def describe(self) -> dict:
+        """Returns the profile as plain data (for reports)."""
+        return {name: getattr(self, name) for name in (
+            'operation_weights', 'distribution', 'low', 'high', 'decimal_places', 'negative_fraction',
+            'undo_rate', 'redo_rate', 'history_rate', 'load_rate', 'error_rate')}
+
+
+class WorkloadGenerator:
+    """Produces the command stream of a profile from a seeded random generator."""
+
+    def __init__(self, profile: WorkloadProfile, seed: int = 0):
+        self.profile = profile
+        self.rng = random.Random(seed)
+        # Above the configured limit, whatever CALCULATOR_MAX_INPUT_VALUE is.
+        self._out_of_range = str(CalculatorConfig.MAX_INPUT_VALUE * 10)
+        weighted = [(op, w) for op, w in profile.operation_weights.items() if w > 0]
+        self._operations = [op for op, _ in weighted]
+        self._weights = [w for _, w in weighted]
+        # Cumulative thresholds of the non-arithmetic commands.
+        self._thresholds = []
+        total = 0.0
+        for kind, rate in (('undo', profile.undo_rate), ('redo', profile.redo_rate),
+                           ('history', profile.history_rate), ('load', profile.load_rate),
+                           ('error', profile.error_rate)):
+            total += rate
+            self._thresholds.append((total, kind))
+
+    def operand(self) -> str:
+        """Draws one operand from the profile's distribution."""
+        p, rng = self.profile, self.rng
+        if p.distribution == 'uniform':
+            value = rng.uniform(p.low, p.high)
+        else:
+            value = 10 ** rng.uniform(math.log10(p.low), math.log10(p.high))
+        if rng.random() < p.negative_fraction:
+            value = -value
+        return f"{value:.{rng.randint(0, p.decimal_places)}f}"
+
+    def _arithmetic(self) -> str:
+        rng = self.rng
+        op = rng.choices(self._operations, self._weights)[0]
+        a, b = self.operand(), self.operand()
+        # Keep power/root realistic: small integer exponents, real roots.
+        if op == 'power':
+            b = str(rng.randint(0, 4))
+        elif op == 'root':
+            a, b = a.lstrip('-'), str(rng.randint(2, 4))
+        elif op in ('divide', 'modulus', 'int_divide', 'percent') and float(b) == 0:
+            b = '1'
+        return f"{op} {a} {b}"
+
+    def _error(self) -> str:
+        rng = self.rng
+        kind = rng.choice(ERROR_KINDS)
+        if kind == 'bad_operand':
+            return f"add {self.operand()} abc"
+        if kind == 'out_of_range':
+            return f"multiply {self._out_of_range} {self.operand()}"
+        if kind == 'divide_by_zero':
+            return f"divide {self.operand()} 0"
+        if kind == 'wrong_arity':
+            return f"subtract {self.operand()}"
+        return "frobnicate 1 2"
+
+    def command(self) -> str:
+        """Returns the next command line."""
+        draw = self.rng.random()
+        for threshold, kind in self._thresholds:
+            if draw < threshold:
+                return self._error() if kind == 'error' else kind
+        return self._arithmetic()
+
+    def commands(self, count: int) -> Iterator[str]:
+        """Yields `count` command lines."""
+        for _ in range(count):
+            yield self.command()
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    """Parses an operation mix such as 'add=3,divide=1'."""
+    weights = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        name, _, weight = item.partition('=')
+        try:
+            weights[name.strip()] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid weight in mix entry '{item}'.")
+    return weights
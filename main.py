@@ -1,20 +1,30 @@
 # main.py
 
 import sys
-from decimal import Decimal
+from datetime import datetime
+from decimal import Decimal, getcontext
 import os
 import pandas as pd
 import colorama # Import colorama
 from colorama import Fore, Style # Import Fore and Style for colors
 
 from app.calculator import Calculator
-from app.calculation import ArithmeticCalculation
+from app.calculation import ArithmeticCalculation, MacroCalculation, ReductionCalculation
 from app.input_validators import InputValidator
-from app.exceptions import ValidationError, OperationError, InsufficientHistoryError
+from app.exceptions import CalculatorError, PersistenceError, ValidationError, InvalidInputError, OperationError, InsufficientHistoryError
 from app.operations import OperationFactory
 from app.logger import setup_logging, app_logger, LoggingObserver
 from app.calculator_config import CalculatorConfig
 from app.history import AutoSaveObserver
+from app.history_follower import HistoryFollower
+from app.metrics import METRICS, PrometheusFileExporter
+from app.profiler import CommandProfiler, MemoryTracer
+from app.registers import RegisterSheet
+from app.macros import Macro, MacroRegistry
+from app.reductions import ReductionFactory, read_operands_file
+from app.jobs import Job, JobManager, worth_a_worker
+from app.checkpoint import save_checkpoint, restore_checkpoint, list_checkpoints
+from app.parquet_history import ParquetAutoSaveObserver, export_history, parquet_history_path, read_history, refresh_export
 
 # Initialize colorama
 colorama.init(autoreset=True)
@@ -25,17 +35,38 @@ setup_logging()
 # 2. Initialize core services
 CALCULATOR = Calculator()
 LOGGING_OBSERVER = LoggingObserver()
+CALCULATOR.register_observer(LOGGING_OBSERVER)
 
 AUTOSAVE_OBSERVER = None
 if CalculatorConfig.AUTO_SAVE:
-    AUTOSAVE_OBSERVER = AutoSaveObserver()
-    app_logger.info("AutoSaveObserver initialized.")
+    if CalculatorConfig.AUTO_SAVE_FORMAT == 'parquet':
+        try:
+            AUTOSAVE_OBSERVER = ParquetAutoSaveObserver()
+        except PersistenceError as e: # pragma: no cover
+            app_logger.error(f"{e} Falling back to CSV autosave.")
+    if AUTOSAVE_OBSERVER is None:
+        AUTOSAVE_OBSERVER = AutoSaveObserver()
+    CALCULATOR.register_observer(AUTOSAVE_OBSERVER)
+    app_logger.info(f"{type(AUTOSAVE_OBSERVER).__name__} initialized.")
+
+PROFILER = CommandProfiler()
+MEMORY_TRACER = MemoryTracer()
+
+METRICS_EXPORTER = None
+if CalculatorConfig.METRICS_ENABLED and CalculatorConfig.METRICS_FILE:
+    METRICS_EXPORTER = PrometheusFileExporter(METRICS, CalculatorConfig.METRICS_FILE, CalculatorConfig.METRICS_INTERVAL)
 
 class Cli:
     """Command-Line Interface (REPL) for the Advanced Calculator Application."""
     def __init__(self, calculator: Calculator):
         self.calculator = calculator
+        self.registers = RegisterSheet()
+        self.jobs = JobManager(calculator)
         self.commands = self._setup_commands()
+        # Operation function -> (display title, is reduction), formatted once per function
+        self._display_names: dict = {}
+        self.macros = MacroRegistry(reserved=set(self.commands))
+        self._load_macros()
         app_logger.info("CLI initialized.")
 
     def _setup_commands(self) -> dict:
@@ -43,11 +74,21 @@ class Cli:
             'add', 'subtract', 'multiply', 'divide', 'power', 'root',
             'modulus', 'int_divide', 'percent', 'abs_diff'
         ]
-        command_map = {cmd: self._handle_binary_operation for cmd in binary_ops}
+        # One shared bound method, so dispatch can compare handlers by identity.
+        self._binary_handler = self._handle_binary_operation
+        command_map = {cmd: self._binary_handler for cmd in binary_ops}
+        command_map.update({cmd: self._make_reduction_handler(cmd) for cmd in ReductionFactory.REDUCTION_MAP})
         command_map.update({
             'history': self._handle_history, 'clear': self._handle_clear,
             'undo': self._handle_undo, 'redo': self._handle_redo,
-            'save': self._handle_save, 'load': self._handle_load,
+            'save': self._handle_save, 'restore': self._handle_restore, 'load': self._handle_load,
+            'export': self._handle_export, 'query': self._handle_query, 'follow': self._handle_follow,
+            'metrics': self._handle_metrics,
+            'profile': self._handle_profile, 'memtrace': self._handle_memtrace,
+            'let': self._handle_let, 'registers': self._handle_registers,
+            'def': self._handle_def, 'undef': self._handle_undef, 'macros': self._handle_macros,
+            'precision': self._handle_precision,
+            'jobs': self._handle_jobs, 'wait': self._handle_wait, 'cancel': self._handle_cancel,
             'help': self._handle_help, 'exit': self._handle_exit, 'quit': self._handle_exit
         })
         return command_map
@@ -58,16 +99,18 @@ class Cli:
             print(f"{Fore.RED}Error: Arithmetic commands require exactly two operands (e.g., add 1 1).{Style.RESET_ALL}")
             return
         try:
-            a = InputValidator.validate_operand(operands[0])
-            b = InputValidator.validate_operand(operands[1])
-            operation_func = OperationFactory.get_operation(command)
-            calculation = ArithmeticCalculation(a, b, operation_func)
-
-            calculation.attach(LOGGING_OBSERVER)
-            if AUTOSAVE_OBSERVER:
-                calculation.attach(AUTOSAVE_OBSERVER)
-
-            self.calculator.execute_command(calculation)
+            with METRICS.timer('command', command):
+                with METRICS.timer('lookup', command):
+                    operation_func = OperationFactory.get_operation(command)
+                with METRICS.timer('validate', command):
+                    a = InputValidator.validate_operand(operands[0])
+                    b = InputValidator.validate_operand(operands[1])
+                calculation = ArithmeticCalculation(a, b, operation_func)
+                if command in CalculatorConfig.BACKGROUND_OPERATIONS and worth_a_worker(calculation):
+                    self._run_in_background(command, calculation)
+                    return
+                # Observers are registered once on the calculator, not per calculation.
+                self.calculator.execute_command(calculation)
             # Print result in Green
             print(f"{Fore.GREEN}Result: {self.calculator.get_current_value()}{Style.RESET_ALL}")
         except (ValidationError, OperationError, Exception) as e:
@@ -75,6 +118,129 @@ class Cli:
             print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
             app_logger.error(f"Failed to execute command '{command}': {e}", exc_info=False)
 
+    def _run_in_background(self, command: str, calculation: ArithmeticCalculation):
+        """
+        Runs a potentially long operation in a worker process. Results that arrive
+        within JOB_INLINE_TIMEOUT are shown as usual; otherwise (or on Ctrl-C)
+        the prompt returns and the calculation continues as a job.
+        """
+        job = self.jobs.submit(command, calculation)
+        try:
+            self.jobs.wait(job.id, CalculatorConfig.JOB_INLINE_TIMEOUT)
+        except KeyboardInterrupt:
+            print()
+        self._report_jobs(self.jobs.commit_ready(), inline=job)
+        if job.status == Job.RUNNING:
+            print(f"{Fore.YELLOW}Running in background as job #{job.id}. Use 'jobs', 'wait {job.id}' or 'cancel {job.id}'.{Style.RESET_ALL}")
+        elif job.status == Job.DONE:
+            print(f"Job #{job.id} finished; it will be committed after earlier jobs complete.")
+
+    def _report_jobs(self, settled: list, inline: Job | None = None):
+        """Prints the outcome of jobs settled by JobManager.commit_ready."""
+        for job in settled:
+            if job.status == Job.COMMITTED:
+                if job is inline:
+                    print(f"{Fore.GREEN}Result: {job.calculation.result}{Style.RESET_ALL}")
+                else:
+                    print(f"{Fore.GREEN}Job #{job.id} ({job.describe()}) committed. Result: {job.calculation.result}{Style.RESET_ALL}")
+            elif job.status == Job.FAILED:
+                print(f"{Fore.RED}Error: Job #{job.id} ({job.describe()}) failed: {job.error}{Style.RESET_ALL}")
+                app_logger.error(f"Failed to execute command '{job.command}': {job.error}")
+
+    def _parse_job_id(self, args) -> int | None:
+        try:
+            return int(args[0].lstrip('#'))
+        except (IndexError, ValueError):
+            return None
+
+    def _handle_precision(self, *args):
+        """
+        Shows or sets the significant digits of results for this session.
+        From JOB_MIN_PRECISION digits on, fractional powers and roots run as background jobs.
+        Usage: precision [digits]
+        """
+        if not args:
+            print(f"Precision: {getcontext().prec} significant digits.")
+            return
+        try:
+            if len(args) != 1:
+                raise ValueError
+            getcontext().prec = int(args[0])
+        except ValueError:
+            print(f"{Fore.RED}Error: Usage: precision [digits] (a positive integer){Style.RESET_ALL}")
+            return
+        print(f"{Fore.GREEN}Precision set to {getcontext().prec} significant digits.{Style.RESET_ALL}")
+        if getcontext().prec >= CalculatorConfig.JOB_MIN_PRECISION:
+            print("Fractional powers and roots will run as background jobs ('jobs', 'wait', 'cancel').")
+
+    def _handle_jobs(self, *args):
+        self._report_jobs(self.jobs.commit_ready())
+        jobs = self.jobs.jobs()
+        if not jobs:
+            print("No background jobs.")
+            return
+        print("\n--- Jobs ---")
+        for job in jobs:
+            outcome = job.calculation.result if job.status == Job.COMMITTED else (job.error or '')
+            print(f"#{job.id:<4} {job.status:<10} {job.elapsed:>8.2f}s  {job.describe()}  {outcome}")
+        print("--------------------------")
+
+    def _handle_wait(self, *args):
+        """Blocks until a job finishes. Ctrl-C stops waiting without cancelling the job."""
+        job_id = self._parse_job_id(args)
+        if job_id is None:
+            print(f"{Fore.RED}Error: Usage: wait <job id>{Style.RESET_ALL}")
+            return
+        try:
+            self.jobs.wait(job_id)
+        except KeyboardInterrupt:
+            print(f"\nStopped waiting for job #{job_id}; it is still running.")
+        except CalculatorError as e:
+            print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
+            return
+        self._report_jobs(self.jobs.commit_ready())
+
+    def _handle_cancel(self, *args):
+        job_id = self._parse_job_id(args)
+        if job_id is None:
+            print(f"{Fore.RED}Error: Usage: cancel <job id>{Style.RESET_ALL}")
+            return
+        try:
+            job = self.jobs.cancel(job_id)
+            print(f"Job #{job.id} cancelled.")
+        except CalculatorError as e:
+            print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
+        self._report_jobs(self.jobs.commit_ready())
+
+    def _make_reduction_handler(self, command: str):
+        """Builds the handler of an n-ary reduction command."""
+        def handler(*operands):
+            self._handle_reduction(command, list(operands))
+        handler.reduction = command
+        return handler
+
+    def _handle_reduction(self, command: str, operands: list):
+        """Reduces any number of operands (or '@<file>' of numbers) into one history entry."""
+        if not operands:
+            print(f"{Fore.RED}Error: '{command}' requires operands (e.g., {command} 1 2 3 or {command} @numbers.txt).{Style.RESET_ALL}")
+            return
+        try:
+            with METRICS.timer('command', command):
+                reduction = ReductionFactory.get_reduction(command)
+                with METRICS.timer('validate', command):
+                    tokens = []
+                    for token in operands:
+                        tokens.extend(read_operands_file(token[1:]) if token.startswith('@') else [token])
+                    checked = InputValidator.validate_many(tokens)
+                    if not checked.valid:
+                        raise InvalidInputError(checked.summary())
+                    values = checked.values
+                self.calculator.execute_command(ReductionCalculation(values, reduction))
+            print(f"{Fore.GREEN}Result: {self.calculator.get_current_value()}{Style.RESET_ALL}")
+        except (ValidationError, OperationError, Exception) as e:
+            print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
+            app_logger.error(f"Failed to execute command '{command}': {e}", exc_info=False)
+
     def _handle_undo(self, *args):
         try:
             self.calculator.undo()
@@ -93,16 +259,208 @@ class Cli:
             # Print error in Red
             print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
 
+    def _display_name(self, operation) -> tuple[str, bool]:
+        entry = self._display_names.get(operation)
+        if entry is None:
+            name = operation.__name__
+            entry = self._display_names[operation] = (name.title(), name in ReductionFactory.REDUCTION_MAP)
+        return entry
+
+    def _write_history_page(self, start: int, stop: int, total: int, footer: str = ''):
+        """Formats history entries [start, stop) and prints them with a single write."""
+        width = len(str(total))
+        lines = ["", "--- Calculation History ---"]
+        display_name = self._display_name
+        for index, memento in enumerate(self.calculator.iter_history(start, stop), start):
+            calc = memento.get_last_command()
+            title, is_reduction = display_name(calc.operation)
+            if is_reduction:
+                lines.append(f"{index:>{width}}. {title}({calc.a} operands) = {calc.result}")
+            elif type(calc) is MacroCalculation:
+                lines.append(f"{index:>{width}}. {title}({', '.join(map(str, calc.arguments))}) = {calc.result}")
+            else:
+                lines.append(f"{index:>{width}}. {title}({calc.a}, {calc.b}) = {calc.result}")
+        lines.append("--------------------------")
+        if footer:
+            lines.append(footer)
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+
+    @staticmethod
+    def _positive_option(options: dict, name: str, default: int) -> int:
+        value = options.get(name, default)
+        try:
+            number = int(value)
+        except ValueError:
+            number = 0
+        if number < 1:
+            raise ValidationError(f"--{name} must be a positive integer, got '{value}'.")
+        return number
+
     def _handle_history(self, *args):
-        history = self.calculator.get_history()
-        if len(history) <= 1:
+        """
+        Shows the calculation history a page at a time, reading only the entries shown.
+        Usage: history [--page N] [--size K] | history --last K | history pager [--size K]
+        """
+        usage = "Usage: history [--page N] [--size K] | history --last K | history pager [--size K]"
+        try:
+            options, positional = self._parse_options(args, ('page', 'size', 'last'))
+            positional = [token.lower() for token in positional]
+            # Each form takes only its own options: --page/--size, --last, or pager with --size.
+            if positional == ['pager']:
+                allowed = {'size'}
+            elif positional:
+                raise ValidationError(usage)
+            else:
+                allowed = {'last'} if 'last' in options else {'page', 'size'}
+            if not options.keys() <= allowed:
+                raise ValidationError(usage)
+            size = self._positive_option(options, 'size', CalculatorConfig.HISTORY_PAGE_SIZE)
+            last = self._positive_option(options, 'last', size)
+            page = self._positive_option(options, 'page', 1)
+        except ValidationError as e:
+            print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
+            return
+
+        # Entry 0 is the initial state; calculations are numbered 1..total.
+        total = self.calculator.history_size() - 1
+        if total <= 0:
             print("No calculations in history yet.")
             return
+        pages = -(-total // size)
+        if positional:
+            self._page_history(total, size, pages)
+        elif 'page' in options:
+            if page > pages:
+                print(f"{Fore.RED}Error: Page {page} does not exist; the history has {pages} page(s) of {size}.{Style.RESET_ALL}")
+                return
+            start = (page - 1) * size + 1
+            stop = min(start + size, total + 1)
+            self._write_history_page(start, stop, total, f"Page {page}/{pages} (entries {start}-{stop - 1} of {total})")
+        else:
+            start = max(1, total - last + 1)
+            footer = ''
+            if start > 1:
+                footer = f"Showing the last {total - start + 1} of {total} entries. Use 'history --page N' or 'history pager' for older ones."
+            self._write_history_page(start, total + 1, total, footer)
 
-        print("\n--- Calculation History ---")
-        for memento in history[1:]:
-            calc = memento.get_last_command()
-            print(f"{calc.operation.__name__.title()}({calc.a}, {calc.b}) = {calc.result}")
+    def _page_history(self, total: int, size: int, pages: int):
+        """Interactive pager from the oldest entry: Enter shows the next page, 'b' goes back, 'q' quits."""
+        page = 1
+        while True:
+            start = (page - 1) * size + 1
+            stop = min(start + size, total + 1)
+            self._write_history_page(start, stop, total)
+            if pages == 1:
+                return
+            try:
+                choice = input(f"-- Page {page}/{pages} -- [Enter] next, [b] back, [q] quit: ").strip().lower()
+            except (EOFError, KeyboardInterrupt):
+                print()
+                return
+            if choice == 'q':
+                return
+            if choice == 'b':
+                page = max(1, page - 1)
+            elif page == pages:
+                return
+            else:
+                page += 1
+
+    def _handle_let(self, *args):
+        """Defines a named register. Usage: let <name> = <value> | let <name> = <operation> <a> <b>"""
+        if len(args) < 3 or args[1] != '=':
+            print(f"{Fore.RED}Error: Usage: let <name> = <value> or let <name> = <operation> <a> <b>{Style.RESET_ALL}")
+            return
+        try:
+            # Register names are lowercase identifiers; references to them are case-insensitive.
+            recomputed = self.registers.define(args[0].lower(), [arg.lower() for arg in args[2:]])
+        except ValidationError as e:
+            print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
+            return
+        for register in recomputed:
+            if register.error:
+                print(f"{Fore.RED}{register.name} = #ERROR ({register.error}){Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}{register.name} = {register.value}{Style.RESET_ALL}")
+
+    def _handle_registers(self, *args):
+        if not len(self.registers):
+            print("No registers defined yet. Use 'let <name> = ...'.")
+            return
+        print("\n--- Registers ---")
+        for register in self.registers.registers():
+            shown = f"#ERROR ({register.error})" if register.error else register.value
+            print(f"{register.name} = {shown}    [{register.formula()}]")
+        print("--------------------------")
+
+    def _load_macros(self):
+        """Compiles the persisted macros once and registers them as commands."""
+        try:
+            count = self.macros.load()
+        except (OSError, ValueError) as e:
+            app_logger.error(f"Failed to load macros from {self.macros.file_path}: {e}")
+            return
+        for macro in self.macros.macros():
+            self.commands[macro.name] = self._make_macro_handler(macro)
+        if count:
+            app_logger.info(f"Loaded {count} macro(s) from {self.macros.file_path}")
+
+    def _make_macro_handler(self, macro: Macro):
+        """
+        Builds a command handler that calls the compiled macro directly and
+        records the call like a built-in (current value, history, observers).
+        """
+        def handler(*operands):
+            try:
+                with METRICS.timer('command', macro.name):
+                    with METRICS.timer('validate', macro.name):
+                        macro.check_arity(operands)
+                        args = [InputValidator.validate_operand(value) for value in operands]
+                    self.calculator.execute_command(MacroCalculation(args, macro.function))
+                print(f"{Fore.GREEN}Result: {self.calculator.get_current_value()}{Style.RESET_ALL}")
+            except (ValidationError, OperationError, ArithmeticError, ValueError) as e:
+                print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
+                app_logger.error(f"Failed to execute macro '{macro.name}': {e}")
+        return handler
+
+    def _handle_def(self, *args):
+        """Defines a macro. Usage: def <name>(<params>) = <expression>"""
+        try:
+            macro = self.macros.define(' '.join(args), persist=False)
+        except ValidationError as e:
+            print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
+            return
+        # A redefinition recompiles the macros that call it, so refresh every handler.
+        for defined in self.macros.macros():
+            self.commands[defined.name] = self._make_macro_handler(defined)
+        print(f"{Fore.GREEN}Macro defined: {macro.definition}{Style.RESET_ALL}")
+        try:
+            self.macros.save()
+        except OSError as e:
+            print(f"{Fore.RED}Error: Macro could not be saved to {self.macros.file_path}: {e}{Style.RESET_ALL}")
+
+    def _handle_undef(self, *args):
+        name = args[0].lower() if len(args) == 1 else None
+        if name not in self.macros:
+            print(f"{Fore.RED}Error: Usage: undef <macro name>{Style.RESET_ALL}")
+            return
+        try:
+            self.macros.remove(name)
+        except ValidationError as e:
+            print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
+            return
+        del self.commands[name]
+        print(f"Macro '{name}' removed.")
+
+    def _handle_macros(self, *args):
+        macros = self.macros.macros()
+        if not macros:
+            print("No macros defined yet. Use 'def <name>(<params>) = <expression>'.")
+            return
+        print("\n--- Macros ---")
+        for macro in macros:
+            print(f"  {macro.definition}")
         print("--------------------------")
 
     def _handle_clear(self, *args):
@@ -110,9 +468,131 @@ class Cli:
         print("In-memory history cleared. Calculator reset to 0.")
 
     def _handle_save(self, *args):
-        print("Feature TBD: Manual history save.")
+        """Saves a checkpoint of the full calculator state. Usage: save [name]"""
+        name = args[0] if args else 'default'
+        try:
+            path = save_checkpoint(self.calculator, name)
+            print(f"{Fore.GREEN}Checkpoint '{name}' saved to {path}{Style.RESET_ALL}")
+        except (PersistenceError, OSError) as e:
+            print(f"{Fore.RED}Error saving checkpoint: {e}{Style.RESET_ALL}")
+            app_logger.error(f"Failed to save checkpoint '{name}': {e}")
+
+    def _handle_restore(self, *args):
+        """Restores a checkpoint written by 'save'. Usage: restore [name]"""
+        if not args:
+            names = list_checkpoints()
+            print(f"Available checkpoints: {', '.join(names)}" if names else "No checkpoints saved yet.")
+            print("Usage: restore <name>")
+            return
+        name = args[0]
+        try:
+            restore_checkpoint(self.calculator, name, self._macro_functions())
+            print(f"{Fore.GREEN}Checkpoint '{name}' restored. Current value is {self.calculator.get_current_value()}{Style.RESET_ALL}")
+        except (PersistenceError, OSError) as e:
+            print(f"{Fore.RED}Error restoring checkpoint: {e}{Style.RESET_ALL}")
+            app_logger.error(f"Failed to restore checkpoint '{name}': {e}")
+
+    @staticmethod
+    def _parse_options(args, names: tuple[str, ...]) -> tuple[dict, list]:
+        """Splits '--name value' options from positional arguments."""
+        options, positional = {}, []
+        tokens = iter(args)
+        for token in tokens:
+            if not token.startswith('--'):
+                positional.append(token)
+                continue
+            name = token[2:].lower()
+            if name not in names:
+                raise ValidationError(f"Unknown option '{token}'.")
+            value = next(tokens, None)
+            if value is None:
+                raise ValidationError(f"Option '{token}' requires a value.")
+            options[name] = value
+        return options, positional
+
+    def _macro_functions(self) -> dict:
+        """Compiled macro functions by name, for history entries recorded from macro calls."""
+        return {macro.name: macro.function for macro in self.macros.macros()}
+
+    def _history_filters(self, options: dict) -> dict:
+        """Converts --since/--until/--op options into read_history filters."""
+        filters = {}
+        for name in ('since', 'until'):
+            if name in options:
+                try:
+                    filters[name] = datetime.fromisoformat(options[name])
+                except ValueError:
+                    raise ValidationError(f"Invalid --{name} '{options[name]}'. Expected an ISO date or time (e.g. 2024-05-01T12:00).")
+        if 'op' in options:
+            operations = [op for op in options['op'].lower().split(',') if op]
+            for op in operations:
+                if op not in OperationFactory.OPERATION_MAP and op not in ReductionFactory.REDUCTION_MAP and op not in self.macros:
+                    raise ValidationError(f"Unknown operation '{op}' in --op.")
+            filters['operations'] = operations
+        return filters
+
+    def _read_parquet_history(self, filters: dict) -> list:
+        """
+        Reads (filtered) Parquet history: the autosave parts, including rows still
+        buffered in memory, or an export kept up to date with the CSV history.
+        """
+        if isinstance(AUTOSAVE_OBSERVER, ParquetAutoSaveObserver):
+            return AUTOSAVE_OBSERVER.read_history(**filters)
+        if CalculatorConfig.AUTO_SAVE_FORMAT != 'parquet':
+            return read_history(refresh_export(), **filters)
+        return read_history(parquet_history_path(), **filters)
+
+    def _load_records(self, records) -> int:
+        """Replaces the history with (operation, a, b, result) records."""
+        self.calculator.clear_history()
+        count = 0
+        for operation_name, a, b, result in records:
+            if operation_name in ReductionFactory.REDUCTION_MAP:
+                op_func = ReductionFactory.get_reduction(operation_name)
+            elif operation_name in self.macros:
+                op_func = self.macros.get(operation_name).function
+            else:
+                op_func = OperationFactory.get_operation(operation_name)
+            calc = ArithmeticCalculation(a, b, op_func)
+            calc.result = result
+            self.calculator.load_calculation(calc)
+            count += 1
+        return count
 
     def _handle_load(self, *args):
+        """
+        Loads the autosaved history. Usage: load [--format csv|parquet] [--since T] [--until T] [--op a,b]
+        Filters (and Parquet autosave) read through the Parquet reader, which skips non-matching row groups.
+        """
+        try:
+            options, _ = self._parse_options(args, ('format', 'since', 'until', 'op'))
+            filters = self._history_filters(options)
+        except ValidationError as e:
+            print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
+            return
+        default_format = 'parquet' if filters or CalculatorConfig.AUTO_SAVE_FORMAT == 'parquet' else 'csv'
+        if options.get('format', default_format).lower() == 'parquet':
+            self._load_parquet(filters)
+        elif filters:
+            print(f"{Fore.RED}Error: --since, --until and --op require --format parquet.{Style.RESET_ALL}")
+        else:
+            self._load_csv()
+
+    def _load_parquet(self, filters: dict):
+        try:
+            rows = self._read_parquet_history(filters)
+            if not rows:
+                print("No calculations match. History not changed.")
+                return
+            print("Loading history...")
+            self._load_records((op, a, b, result) for _, op, a, b, result in rows)
+            print(f"{Fore.GREEN}Loaded {len(rows)} calculations. Current value is {self.calculator.get_current_value()}{Style.RESET_ALL}")
+            app_logger.info(f"Calculation history loaded from Parquet ({len(rows)} rows).")
+        except Exception as e:
+            print(f"{Fore.RED}Error loading history: {e}{Style.RESET_ALL}")
+            app_logger.error(f"Failed to load history from Parquet: {e}", exc_info=True)
+
+    def _load_csv(self):
         file_path = os.path.join(CalculatorConfig.HISTORY_DIR, 'calculations.csv')
 
         if not os.path.exists(file_path):
@@ -128,19 +608,11 @@ class Cli:
                 app_logger.info("History file is empty. No history loaded.")
                 return
 
-            self.calculator.clear_history()
-
             print("Loading history...")
-            for index, row in df.iterrows():
-                op_func = OperationFactory.get_operation(row['operation'])
-                a = Decimal(str(row['operand_a']))
-                b = Decimal(str(row['operand_b']))
-                result = Decimal(str(row['result']))
-
-                calc = ArithmeticCalculation(a, b, op_func)
-                calc.result = result
-
-                self.calculator.load_calculation(calc)
+            self._load_records(
+                (operation_name, Decimal(str(a)), Decimal(str(b)), Decimal(str(result)))
+                for operation_name, a, b, result in zip(df['operation'], df['operand_a'], df['operand_b'], df['result'])
+            )
 
             # Print success in Green
             print(f"{Fore.GREEN}History successfully loaded. Current value is {self.calculator.get_current_value()}{Style.RESET_ALL}")
@@ -154,18 +626,179 @@ class Cli:
             print(f"{Fore.RED}Error loading history: {e}{Style.RESET_ALL}")
             app_logger.error(f"Failed to load history from CSV: {e}", exc_info=True)
 
+    def _handle_export(self, *args):
+        """Exports the autosaved history. Usage: export --format parquet [path]"""
+        try:
+            options, positional = self._parse_options(args, ('format',))
+            export_format = options.get('format', 'parquet').lower()
+            if export_format != 'parquet' or len(positional) > 1:
+                raise ValidationError("Usage: export --format parquet [path]")
+            autosave = AUTOSAVE_OBSERVER if isinstance(AUTOSAVE_OBSERVER, ParquetAutoSaveObserver) else None
+            path, count = export_history(positional[0] if positional else None, autosave)
+            print(f"{Fore.GREEN}Exported {count} calculations to {path}{Style.RESET_ALL}")
+        except (CalculatorError, OSError) as e:
+            print(f"{Fore.RED}Error exporting history: {e}{Style.RESET_ALL}")
+            app_logger.error(f"Failed to export history: {e}")
+
+    def _handle_query(self, *args):
+        """Lists stored calculations without loading them. Usage: query [--since T] [--until T] [--op a,b]"""
+        try:
+            options, _ = self._parse_options(args, ('since', 'until', 'op'))
+            rows = self._read_parquet_history(self._history_filters(options))
+        except (CalculatorError, OSError) as e:
+            print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
+            return
+        if not rows:
+            print("No calculations match.")
+            return
+        print("\n--- Stored Calculations ---")
+        for timestamp, operation_name, a, b, result in rows:
+            arguments = f"{a} operands" if operation_name in ReductionFactory.REDUCTION_MAP else f"{a}, {b}"
+            print(f"{timestamp.isoformat(sep=' ', timespec='seconds')}  {operation_name.title()}({arguments}) = {result}")
+        print(f"--------------------------\n{len(rows)} calculation(s)")
+
+    def _handle_follow(self, *args):
+        """
+        Prints calculations as they are appended to the autosave CSV (e.g. by other
+        sessions sharing it), with running per-operation aggregates, until Ctrl-C.
+        Usage: follow [interval]
+        """
+        try:
+            if len(args) > 1:
+                raise ValueError
+            interval = float(args[0]) if args else 1.0
+            if not interval > 0:
+                raise ValueError
+        except ValueError:
+            print(f"{Fore.RED}Error: Usage: follow [interval] (interval in seconds, greater than 0){Style.RESET_ALL}")
+            return
+        if isinstance(AUTOSAVE_OBSERVER, ParquetAutoSaveObserver):
+            print(f"{Fore.RED}Error: follow reads the CSV autosave file, but CALCULATOR_AUTO_SAVE_FORMAT is parquet.{Style.RESET_ALL}")
+            return
+        follower = HistoryFollower(from_end=True)
+        print(f"Following {follower.path} (Ctrl-C to stop)...")
+        try:
+            for timestamp, operation_name, a, b, result in follower.follow(interval):
+                stats = follower.stats[operation_name]
+                print(f"{timestamp.isoformat(sep=' ', timespec='seconds')}  {operation_name.title()}({a}, {b}) = {result}"
+                      f"  [{operation_name}: n={stats.count}, sum={stats.total}]")
+        except KeyboardInterrupt:
+            print()
+        finally:
+            follower.close()
+        if not follower.stats:
+            print("No new calculations.")
+            return
+        print("\n--- New Calculations ---")
+        for operation_name, stats in sorted(follower.stats.items()):
+            print(f"{operation_name}: n={stats.count} sum={stats.total} min={stats.minimum} max={stats.maximum} last={stats.last}")
+        print("--------------------------")
+
+    def _handle_metrics(self, *args):
+        """Shows per-stage latency histograms. Usage: metrics [reset|export]"""
+        action = args[0].lower() if args else 'show'
+        if action == 'reset':
+            METRICS.reset()
+            print("Metrics reset.")
+        elif action == 'export':
+            if not METRICS_EXPORTER:
+                print(f"{Fore.RED}Error: Set CALCULATOR_METRICS_FILE to enable the Prometheus exporter.{Style.RESET_ALL}")
+                return
+            METRICS_EXPORTER.write_once()
+            print(f"{Fore.GREEN}Metrics written to {METRICS_EXPORTER.file_path}{Style.RESET_ALL}")
+        elif action == 'show':
+            if not METRICS.enabled:
+                print("Metrics are disabled (CALCULATOR_METRICS_ENABLED=false).")
+                return
+            print("\n--- Latency Metrics (microseconds) ---")
+            print(METRICS.render())
+            print("--------------------------")
+        else:
+            print(f"{Fore.RED}Error: Usage: metrics [reset|export]{Style.RESET_ALL}")
+
+    @staticmethod
+    def _parse_top_n(args, default: int) -> int:
+        """Reads the optional top-N argument of the profiling commands."""
+        try:
+            return int(args[1]) if len(args) > 1 else default
+        except ValueError:
+            raise ValidationError(f"Invalid count '{args[1]}'. Expected an integer.")
+
+    def _handle_profile(self, *args):
+        """Controls cProfile around command dispatch. Usage: profile start|stop|dump [N]"""
+        action = args[0].lower() if args else ''
+        try:
+            top_n = self._parse_top_n(args, 20)
+            if action == 'start':
+                PROFILER.start()
+                print(f"{Fore.GREEN}Profiler started. Subsequent commands are being profiled.{Style.RESET_ALL}")
+            elif action in ('stop', 'dump'):
+                path, report = PROFILER.stop(top_n) if action == 'stop' else PROFILER.dump(top_n)
+                print(report)
+                print(f"{Fore.GREEN}Profile written to {path}{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.RED}Error: Usage: profile start|stop|dump [N]{Style.RESET_ALL}")
+        except CalculatorError as e:
+            print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
+
+    def _handle_memtrace(self, *args):
+        """Controls tracemalloc. Usage: memtrace start|snapshot|diff|stop [N]"""
+        action = args[0].lower() if args else ''
+        try:
+            top_n = self._parse_top_n(args, 10)
+            if action == 'start':
+                MEMORY_TRACER.start()
+                print(f"{Fore.GREEN}Memory tracing started.{Style.RESET_ALL}")
+            elif action == 'snapshot':
+                path, stats = MEMORY_TRACER.snapshot(top_n)
+                print("\n".join(stats))
+                print(f"{Fore.GREEN}Snapshot written to {path}{Style.RESET_ALL}")
+            elif action == 'diff':
+                path, stats = MEMORY_TRACER.diff(top_n)
+                print("\n".join(stats))
+                print(f"{Fore.GREEN}Snapshot written to {path}{Style.RESET_ALL}")
+            elif action == 'stop':
+                MEMORY_TRACER.stop()
+                print("Memory tracing stopped.")
+            else:
+                print(f"{Fore.RED}Error: Usage: memtrace start|snapshot|diff|stop [N]{Style.RESET_ALL}")
+        except CalculatorError as e:
+            print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
+
     def _handle_help(self, *args):
         print("\n--- Available Commands ---")
         binary_ops = [k for k, v in self.commands.items() if v == self._handle_binary_operation]
-        util_ops = [k for k, v in self.commands.items() if v != self._handle_binary_operation]
+        reduction_ops = [k for k, v in self.commands.items() if hasattr(v, 'reduction')]
+        util_ops = [k for k, v in self.commands.items() if v != self._handle_binary_operation and k not in reduction_ops]
         print(f"\n[Arithmetic Commands (Usage: <command> <number1> <number2>)]\n  {', '.join(binary_ops)}")
+        print(f"\n[Reduction Commands (Usage: <command> <number1> <number2> ... | <command> @<file>)]\n  {', '.join(reduction_ops)}")
         print(f"\n[Utility Commands (Usage: <command>)]\n  {', '.join(util_ops)}")
         print("\n--------------------------")
 
     def _handle_exit(self, *args):
+        self.jobs.cancel_all()
+        if isinstance(AUTOSAVE_OBSERVER, ParquetAutoSaveObserver):
+            AUTOSAVE_OBSERVER.flush()
+        if METRICS_EXPORTER:
+            METRICS_EXPORTER.stop()
         print("Exiting Artan's calculator. Goodbye!")
         sys.exit(0)
 
+    def dispatch(self, user_input: str):
+        """Parses one input line and runs the matching command handler."""
+        # Commit background jobs that finished since the last command, in submission order.
+        self._report_jobs(self.jobs.commit_ready())
+        # Only the command is case-insensitive: arguments such as file paths keep their case.
+        parts = user_input.split()
+        command, operands = parts[0].lower(), parts[1:]
+        handler = self.commands.get(command)
+        if handler:
+            if handler is self._binary_handler: PROFILER.run(handler, command, operands)
+            else: PROFILER.run(handler, *operands)
+        else:
+            # Print error in Red
+            print(f"{Fore.RED}Error: Unknown command '{command}'. Type 'help' for available commands.{Style.RESET_ALL}")
+
     def start(self):
         """Runs the main Read-Eval-Print Loop (REPL)."""
         print("\n==============================================")
@@ -175,18 +808,10 @@ class Cli:
         print("==============================================\n")
         while True:
             try:
-                user_input = input("Enter Command > ").strip().lower()
+                user_input = input("Enter Command > ").strip()
 
                 if not user_input: continue
-                parts = user_input.split()
-                command, operands = parts[0], parts[1:]
-                handler = self.commands.get(command)
-                if handler:
-                    if handler == self._handle_binary_operation: handler(command, operands)
-                    else: handler(*operands)
-                else:
-                    # Print error in Red
-                    print(f"{Fore.RED}Error: Unknown command '{command}'. Type 'help' for available commands.{Style.RESET_ALL}")
+                self.dispatch(user_input)
             except KeyboardInterrupt: self._handle_exit()
             except Exception as e:
                 app_logger.critical(f"An unexpected error occurred in the REPL: {e}", exc_info=True)
@@ -196,6 +821,8 @@ class Cli:
 if __name__ == '__main__':
     try:
         cli = Cli(CALCULATOR)
+        if METRICS_EXPORTER:
+            METRICS_EXPORTER.start()
         cli.start()
     except Exception as e:
         app_logger.critical(f"Failed to start the application: {e}", exc_info=True)
@@ -0,0 +1,11 @@
+# tests/conftest.py
+
+import pytest
+from app.calculator_config import CalculatorConfig
+
+@pytest.fixture
+def history_dir(tmp_path, monkeypatch):
+    """Keeps history files (autosave, checkpoints, Parquet) in a temporary directory, with CSV autosave."""
+    monkeypatch.setattr(CalculatorConfig, 'HISTORY_DIR', str(tmp_path))
+    monkeypatch.setattr(CalculatorConfig, 'AUTO_SAVE_FORMAT', 'csv')
+    return tmp_path
@@ -2,7 +2,7 @@
 
 import pytest
 from decimal import Decimal
-from app.calculation import ArithmeticCalculation
+from app.calculation import ArithmeticCalculation, MacroCalculation
 from app.operations import OperationFactory
 from app.exceptions import DivisionByZeroError
 from app.logger import Observer
@@ -56,6 +56,21 @@ def test_calculation_repr(basic_calc):
     """Tests the __repr__ method for a clear string representation."""
     assert repr(basic_calc) == "Calculation(10, 5, Operation=Add)"
 
+def test_macro_calculation(mock_observer):
+    """Tests that a macro call keeps all arguments and fills a and b for the history schema."""
+    def volume(x, y, z):
+        return x * y * z
+    calc = MacroCalculation([Decimal('2'), Decimal('3'), Decimal('4')], volume)
+    calc.attach(mock_observer)
+    assert calc.perform() == Decimal('24')
+    assert (calc.a, calc.b, calc.arguments) == (Decimal('2'), Decimal('3'), (Decimal('2'), Decimal('3'), Decimal('4')))
+    assert mock_observer.subject_state is calc
+    assert repr(calc) == "Calculation(volume(2, 3, 4))"
+    single = MacroCalculation([Decimal('5')], lambda x: x / 0)
+    assert (single.a, single.b) == (Decimal('5'), Decimal('0'))
+    with pytest.raises(ZeroDivisionError):
+        single.perform()
+
 def test_observer_attach_and_notify(basic_calc, mock_observer):
     """Tests that an attached observer is notified when perform() is called."""
     basic_calc.attach(mock_observer)
@@ -106,4 +121,45 @@ def test_auto_save_observer_handles_exception(caplog):
     with caplog.at_level(logging.ERROR):
         observer.update(bad_subject)
     
-    assert "Failed to auto-save history" in caplog.text
\ No newline at end of file
+    assert "Failed to auto-save history" in caplog.text
+
+# --- Tests for concurrent AutoSave appends ---
+
+def _append_rows(file_path, count):
+    """Worker used by the multi-process test: appends `count` rows."""
+    observer = AutoSaveObserver(file_path)
+    add_func = OperationFactory.get_operation('add')
+    for i in range(count):
+        calc = ArithmeticCalculation(Decimal(i), Decimal('1'), add_func)
+        calc.attach(observer)
+        calc.perform()
+
+def test_auto_save_observer_custom_path(tmp_path, basic_calc):
+    """Tests that the observer writes the header once and appends rows."""
+    file_path = str(tmp_path / 'nested' / 'calculations.csv')
+    observer = AutoSaveObserver(file_path)
+    basic_calc.attach(observer)
+    basic_calc.perform()
+    basic_calc.perform()
+
+    with open(file_path) as f:
+        lines = f.read().splitlines()
+    assert lines[0] == 'timestamp,operation,operand_a,operand_b,result'
+    assert len(lines) == 3
+    assert lines[1].endswith(',add,10,5,15')
+
+def test_auto_save_observer_concurrent_processes(tmp_path):
+    """Tests that several processes appending at once never duplicate the header or tear rows."""
+    import multiprocessing
+    file_path = str(tmp_path / 'calculations.csv')
+    processes = [multiprocessing.Process(target=_append_rows, args=(file_path, 50)) for _ in range(4)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+
+    df = pd.read_csv(file_path)
+    assert list(df.columns) == ['timestamp', 'operation', 'operand_a', 'operand_b', 'result']
+    assert len(df) == 200
+    assert (df['operation'] == 'add').all()
+    assert (df['result'] == df['operand_a'] + 1).all()
@@ -117,4 +117,220 @@ def test_calculator_load_calculation(clean_calculator):
     # Check that it was added to the history
     history = clean_calculator.get_history()
     assert len(history) == 2 # (Initial '0' state + our loaded state)
-    assert history[-1].get_last_command().result == Decimal('150')
\ No newline at end of file
+    assert history[-1].get_last_command().result == Decimal('150')
+
+# --- Tests for shared observers and slot-based records ---
+
+def test_calculator_registered_observer_is_notified(clean_calculator):
+    """Tests that observers registered on the calculator see every command."""
+    seen = []
+
+    class RecordingObserver(Observer):
+        def update(self, subject) -> None:
+            seen.append(subject.result)
+
+    observer = RecordingObserver()
+    clean_calculator.register_observer(observer)
+    clean_calculator.register_observer(observer) # Registering twice is a no-op
+    clean_calculator.execute_command(create_command('add', '1', '2'))
+    clean_calculator.execute_command(create_command('multiply', '2', '5'))
+    assert seen == [Decimal('3'), Decimal('10')]
+
+    clean_calculator.unregister_observer(observer)
+    clean_calculator.execute_command(create_command('add', '1', '1'))
+    assert len(seen) == 2
+
+def test_calculations_and_mementos_use_slots(clean_calculator):
+    """Tests that per-command records carry no __dict__ or private observer list."""
+    command = create_command('add', '1', '2')
+    assert not hasattr(command, '__dict__')
+    assert command._observers == ()
+    clean_calculator.execute_command(command)
+    memento = clean_calculator.get_history()[-1]
+    assert not hasattr(memento, '__dict__')
+    assert memento.get_last_command() is command
+
+# --- Tests for lazy history iteration ---
+
+def test_iter_history_slices_without_copying(clean_calculator):
+    """Tests that history slices are read lazily and clamped to the history size."""
+    for i in range(5):
+        clean_calculator.execute_command(create_command('add', str(i), '1'))
+    assert clean_calculator.history_size() == 6
+    results = [m.get_last_command().result for m in clean_calculator.iter_history(2, 4)]
+    assert results == [Decimal('2'), Decimal('3')]
+    assert len(list(clean_calculator.iter_history(4))) == 2
+    assert len(list(clean_calculator.iter_history(-3, 100))) == 6
+    assert list(clean_calculator.iter_history(7)) == []
+
+# --- Tests for delta-encoded history ---
+
+def _snapshot(calculator):
+    """The observable history state: current value, undo/redo states and commands."""
+    def describe(mementos):
+        return [(m.get_state_value(), repr(m.get_last_command())) for m in mementos]
+    return (calculator.get_current_value(), describe(calculator.get_history()),
+            describe(calculator.get_redo_history()))
+
+def test_delta_history_matches_full_history(monkeypatch):
+    """Tests that a delta-encoded history behaves exactly like the full one."""
+    full = Calculator()
+    monkeypatch.setattr(CalculatorConfig, 'HISTORY_ENCODING', 'delta')
+    monkeypatch.setattr(CalculatorConfig, 'HISTORY_KEYFRAME_INTERVAL', 4)
+    delta = Calculator()
+    assert type(delta._history_manager).__name__ == 'DeltaHistoryManager'
+
+    def both(action):
+        outcomes = []
+        for calculator in (full, delta):
+            try:
+                action(calculator)
+                outcomes.append(None)
+            except InsufficientHistoryError as e:
+                outcomes.append(str(e))
+        assert outcomes[0] == outcomes[1]
+        assert _snapshot(full) == _snapshot(delta)
+
+    def loaded(op_name, a_val, b_val):
+        command = create_command(op_name, a_val, b_val)
+        command.perform()
+        return command
+
+    for i in range(11):
+        both(lambda c: c.execute_command(create_command('multiply', str(c.get_current_value() + 1), '1.5')))
+    both(lambda c: c.execute_command(create_command('divide', '1', '3')))
+    for _ in range(7):
+        both(lambda c: c.undo())
+    both(lambda c: c.redo())
+    both(lambda c: c.redo())
+    both(lambda c: c.load_calculation(loaded('add', '5.0', '5.00')))
+    both(lambda c: c.execute_command(create_command('subtract', str(c.get_current_value()), '0.5')))
+    for _ in range(20):
+        both(lambda c: c.undo())
+    for _ in range(20):
+        both(lambda c: c.redo())
+    assert [m.get_state_value() for m in full.iter_history(3, 9)] == \
+           [m.get_state_value() for m in delta.iter_history(3, 9)]
+    both(lambda c: c.clear_history())
+
+def test_delta_history_replays_in_recorded_precision(monkeypatch):
+    """Tests that replayed states use the decimal precision they were computed with."""
+    from decimal import localcontext
+    monkeypatch.setattr(CalculatorConfig, 'HISTORY_ENCODING', 'delta')
+    calculator = Calculator()
+    with localcontext() as ctx:
+        ctx.prec = 50
+        calculator.execute_command(create_command('divide', '1', '3'))
+        calculator.execute_command(create_command('divide', '2', '3'))
+    expected = calculator.get_history()[2].get_state_value()
+    assert len(expected.as_tuple().digits) == 50
+    calculator.undo()
+    calculator.undo()
+    assert calculator.get_redo_history()[0].get_state_value() == expected
+    calculator.redo()
+    calculator.redo()
+    assert calculator.get_current_value() == expected
+
+def test_delta_history_stores_chains_compactly(monkeypatch):
+    """Tests that chained states keep no result and no copy of the previous state."""
+    from app.history import DeltaHistoryManager
+    manager = DeltaHistoryManager(keyframe_interval=8)
+    monkeypatch.setattr(CalculatorConfig, 'HISTORY_ENCODING', 'delta')
+    calculator = Calculator()
+    calculator._history_manager = manager
+    calculator.clear_history()
+    for _ in range(10):
+        calculator.execute_command(create_command('add', str(calculator.get_current_value()), '2'))
+    kinds = [type(entry).__name__ for entry in manager._undo_mementos]
+    assert kinds == ['_Keyframe'] + ['_Delta'] * 7 + ['_Keyframe'] + ['_Delta'] * 2
+    assert manager._undo_mementos[1].a is None
+    calculator.undo()
+    assert calculator.get_current_value() == Decimal('18')
+
+def test_delta_history_differential(monkeypatch):
+    """Tests delta against full history over random commands, undo/redo and precision changes."""
+    import random
+    from decimal import localcontext
+    full = Calculator()
+    monkeypatch.setattr(CalculatorConfig, 'HISTORY_ENCODING', 'delta')
+    monkeypatch.setattr(CalculatorConfig, 'HISTORY_KEYFRAME_INTERVAL', 4)
+    delta = Calculator()
+    rng = random.Random(7)
+    operations = ['add', 'subtract', 'multiply', 'divide']
+    for step in range(600):
+        precision = rng.choice([5, 28, 40])
+        action = rng.random()
+        operand = str(rng.randint(1, 9))
+        op_name = rng.choice(operations)
+        with localcontext() as ctx:
+            ctx.prec = precision
+            for calculator in (full, delta):
+                try:
+                    if action < 0.25:
+                        calculator.undo()
+                    elif action < 0.45:
+                        calculator.redo()
+                    else:
+                        calculator.execute_command(create_command(op_name, str(calculator.get_current_value()), operand))
+                except InsufficientHistoryError:
+                    pass
+        assert _snapshot(full) == _snapshot(delta), f"diverged at step {step}"
+
+def test_delta_history_new_state_after_undo_joins_segment_context(monkeypatch):
+    """Tests that a state saved after undoing into another precision's segment replays correctly."""
+    from decimal import localcontext
+    monkeypatch.setattr(CalculatorConfig, 'HISTORY_ENCODING', 'delta')
+    calculator = Calculator()
+    with localcontext() as ctx:
+        ctx.prec = 5
+        calculator.execute_command(create_command('add', '1', '1'))
+    calculator.execute_command(create_command('divide', '2', '3'))
+    calculator.undo()
+    calculator.execute_command(create_command('divide', '2', '3'))
+    for i in range(3):
+        calculator.execute_command(create_command('add', str(i), '1'))
+    # Undo past the precision-5 keyframe, so redo has to replay the divide from it.
+    for _ in range(5):
+        calculator.undo()
+    calculator.redo()
+    calculator.redo()
+    assert calculator.get_current_value() == Decimal(2) / Decimal(3)
+
+def test_delta_history_restore_reencodes_replayable_states(monkeypatch):
+    """Tests that restored chains become deltas again, except states that would not replay exactly."""
+    from decimal import localcontext
+    full = Calculator()
+    with localcontext() as ctx:
+        ctx.prec = 50
+        full.execute_command(create_command('divide', '1', '3'))
+    for i in range(6):
+        full.execute_command(create_command('add', str(full.get_current_value()), '2'))
+    loaded = create_command('add', '5.0', '5.00')
+    loaded.perform()
+    full.load_calculation(loaded)
+    for i in range(4):
+        full.execute_command(create_command('multiply', str(i), '1.5'))
+    full.undo()
+    full.undo()
+
+    monkeypatch.setattr(CalculatorConfig, 'HISTORY_ENCODING', 'delta')
+    monkeypatch.setattr(CalculatorConfig, 'HISTORY_KEYFRAME_INTERVAL', 5)
+    delta = Calculator()
+    delta.restore_state(full.get_current_value(), full.get_history(), full.get_redo_history())
+    manager = delta._history_manager
+    kinds = [type(entry).__name__[1] for entry in manager._undo_mementos]
+    # Keyframes: 0 (initial), 1 (50-digit divide) and the interval positions 5 and 10.
+    # The loaded add replays exactly, so it becomes a delta; so do both redo entries.
+    assert ''.join(kinds) == 'KKDDDKDDDDK'
+    assert [type(entry).__name__ for entry in manager._redo_mementos] == ['_Delta', '_Delta']
+    assert manager._undo_mementos[2].a is None and manager._undo_mementos[9].a == Decimal('0')
+    assert _snapshot(delta) == _snapshot(full)
+    for calculator in (full, delta):
+        calculator.redo()
+        calculator.redo()
+        for _ in range(12):
+            try:
+                calculator.undo()
+            except InsufficientHistoryError:
+                pass
+    assert _snapshot(delta) == _snapshot(full)
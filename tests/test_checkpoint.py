@@ -0,0 +1,197 @@
+# tests/test_checkpoint.py
+
+import json
+import pickle
+import pytest
+from decimal import Decimal
+from app.calculation import ArithmeticCalculation, ReductionCalculation
+from app.calculator import Calculator
+from app.checkpoint import (
+    save_checkpoint, restore_checkpoint, list_checkpoints, checkpoint_path, HEADER, MAGIC,
+    MANIFEST_LENGTH, SnapshotStack
+)
+from app.exceptions import PersistenceError, InsufficientHistoryError
+from app.operations import OperationFactory
+from app.reductions import Reductions
+
+pytestmark = pytest.mark.usefixtures('history_dir')
+
+@pytest.fixture
+def calculator():
+    """A calculator with three commands (one a reduction) and one undone state."""
+    calc = Calculator()
+    calc.execute_command(ArithmeticCalculation(Decimal('1'), Decimal('2'), OperationFactory.get_operation('add')))
+    calc.execute_command(ArithmeticCalculation(Decimal('1'), Decimal('3'), OperationFactory.get_operation('divide')))
+    calc.execute_command(ReductionCalculation([Decimal('4'), Decimal('5')], Reductions.sum))
+    calc.undo()
+    return calc
+
+def _describe(mementos):
+    return [(m.get_state_value(), m.get_last_command().operation.__name__,
+             m.get_last_command().a, m.get_last_command().b, m.get_last_command().result) for m in mementos]
+
+@pytest.mark.parametrize("compression", ['none', 'zlib', 'lzma'])
+def test_save_and_restore_round_trip(calculator, compression):
+    """Tests that current value, undo stack and redo stack survive a round trip."""
+    save_checkpoint(calculator, 'session', compression)
+    restored = Calculator()
+    restore_checkpoint(restored, 'session')
+
+    assert restored.get_current_value() == calculator.get_current_value()
+    assert _describe(restored.get_history()) == _describe(calculator.get_history())
+    assert _describe(restored.get_redo_history()) == _describe(calculator.get_redo_history())
+
+    restored.redo()
+    command = restored.get_history()[-1].get_last_command()
+    assert isinstance(command, ReductionCalculation)
+    assert repr(command) == "Calculation(Sum of 2 operands)"
+    assert command.operands is None
+    assert restored.get_current_value() == Decimal('9')
+    restored.undo()
+    restored.undo()
+    assert restored.get_current_value() == Decimal('3')
+
+def test_list_checkpoints(calculator):
+    """Tests that saved checkpoints are listed by name."""
+    assert list_checkpoints() == []
+    save_checkpoint(calculator, 'b')
+    save_checkpoint(calculator, 'a')
+    assert list_checkpoints() == ['a', 'b']
+
+def test_snapshot_header(calculator):
+    """Tests the versioned binary header."""
+    path = save_checkpoint(calculator, 'header', 'zlib')
+    with open(path, 'rb') as f:
+        magic, version, codec = HEADER.unpack(f.read(HEADER.size))
+    assert (magic, version, codec) == (MAGIC, 3, 1)
+
+def test_restore_errors(calculator, history_dir):
+    """Tests missing, foreign, corrupt and future-version snapshots."""
+    with pytest.raises(PersistenceError, match="not found"):
+        restore_checkpoint(calculator, 'missing')
+    with pytest.raises(PersistenceError, match="Invalid checkpoint name"):
+        checkpoint_path('a/b')
+
+    path = save_checkpoint(calculator, 'broken')
+    with open(path, 'wb') as f:
+        f.write(b'not a snapshot')
+    with pytest.raises(PersistenceError, match="not a calculator snapshot"):
+        restore_checkpoint(calculator, 'broken')
+
+    with open(path, 'wb') as f:
+        f.write(b'xy')
+    with pytest.raises(PersistenceError, match="not a calculator snapshot"):
+        restore_checkpoint(calculator, 'broken')
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, 99, 0))
+    with pytest.raises(PersistenceError, match="schema v99"):
+        restore_checkpoint(calculator, 'broken')
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, 3, 7))
+    with pytest.raises(PersistenceError, match="unknown compression"):
+        restore_checkpoint(calculator, 'broken')
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, 3, 1) + b'garbage')
+    with pytest.raises(PersistenceError, match="corrupt"):
+        restore_checkpoint(calculator, 'broken')
+
+def test_restore_is_lazy(calculator, monkeypatch):
+    """Tests that restoring decodes no entries until they are accessed."""
+    for i in range(1000):
+        calculator.execute_command(ArithmeticCalculation(Decimal(i), Decimal('1.5'), OperationFactory.get_operation('multiply')))
+    save_checkpoint(calculator, 'big')
+    decoded = []
+    original = SnapshotStack._memento
+    monkeypatch.setattr(SnapshotStack, '_memento', lambda self, index: decoded.append(index) or original(self, index))
+    restored = Calculator()
+    restore_checkpoint(restored, 'big')
+    assert decoded == []
+    assert restored.history_size() == 1003
+    assert restored.get_current_value() == Decimal('1498.5')
+    restored.undo()
+    assert restored.get_current_value() == Decimal('1497.0')
+    assert len(decoded) < 5
+    expected = [m.get_state_value() for m in calculator.get_history()[1:3]]
+    assert [m.get_state_value() for m in restored.iter_history(1, 3)] == expected
+    restored.redo()
+    restored.execute_command(ArithmeticCalculation(Decimal('1'), Decimal('1'), OperationFactory.get_operation('add')))
+    assert restored.get_history()[-1].get_state_value() == Decimal('2')
+    assert _describe(restored.get_history()[:-1]) == _describe(calculator.get_history())
+    restored.clear_history()
+    assert restored.history_size() == 1
+
+def test_restore_never_unpickles(calculator):
+    """Tests that pickled (v1) and JSON (v2) payloads are rejected instead of loaded."""
+    path = save_checkpoint(calculator, 'old')
+    for version in (1, 2):
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, version, 0) + pickle.dumps({'operations': []}))
+        with pytest.raises(PersistenceError, match=f"schema v{version}"):
+            restore_checkpoint(calculator, 'old')
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, 3, 0) + pickle.dumps({'operations': []}))
+    with pytest.raises(PersistenceError, match="corrupt"):
+        restore_checkpoint(calculator, 'old')
+
+def _tamper_manifest(change):
+    def tamper(manifest, columns):
+        change(manifest)
+        return manifest, columns
+    return tamper
+
+@pytest.mark.parametrize("tamper", [
+    _tamper_manifest(lambda m: m['undo'].__setitem__('size', m['undo']['size'] + 1)),
+    _tamper_manifest(lambda m: m['undo'].__setitem__('size', -1)),
+    _tamper_manifest(lambda m: m['undo']['reductions'].append(-1)),
+    _tamper_manifest(lambda m: m['undo']['state'].__setitem__('99', '1')),
+    _tamper_manifest(lambda m: m['undo']['no_result'].append(1)),
+    _tamper_manifest(lambda m: m.pop('redo')),
+    lambda m, columns: (m, b'\x7f' + columns[1:]),
+    lambda m, columns: (m, columns[:-1]),
+    lambda m, columns: (m, columns + b'0'),
+])
+def test_restore_rejects_inconsistent_payload(calculator, tamper):
+    """Tests that a well-formed but inconsistent payload is reported as corrupt."""
+    path = save_checkpoint(calculator, 'tampered')
+    with open(path, 'rb') as f:
+        header, data = f.read(HEADER.size), f.read()
+    (length,) = MANIFEST_LENGTH.unpack_from(data)
+    manifest = json.loads(data[MANIFEST_LENGTH.size:MANIFEST_LENGTH.size + length])
+    manifest, columns = tamper(manifest, data[MANIFEST_LENGTH.size + length:])
+    encoded = json.dumps(manifest).encode()
+    with open(path, 'wb') as f:
+        f.write(header + MANIFEST_LENGTH.pack(len(encoded)) + encoded + columns)
+    with pytest.raises(PersistenceError, match="corrupt"):
+        restore_checkpoint(Calculator(), 'tampered')
+
+def test_corrupt_entry_is_reported_on_access():
+    """Tests that a malformed decimal inside a column fails when its entry is decoded."""
+    calc = Calculator()
+    calc.execute_command(ArithmeticCalculation(Decimal('12'), Decimal('3'), OperationFactory.get_operation('add')))
+    path = save_checkpoint(calc, 'entry')
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data.replace(b'012', b'0x2', 1))
+    restored = Calculator()
+    restore_checkpoint(restored, 'entry')
+    with pytest.raises(PersistenceError, match="entry 1 is corrupt"):
+        restored.get_history()
+
+def test_unknown_compression_and_operation(calculator):
+    """Tests invalid codecs and snapshots referencing unknown operations."""
+    with pytest.raises(PersistenceError, match="Unknown snapshot compression"):
+        save_checkpoint(calculator, 'x', 'brotli')
+
+    calculator.execute_command(ArithmeticCalculation(Decimal('1'), Decimal('1'), lambda a, b: a))
+    save_checkpoint(calculator, 'custom')
+    with pytest.raises(PersistenceError, match="unknown operation"):
+        restore_checkpoint(Calculator(), 'custom')
+
+def test_restore_state_requires_initial_entry():
+    """Tests that Calculator.restore_state rejects an empty undo stack."""
+    with pytest.raises(InsufficientHistoryError):
+        Calculator().restore_state(Decimal('0'), [], [])
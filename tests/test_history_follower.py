@@ -0,0 +1,131 @@
+# tests/test_history_follower.py
+
+import os
+import pytest
+from decimal import Decimal
+from app.calculation import ArithmeticCalculation
+from app.calculator_config import CalculatorConfig
+from app.history import AutoSaveObserver
+from app.history_follower import HistoryFollower, OperationStats
+from app.operations import Operations
+
+pytestmark = pytest.mark.usefixtures('history_dir')
+
+def _save(observer, a, b, operation=Operations.add):
+    calc = ArithmeticCalculation(Decimal(a), Decimal(b), operation)
+    calc.perform()
+    observer.update(calc)
+
+# --- Polling ---
+
+def test_poll_reads_only_new_rows():
+    """Tests that each poll returns the rows appended since the previous one."""
+    follower = HistoryFollower()
+    assert follower.poll() == []
+    observer = AutoSaveObserver()
+    _save(observer, '1', '2')
+    _save(observer, '3', '4', Operations.multiply)
+    rows = follower.poll()
+    assert [(op, a, b, result) for _, op, a, b, result in rows] == [
+        ('add', 1, 2, 3), ('multiply', 3, 4, 12)]
+    assert follower.poll() == []
+    _save(observer, '5', '5')
+    assert [row[4] for row in follower.poll()] == [Decimal('10')]
+    assert follower.offset == os.path.getsize(follower.path)
+    assert follower.rows == 3
+
+def test_from_end_skips_existing_rows():
+    """Tests that a follower started at the end only sees later rows."""
+    observer = AutoSaveObserver()
+    _save(observer, '1', '1')
+    follower = HistoryFollower(from_end=True)
+    assert follower.poll() == []
+    _save(observer, '2', '2')
+    assert [row[4] for row in follower.poll()] == [Decimal('4')]
+
+def test_partial_line_waits_until_complete():
+    """Tests that a trailing line without its newline is read once it is complete."""
+    observer = AutoSaveObserver()
+    _save(observer, '1', '1')
+    with open(observer.history_file_path, 'ab') as f:
+        f.write(b'2024-05-01T12:00:00,add,2,')
+    follower = HistoryFollower()
+    assert len(follower.poll()) == 1
+    with open(observer.history_file_path, 'ab') as f:
+        f.write(b'3,5\n')
+    assert [row[4] for row in follower.poll()] == [Decimal('5')]
+
+def test_truncation_restarts_from_beginning():
+    """Tests that a truncated file is read again from its start."""
+    observer = AutoSaveObserver()
+    for i in range(3):
+        _save(observer, str(i), '1')
+    follower = HistoryFollower()
+    assert len(follower.poll()) == 3
+    open(observer.history_file_path, 'w').close()
+    _save(observer, '7', '1')
+    assert [row[4] for row in follower.poll()] == [Decimal('8')]
+
+def test_rotation_drains_old_file_then_follows_new_one():
+    """Tests that unread rows of a rotated file are not lost."""
+    observer = AutoSaveObserver()
+    _save(observer, '1', '1')
+    follower = HistoryFollower()
+    assert len(follower.poll()) == 1
+    _save(observer, '2', '1')
+    os.rename(observer.history_file_path, observer.history_file_path + '.1')
+    assert [row[4] for row in follower.poll()] == [Decimal('3')]
+    _save(observer, '3', '1')
+    assert [row[4] for row in follower.poll()] == [Decimal('4')]
+    follower.close()
+
+def test_malformed_rows_are_skipped():
+    """Tests that bad lines are counted and skipped without stopping the follower."""
+    path = os.path.join(CalculatorConfig.HISTORY_DIR, 'calculations.csv')
+    with open(path, 'w') as f:
+        f.write("timestamp,operation,operand_a,operand_b,result\n"
+                "2024-05-01T12:00:00,add,1\n"
+                "yesterday,add,1,1,2\n"
+                "2024-05-01T12:00:00,add,x,1,2\n"
+                "2024-05-01T12:00:00,add,1,1,2\n")
+    follower = HistoryFollower()
+    assert len(follower.poll()) == 1
+    assert follower.skipped == 3
+
+# --- Aggregates ---
+
+def test_running_aggregates_per_operation():
+    """Tests the per-operation count, total, minimum, maximum and last result."""
+    observer = AutoSaveObserver()
+    follower = HistoryFollower()
+    for a in ('5', '-2', '10'):
+        _save(observer, a, '0')
+    _save(observer, '2', '3', Operations.multiply)
+    follower.poll()
+    stats = follower.stats['add']
+    assert (stats.count, stats.total, stats.minimum, stats.maximum, stats.last) == (3, 13, -2, 10, 10)
+    assert follower.stats['multiply'].count == 1
+
+def test_stats_ignore_non_finite_results():
+    """Tests that NaN results are counted but not aggregated."""
+    stats = OperationStats()
+    stats.update(Decimal('2'))
+    stats.update(Decimal('NaN'))
+    assert stats.count == 2
+    assert (stats.total, stats.minimum, stats.maximum) == (2, 2, 2)
+    assert stats.last.is_nan()
+    assert 'count=2' in repr(stats)
+
+def test_follow_yields_rows_and_sleeps_when_idle(monkeypatch):
+    """Tests that follow() sleeps only when a poll finds nothing new."""
+    observer = AutoSaveObserver()
+    follower = HistoryFollower()
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        _save(observer, '1', '1')
+    monkeypatch.setattr('app.history_follower.time.sleep', sleep)
+    stream = follower.follow(interval=0.5)
+    assert next(stream)[4] == Decimal('2')
+    assert sleeps == [0.5]
@@ -0,0 +1,100 @@
+# tests/test_jobs.py
+
+import os
+import signal
+import time
+import pytest
+from decimal import Decimal
+from app.calculation import ArithmeticCalculation
+from app.calculator import Calculator
+from app.exceptions import CalculatorError
+from app.jobs import Job, JobManager, worth_a_worker
+from app.operations import Operations
+
+def slow_identity(a: Decimal, b: Decimal) -> Decimal:
+    """A picklable operation that sleeps for `a` seconds and returns `b`."""
+    time.sleep(float(a))
+    return b
+
+@pytest.fixture
+def manager():
+    """Provides a JobManager bound to a fresh Calculator, cancelling leftovers."""
+    manager = JobManager(Calculator())
+    yield manager
+    manager.cancel_all()
+
+def _submit(manager, a, b, operation, command='power'):
+    return manager.submit(command, ArithmeticCalculation(Decimal(a), Decimal(b), operation))
+
+def test_job_runs_and_commits(manager):
+    """Tests that a finished job is committed to the calculator and its history."""
+    job = _submit(manager, '2', '10', Operations.power)
+    assert manager.wait(job.id, timeout=10).status == Job.DONE
+    assert manager.commit_ready() == [job]
+    assert job.status == Job.COMMITTED
+    assert manager.calculator.get_current_value() == Decimal('1024')
+    assert manager.calculator.get_history()[-1].get_last_command() is job.calculation
+    assert job.describe() == 'power 2 10'
+    assert job.elapsed >= 0
+
+def test_jobs_commit_in_submission_order(manager):
+    """Tests that a fast job waits for a slower job submitted before it."""
+    slow = _submit(manager, '0.5', '1', slow_identity, 'slow')
+    fast = _submit(manager, '0', '2', slow_identity, 'fast')
+    manager.wait(fast.id, timeout=10)
+    assert fast.status == Job.DONE
+    assert manager.commit_ready() == []
+    manager.wait(slow.id, timeout=10)
+    assert manager.commit_ready() == [slow, fast]
+    history = manager.calculator.get_history()
+    assert [m.get_state_value() for m in history[1:]] == [Decimal('1'), Decimal('2')]
+    assert manager.calculator.get_current_value() == Decimal('2')
+
+def test_cancel_running_job(manager):
+    """Tests that a running job can be cancelled and is never committed."""
+    job = _submit(manager, '30', '1', slow_identity, 'slow')
+    assert manager.wait(job.id, timeout=0.05).status == Job.RUNNING
+    manager.cancel(job.id)
+    assert job.status == Job.CANCELLED
+    assert manager.commit_ready() == [job]
+    assert manager.calculator.get_current_value() == Decimal('0')
+    with pytest.raises(CalculatorError, match="already cancelled"):
+        manager.cancel(job.id)
+
+def test_ctrl_c_does_not_kill_job(manager):
+    """Tests that SIGINT (Ctrl-C at the prompt) reaches the worker without stopping it."""
+    job = _submit(manager, '0.5', '7', slow_identity, 'slow')
+    time.sleep(0.2)
+    os.kill(job._process.pid, signal.SIGINT)
+    assert manager.wait(job.id, timeout=10).status == Job.DONE
+    assert job.calculation.result == Decimal('7')
+
+def test_failed_job_is_reported(manager):
+    """Tests that an operation error in the worker marks the job as failed."""
+    job = _submit(manager, '8', '0', Operations.root, 'root')
+    manager.wait(job.id, timeout=10)
+    assert job.status == Job.FAILED
+    assert "undefined" in job.error
+    assert manager.commit_ready() == [job]
+    assert len(manager.calculator.get_history()) == 1
+
+def test_worth_a_worker_estimates_cost(monkeypatch):
+    """Tests that only fractional powers and roots at high precision go to a worker."""
+    from app.calculator_config import CalculatorConfig
+    monkeypatch.setattr(CalculatorConfig, 'JOB_MIN_PRECISION', 500)
+    def calc(a, b, operation):
+        return ArithmeticCalculation(Decimal(a), Decimal(b), operation)
+    assert not worth_a_worker(calc('2', '3', Operations.power))
+    assert not worth_a_worker(calc('2', '0.5', Operations.power))
+    assert not worth_a_worker(calc('2', '10', Operations.power), precision=5000)
+    assert worth_a_worker(calc('2', '0.5', Operations.power), precision=500)
+    assert worth_a_worker(calc('2', '3', Operations.root), precision=1000)
+    assert not worth_a_worker(calc('2', '1', Operations.root), precision=1000)
+    assert not worth_a_worker(calc('2', '0', Operations.root), precision=1000)
+    assert worth_a_worker(calc('1', '2', Operations.add))
+
+def test_unknown_job(manager):
+    """Tests that unknown job ids raise CalculatorError."""
+    with pytest.raises(CalculatorError):
+        manager.wait(42)
+    assert manager.jobs() == []
@@ -0,0 +1,128 @@
+# tests/test_macros.py
+
+import json
+import pytest
+from decimal import Decimal
+from app.macros import MacroRegistry
+from app.exceptions import ValidationError, DivisionByZeroError
+
+@pytest.fixture
+def registry(tmp_path):
+    """Provides a macro registry persisting to a temporary file."""
+    return MacroRegistry(str(tmp_path / 'macros.json'), reserved={'history', 'exit'})
+
+def test_define_and_call_macro(registry):
+    """Tests that a nested formula is compiled and evaluated correctly."""
+    macro = registry.define("margin(p, c) = percent (subtract p c) p")
+    assert macro.name == 'margin'
+    assert macro.params == ('p', 'c')
+    assert macro.definition == "margin(p, c) = percent (subtract p c) p"
+    assert macro(Decimal('100'), Decimal('60')) == Decimal('40')
+    assert macro.function.__name__ == 'margin'
+
+def test_macro_with_constants_and_nested_macros(registry):
+    """Tests literals in bodies and macros calling earlier macros."""
+    registry.define("double(x) = multiply x 2")
+    quad = registry.define("quad(x) = double (double x)")
+    assert quad(Decimal('3')) == Decimal('12')
+    offset = registry.define("offset(a, b) = add (double a) -1.5")
+    assert offset(Decimal('2'), Decimal('0')) == Decimal('2.5')
+
+def test_macro_errors_at_call_time(registry):
+    """Tests argument-count checks and propagation of operation errors."""
+    macro = registry.define("ratio(a, b) = divide a b")
+    with pytest.raises(ValidationError, match="expects 2 argument"):
+        macro(Decimal('1'))
+    with pytest.raises(DivisionByZeroError):
+        macro(Decimal('1'), Decimal('0'))
+
+@pytest.mark.parametrize("definition", [
+    "add(x) = x",                         # shadows an operation
+    "history(x) = x",                     # shadows a reserved command
+    "f x = x",                            # missing parentheses
+    "f(x y) = x",                         # missing comma
+    "f(x, x) = x",                        # duplicate parameter
+    "f(x) x",                             # missing '='
+    "f(x) = ",                            # empty body
+    "f(x) = unknown x 1",                 # unknown name
+    "f(x) = add x",                       # too few arguments
+    "f(x) = add x 1 2",                   # trailing tokens
+    "f(x) = (add x 1",                    # unbalanced parentheses
+    "f(x) = add x 1..2",                  # invalid number
+    "f(add) = 1",                         # parameter shadows an operation
+    "f(x = x",                            # missing ')'
+])
+def test_invalid_definitions(registry, definition):
+    """Tests that malformed definitions are rejected when defined."""
+    with pytest.raises(ValidationError):
+        registry.define(definition)
+
+def test_macros_persist_and_reload(registry):
+    """Tests that definitions are saved and recompiled by a fresh registry."""
+    registry.define("double(x) = multiply x 2")
+    registry.define("quad(x) = double (double x)")
+    with open(registry.file_path) as f:
+        assert json.load(f) == ["double(x) = multiply x 2", "quad(x) = double (double x)"]
+
+    reloaded = MacroRegistry(registry.file_path)
+    assert reloaded.load() == 2
+    assert reloaded.get('quad')(Decimal('5')) == Decimal('20')
+    assert [m.name for m in reloaded.macros()] == ['double', 'quad']
+
+def test_remove_and_load_skips_invalid(registry):
+    """Tests removal, unknown lookups and skipping of corrupt stored entries."""
+    registry.define("double(x) = multiply x 2")
+    registry.remove('double')
+    assert 'double' not in registry
+    with pytest.raises(ValidationError):
+        registry.get('double')
+
+    with open(registry.file_path, 'w') as f:
+        json.dump(["broken(x) = nope x", "ok(x) = add x 1"], f)
+    reloaded = MacroRegistry(registry.file_path)
+    assert reloaded.load() == 1
+    assert 'ok' in reloaded
+
+def test_load_without_file(tmp_path):
+    """Tests that loading a missing macro file is a no-op."""
+    assert MacroRegistry(str(tmp_path / 'missing.json')).load() == 0
+
+# --- Redefinition and dependencies ---
+
+def test_redefinition_recompiles_dependents(registry):
+    """Tests that a redefined macro is used by its callers now and after a reload."""
+    registry.define("double(x) = multiply x 2")
+    registry.define("quad(x) = double (double x)")
+    registry.define("triple(x) = multiply x 3")
+    registry.define("double(x) = add x 1")
+    assert registry.get('quad')(Decimal('1')) == Decimal('3')
+    assert [m.name for m in registry.macros()] == ['triple', 'double', 'quad']
+
+    reloaded = MacroRegistry(registry.file_path)
+    assert reloaded.load() == 3
+    assert reloaded.get('quad')(Decimal('1')) == Decimal('3')
+
+def test_redefinition_that_breaks_or_loops_is_rejected(registry):
+    """Tests that arity changes and cycles through dependents leave the macros unchanged."""
+    registry.define("double(x) = multiply x 2")
+    registry.define("quad(x) = double (double x)")
+    with pytest.raises(ValidationError, match="would break macro 'quad'"):
+        registry.define("double(x, y) = multiply x y")
+    with pytest.raises(ValidationError, match="call 'double' back"):
+        registry.define("double(x) = quad x")
+    with pytest.raises(ValidationError, match="call 'double' back"):
+        registry.define("double(x) = add (double x) 1")
+    assert registry.get('quad')(Decimal('1')) == Decimal('4')
+    assert registry.get('double').arity == 1
+
+def test_remove_macro_in_use_is_rejected(registry):
+    """Tests that a macro cannot be removed while other macros call it."""
+    registry.define("double(x) = multiply x 2")
+    registry.define("quad(x) = double (double x)")
+    registry.define("octo(x) = quad (double x)")
+    with pytest.raises(ValidationError, match="used by quad, octo"):
+        registry.remove('double')
+    registry.remove('octo')
+    registry.remove('quad')
+    registry.remove('double')
+    assert MacroRegistry(registry.file_path).load() == 0
@@ -0,0 +1,185 @@
+# tests/test_main.py
+
+import pytest
+from decimal import Decimal, getcontext, localcontext
+import main
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.history import AutoSaveObserver
+
+pytestmark = pytest.mark.usefixtures('history_dir')
+
+@pytest.fixture
+def cli():
+    """A REPL bound to a fresh Calculator."""
+    return main.Cli(Calculator())
+
+def run(cli, capsys, line):
+    """Dispatches one input line and returns what it printed."""
+    cli.dispatch(line)
+    return capsys.readouterr().out
+
+# --- Dispatch ---
+
+def test_arguments_keep_their_case(cli, capsys, tmp_path):
+    """Tests that only the command is lowercased, so mixed-case operand files are found."""
+    folder = tmp_path / 'Data'
+    folder.mkdir()
+    (folder / 'Nums.txt').write_text("1, 2\n3")
+    assert "Result: 6" in run(cli, capsys, f"SUM @{folder / 'Nums.txt'}")
+    assert cli.calculator.get_current_value() == Decimal('6')
+    assert "not found" in run(cli, capsys, f"sum @{tmp_path / 'data' / 'nums.txt'}")
+
+def test_names_stay_case_insensitive(cli, capsys):
+    """Tests that register names and subcommands still ignore case."""
+    assert "x = 3" in run(cli, capsys, "LET X = ADD 1 2")
+    assert "x = 3" in run(cli, capsys, "Registers")
+    assert "Metrics reset." in run(cli, capsys, "metrics RESET")
+
+# --- History paging ---
+
+def _calculations(cli, count):
+    for i in range(1, count + 1):
+        cli.dispatch(f"add {i} 0")
+
+def test_history_pages(cli, capsys):
+    """Tests the default last page, --page with --size, and the page footer."""
+    _calculations(cli, 5)
+    capsys.readouterr()
+    assert "1. Add(1, 0) = 1" in run(cli, capsys, "history")
+    output = run(cli, capsys, "history --page 2 --size 2")
+    assert "3. Add(3, 0) = 3\n4. Add(4, 0) = 4\n---" in output
+    assert "Page 2/3 (entries 3-4 of 5)" in output
+    output = run(cli, capsys, "history --size 2 --page 3")
+    assert "5. Add(5, 0) = 5" in output and "4. Add" not in output
+    assert "Page 3/3 (entries 5-5 of 5)" in output
+
+def test_history_last(cli, capsys):
+    """Tests --last, including a count larger than the history."""
+    _calculations(cli, 5)
+    capsys.readouterr()
+    output = run(cli, capsys, "history --last 2")
+    assert "4. Add(4, 0) = 4\n5. Add(5, 0) = 5" in output and "3. Add" not in output
+    assert "Showing the last 2 of 5 entries." in output
+    output = run(cli, capsys, "history --last 10")
+    assert "1. Add(1, 0) = 1" in output and "Showing the last" not in output
+
+def test_history_out_of_range_and_empty(cli, capsys):
+    """Tests a page past the end and an empty history."""
+    assert "No calculations in history yet." in run(cli, capsys, "history --page 1")
+    _calculations(cli, 3)
+    capsys.readouterr()
+    assert "Page 3 does not exist; the history has 2 page(s) of 2." in run(cli, capsys, "history --page 3 --size 2")
+
+@pytest.mark.parametrize('line, error', [
+    ("history --page 0", "--page must be a positive integer, got '0'"),
+    ("history --size -2", "--size must be a positive integer, got '-2'"),
+    ("history --last many", "--last must be a positive integer, got 'many'"),
+    ("history --page", "Option '--page' requires a value"),
+    ("history --from 1", "Unknown option '--from'"),
+    ("history pager --page 3", "Usage: history"),
+    ("history --last 5 --size 2", "Usage: history"),
+    ("history --last 5 --page 2", "Usage: history"),
+    ("history --last 5 pager", "Usage: history"),
+    ("history all", "Usage: history"),
+])
+def test_history_rejects_invalid_options(cli, capsys, line, error):
+    """Tests invalid values and option combinations that would otherwise be ignored."""
+    cli.dispatch("add 1 2")
+    capsys.readouterr()
+    output = run(cli, capsys, line)
+    assert error in output and "Calculation History" not in output
+
+def test_history_pager(cli, capsys, monkeypatch):
+    """Tests paging forward, back and quitting, and the end of input."""
+    _calculations(cli, 5)
+    capsys.readouterr()
+    answers = iter(['', 'b', '', '', ''])
+    monkeypatch.setattr('builtins.input', lambda prompt: next(answers))
+    output = run(cli, capsys, "history PAGER --size 2")
+    shown = [line.split('.')[0] for line in output.splitlines() if '. Add' in line]
+    # Pages 1, 2, back to 1, then 2 and 3; Enter on the last page leaves the pager.
+    assert shown == ['1', '2', '3', '4', '1', '2', '3', '4', '5']
+    assert next(answers, None) is None
+
+    answers = iter(['q'])
+    assert run(cli, capsys, "history pager --size 2").count("--- Calculation History ---") == 1
+
+    def interrupted(prompt):
+        raise EOFError
+    monkeypatch.setattr('builtins.input', interrupted)
+    assert run(cli, capsys, "history pager --size 2").count("--- Calculation History ---") == 1
+    assert run(cli, capsys, "history pager --size 10").count("--- Calculation History ---") == 1
+
+# --- Macros ---
+
+def test_macro_call_is_recorded_like_a_builtin(cli, capsys):
+    """Tests that a macro call updates the value, history, undo and autosave."""
+    cli.calculator.register_observer(AutoSaveObserver())
+    run(cli, capsys, "def margin(p, c) = percent (subtract p c) p")
+    run(cli, capsys, "add 1 2")
+    assert "Result: 40" in run(cli, capsys, "margin 100 60")
+    assert cli.calculator.get_current_value() == Decimal('40')
+    assert "2. Margin(100, 60) = 40" in run(cli, capsys, "history")
+    assert "expects 2 argument(s)" in run(cli, capsys, "margin 1")
+    assert cli.calculator.history_size() == 3
+    assert "Current value: 3" in run(cli, capsys, "undo")
+    run(cli, capsys, "redo")
+
+    assert "Exported 2 calculations" in run(cli, capsys, "export")
+    assert "Margin(100, 60) = 40\n--------------------------\n1 calculation(s)" in run(cli, capsys, "query --op margin")
+    assert "successfully loaded" in run(cli, capsys, "load")
+    command = cli.calculator.get_history()[-1].get_last_command()
+    assert (command.operation.__name__, command.a, command.b, command.result) == ('margin', 100, 60, 40)
+
+    run(cli, capsys, "save s")
+    restored = main.Cli(Calculator())
+    assert "restored" in run(restored, capsys, "restore s")
+    assert restored.calculator.get_current_value() == Decimal('40')
+
+# --- Precision and background jobs ---
+
+@pytest.fixture
+def session_precision():
+    """Restores the decimal precision changed by the 'precision' command."""
+    with localcontext():
+        yield
+
+def test_precision_command(cli, capsys, session_precision):
+    """Tests showing, setting and rejecting the session precision."""
+    assert f"Precision: {getcontext().prec} significant" in run(cli, capsys, "precision")
+    assert "set to 40" in run(cli, capsys, "precision 40")
+    run(cli, capsys, "divide 1 3")
+    assert len(str(cli.calculator.get_current_value())) == 42
+    for bad in ("precision 0", "precision many", "precision 1 2"):
+        assert "Usage: precision" in run(cli, capsys, bad)
+    assert getcontext().prec == 40
+
+def test_high_precision_root_runs_as_job(cli, capsys, session_precision, monkeypatch):
+    """Tests a job end to end: submitted by dispatch, listed, cancelled or waited for, and committed."""
+    monkeypatch.setattr(CalculatorConfig, 'JOB_INLINE_TIMEOUT', 0)
+    assert "background jobs" in run(cli, capsys, "precision 2000")
+    assert "Result: 1024" in run(cli, capsys, "power 2 10")
+    assert "Running in background as job #1" in run(cli, capsys, "root 2 3")
+    assert "Running in background as job #2" in run(cli, capsys, "root 3 7")
+    assert "#1    running" in run(cli, capsys, "jobs")
+    assert "Job #2 cancelled." in run(cli, capsys, "cancel 2")
+    assert "Job #1 (root 2 3) committed. Result: 1.2599210498948731647" in run(cli, capsys, "wait 1")
+    value = cli.calculator.get_current_value()
+    assert len(value.as_tuple().digits) == 2000
+    assert cli.calculator.history_size() == 3
+    output = run(cli, capsys, "jobs")
+    assert "#1    committed" in output and "#2    cancelled" in output
+
+# --- Stored history ---
+
+def test_filtered_reads_follow_the_live_csv(cli, capsys):
+    """Tests that query and filtered load in CSV mode never read a stale export."""
+    cli.calculator.register_observer(AutoSaveObserver())
+    run(cli, capsys, "add 1 2")
+    run(cli, capsys, "export")
+    run(cli, capsys, "multiply 3 4")
+    assert "2 calculation(s)" in run(cli, capsys, "query")
+    run(cli, capsys, "add 5 5")
+    assert "Loaded 2 calculations" in run(cli, capsys, "load --op add")
+    assert [m.get_state_value() for m in cli.calculator.get_history()] == [0, 3, 10]
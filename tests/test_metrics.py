@@ -0,0 +1,91 @@
+# tests/test_metrics.py
+
+import pytest
+from decimal import Decimal
+from app.metrics import (
+    LatencyHistogram, MetricsRegistry, PrometheusFileExporter,
+    _bucket_index, _bucket_upper_bound
+)
+from app.calculation import ArithmeticCalculation
+from app.calculator import Calculator
+from app.operations import OperationFactory
+from app.metrics import METRICS
+
+# --- Tests for LatencyHistogram ---
+
+@pytest.mark.parametrize("value", [0, 1, 31, 32, 33, 1000, 123456, 10**9 + 7])
+def test_bucket_bounds_contain_value(value):
+    """Tests that every value falls inside its bucket with bounded relative error."""
+    upper = _bucket_upper_bound(_bucket_index(value))
+    assert upper >= value
+    assert upper - value <= max(1, value // 16)
+
+def test_histogram_statistics():
+    """Tests count, min, max, mean and percentiles of a histogram."""
+    hist = LatencyHistogram()
+    for value in range(1, 101):
+        hist.record(value * 1000)
+    assert hist.count == 100
+    assert hist.min == 1000
+    assert hist.max == 100000
+    assert hist.mean() == pytest.approx(50500)
+    assert hist.percentile(50) == pytest.approx(50000, rel=0.07)
+    assert hist.percentile(99) == pytest.approx(99000, rel=0.07)
+    assert hist.percentile(100) == 100000
+
+def test_empty_histogram():
+    """Tests that an empty histogram reports zeros."""
+    hist = LatencyHistogram()
+    assert hist.mean() == 0.0
+    assert hist.percentile(99) == 0
+
+# --- Tests for MetricsRegistry ---
+
+def test_registry_timer_records_samples():
+    """Tests that the timer context manager records into the right histogram."""
+    registry = MetricsRegistry()
+    with registry.timer('perform', 'add'):
+        pass
+    with registry.timer('perform', 'add'):
+        pass
+    assert registry.histogram('perform', 'add').count == 2
+    assert "perform" in registry.render()
+    registry.reset()
+    assert registry.render() == "No metrics recorded yet."
+
+def test_disabled_registry_records_nothing():
+    """Tests that a disabled registry uses a no-op timer."""
+    registry = MetricsRegistry(enabled=False)
+    with registry.timer('perform', 'add'):
+        pass
+    assert registry.snapshot() == []
+
+def test_prometheus_format():
+    """Tests the Prometheus text exposition output."""
+    registry = MetricsRegistry()
+    registry.histogram('validate', 'add').record(2000)
+    text = registry.to_prometheus()
+    assert "# TYPE calculator_stage_latency_seconds summary" in text
+    assert 'calculator_stage_latency_seconds{stage="validate",operation="add",quantile="0.5"}' in text
+    assert 'calculator_stage_latency_seconds_count{stage="validate",operation="add"} 1' in text
+
+def test_prometheus_file_exporter(tmp_path):
+    """Tests that the exporter writes the file periodically and on stop."""
+    registry = MetricsRegistry()
+    registry.histogram('perform', 'add').record(5000)
+    file_path = str(tmp_path / 'metrics' / 'calculator.prom')
+    exporter = PrometheusFileExporter(registry, file_path, interval=0.01)
+    exporter.start()
+    exporter.stop()
+    with open(file_path) as f:
+        assert 'stage="perform"' in f.read()
+
+def test_calculation_is_instrumented():
+    """Tests that executing a calculation records perform and notify samples."""
+    if not METRICS.enabled:
+        pytest.skip("Metrics are disabled.") # pragma: no cover
+    before = METRICS.histogram('perform', 'add').count
+    calc = ArithmeticCalculation(Decimal('1'), Decimal('2'), OperationFactory.get_operation('add'))
+    Calculator().execute_command(calc)
+    assert METRICS.histogram('perform', 'add').count == before + 1
+    assert METRICS.histogram('notify', 'add').count >= 1
@@ -89,4 +89,40 @@ def test_validate_invalid_operands_raises_error():
         InputValidator.validate_operand("")
         
     with pytest.raises(InvalidInputError, match="Invalid input: '1 2' is not a valid number."):
-        InputValidator.validate_operand("1 2")
\ No newline at end of file
+        InputValidator.validate_operand("1 2")
+# --- Tests for bulk validation ---
+
+def test_validate_many_matches_validate_operand(monkeypatch):
+    """Tests that bulk validation accepts and rejects exactly what validate_operand does."""
+    import app.input_validators as validators
+    from app.calculator_config import CalculatorConfig
+    monkeypatch.setattr(validators, 'BULK_CHUNK_SIZE', 4)
+    monkeypatch.setattr(CalculatorConfig, 'MAX_INPUT_VALUE', Decimal('1e9'))
+    values = ["1", "-2.5", "1e3", " 7 ", "abc", "", "2e9", "NaN", "0.001", "-Infinity", "1_000"]
+    result = InputValidator.validate_many(values)
+    for value, converted, ok in zip(values, result.values, result.mask):
+        try:
+            expected = InputValidator.validate_operand(value)
+        except InvalidInputError:
+            assert not ok and converted is None
+        else:
+            assert ok and converted == expected
+    assert [position for position, _ in result.errors] == [4, 5, 6, 7, 9]
+    assert result.errors[0][1] == "Invalid input: 'abc' is not a valid number."
+    assert "exceeds maximum" in result.errors[2][1]
+    assert result.valid_values() == [Decimal("1"), Decimal("-2.5"), Decimal("1e3"), Decimal("7"), Decimal("0.001"), Decimal("1000")]
+
+def test_validate_many_all_valid():
+    """Tests the fast path and the summary of a failed result."""
+    values = [str(i) for i in range(3000)]
+    result = InputValidator.validate_many(values)
+    assert result.valid and all(result.mask)
+    assert result.valid_values() is result.values
+    assert result.values[-1] == Decimal(2999)
+    assert InputValidator.validate_many([]).valid
+
+    failed = InputValidator.validate_many(["x", "1", "y", "z", "w"])
+    assert failed.summary(limit=2) == (
+        "4 of 5 values are invalid: #1: Invalid input: 'x' is not a valid number; "
+        "#3: Invalid input: 'y' is not a valid number (and 2 more)."
+    )
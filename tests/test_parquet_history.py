@@ -0,0 +1,245 @@
+# tests/test_parquet_history.py
+
+import os
+import pytest
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app.calculation import ArithmeticCalculation
+from app.calculator_config import CalculatorConfig
+from app.exceptions import PersistenceError
+from app.history import AutoSaveObserver
+from app.operations import Operations
+from app.parquet_history import (
+    ParquetAutoSaveObserver, export_csv, export_history, parquet_export_path,
+    parquet_history_path, parquet_parts_dir, read_history, refresh_export, write_history
+)
+
+START = datetime(2024, 5, 1, 12, 0, 0)
+
+pytestmark = pytest.mark.usefixtures('history_dir')
+
+def _rows(count, start=START):
+    """One row per minute, alternating add and multiply."""
+    return [
+        (start + timedelta(minutes=i), 'add' if i % 2 == 0 else 'multiply',
+         Decimal(i), Decimal('1.25'), Decimal(i) + Decimal('1.25'))
+        for i in range(count)
+    ]
+
+# --- Writing ---
+
+def test_write_history_uses_typed_columns(tmp_path):
+    """Tests the timestamp, dictionary and exact decimal column types."""
+    path = str(tmp_path / 'h.parquet')
+    write_history(_rows(4), path)
+    schema = pq.ParquetFile(path).schema_arrow
+    assert schema.field('timestamp').type == pa.timestamp('us')
+    assert pa.types.is_dictionary(schema.field('operation').type)
+    assert schema.field('operand_a').type == pa.decimal128(1, 0)
+    assert schema.field('operand_b').type == pa.decimal128(3, 2)
+    assert schema.field('result').type == pa.decimal128(3, 2)
+
+def test_decimal_type_widens_and_falls_back_to_string(tmp_path):
+    """Tests decimal256 for wide values and strings for values no decimal type holds."""
+    path = str(tmp_path / 'h.parquet')
+    rows = [(START, 'power', Decimal('1E+50'), Decimal('1E+100'), Decimal('NaN'))]
+    write_history(rows, path)
+    schema = pq.ParquetFile(path).schema_arrow
+    assert schema.field('operand_a').type == pa.decimal256(51, 0)
+    assert schema.field('operand_b').type == pa.string()
+    assert schema.field('result').type == pa.string()
+    _, _, a, b, result = read_history(path)[0]
+    assert (a, b) == (Decimal('1E+50'), Decimal('1E+100'))
+    assert result.is_nan()
+
+def test_row_groups_have_statistics(tmp_path):
+    """Tests that each row group records min/max timestamps."""
+    path = str(tmp_path / 'h.parquet')
+    write_history(_rows(10), path, row_group_size=4)
+    metadata = pq.ParquetFile(path).metadata
+    assert metadata.num_row_groups == 3
+    statistics = metadata.row_group(1).column(0).statistics
+    assert statistics.has_min_max
+    assert statistics.min == START + timedelta(minutes=4)
+
+# --- Reading ---
+
+def test_read_history_round_trips_exact_values(tmp_path):
+    """Tests that values keep their exact decimal value and plain form."""
+    path = str(tmp_path / 'h.parquet')
+    rows = _rows(3)
+    write_history(rows, path)
+    assert read_history(path) == rows
+    assert str(read_history(path)[0][2]) == '0'
+
+    tiny = [(START, 'divide', Decimal('1'), Decimal('1E+10'), Decimal('1E-10')),
+            (START, 'add', Decimal('10.0'), Decimal('0.50'), Decimal('10.50'))]
+    write_history(tiny, path)
+    assert [tuple(str(v) for v in row[2:]) for row in read_history(path)] == [
+        ('1', '10000000000', '1E-10'), ('10', '0.5', '10.5')]
+
+def test_read_history_filters(tmp_path):
+    """Tests the time-range and operation filters."""
+    path = str(tmp_path / 'h.parquet')
+    write_history(_rows(10), path, row_group_size=2)
+    since, until = START + timedelta(minutes=3), START + timedelta(minutes=6)
+    assert [r[2] for r in read_history(path, since=since, until=until)] == [3, 4, 5, 6]
+    assert [r[2] for r in read_history(path, operations=['multiply'])] == [1, 3, 5, 7, 9]
+    assert read_history(path, since=START + timedelta(days=1)) == []
+
+def test_read_history_pushes_filters_down(tmp_path, monkeypatch):
+    """Tests that filters are pushed down to the Parquet reader."""
+    path = str(tmp_path / 'h.parquet')
+    write_history(_rows(10), path, row_group_size=2)
+    calls = []
+    original = pq.read_table
+    monkeypatch.setattr(pq, 'read_table', lambda *args, **kwargs: calls.append(kwargs) or original(*args, **kwargs))
+    read_history(path, since=START, operations=['add'])
+    assert calls[0]['filters'] == [('timestamp', '>=', START), ('operation', 'in', ['add'])]
+
+def test_read_history_merges_part_files(tmp_path):
+    """Tests that a directory of parts with different decimal types is read in time order."""
+    directory = tmp_path / 'parts'
+    write_history(_rows(2, START + timedelta(hours=1)), str(directory / 'part-b.parquet'))
+    write_history([(START, 'divide', Decimal('1'), Decimal('3'), Decimal('0.3333333333'))], str(directory / 'part-a.parquet'))
+    rows = read_history(str(directory))
+    assert [r[1] for r in rows] == ['divide', 'add', 'multiply']
+
+def test_read_history_missing(tmp_path):
+    """Tests that a missing store raises PersistenceError."""
+    with pytest.raises(PersistenceError, match="not found"):
+        read_history(str(tmp_path / 'missing.parquet'))
+
+# --- Export ---
+
+def _autosave_csv(count):
+    observer = AutoSaveObserver()
+    for i in range(count):
+        calc = ArithmeticCalculation(Decimal(i), Decimal('0.5'), Operations.add)
+        calc.perform()
+        observer.update(calc)
+    return observer.history_file_path
+
+def test_export_csv(tmp_path):
+    """Tests that the autosave CSV converts to Parquet in row groups."""
+    csv_path = _autosave_csv(5)
+    path, count = export_history()
+    assert (path, count) == (parquet_export_path(), 5)
+    assert pq.ParquetFile(path).metadata.num_row_groups == 1
+    assert export_csv(csv_path, str(tmp_path / 'small.parquet'), row_group_size=2) == 5
+    rows = read_history(str(tmp_path / 'small.parquet'))
+    assert [r[4] for r in rows] == [Decimal('0.5'), Decimal('1.5'), Decimal('2.5'), Decimal('3.5'), Decimal('4.5')]
+
+def test_refresh_export_follows_the_csv(monkeypatch):
+    """Tests that the export used for filtered reads is rewritten only when the CSV changed."""
+    assert refresh_export() == parquet_export_path()
+    assert not os.path.exists(parquet_export_path())
+    observer = AutoSaveObserver()
+    csv_path = _autosave_csv(2)
+    assert len(read_history(refresh_export())) == 2
+    exports = []
+    monkeypatch.setattr('app.parquet_history.export_csv', lambda *args: exports.append(args))
+    refresh_export()
+    assert exports == []
+    calc = ArithmeticCalculation(Decimal('7'), Decimal('1'), Operations.add)
+    calc.perform()
+    observer.update(calc)
+    os.utime(csv_path, ns=(os.stat(parquet_export_path()).st_mtime_ns + 1,) * 2)
+    refresh_export()
+    assert exports == [(csv_path, parquet_export_path())]
+
+def test_export_csv_errors(tmp_path):
+    """Tests missing, empty and malformed history files."""
+    csv_path = tmp_path / 'calculations.csv'
+    with pytest.raises(PersistenceError, match="not found"):
+        export_history()
+    csv_path.write_text("timestamp,operation,operand_a,operand_b,result\n")
+    with pytest.raises(PersistenceError, match="no calculations"):
+        export_history()
+    csv_path.write_text("timestamp,operation,operand_a,operand_b,result\n2024-05-01T12:00:00,add,x,1,2\n")
+    with pytest.raises(PersistenceError, match="Invalid number 'x' on line 2"):
+        export_history()
+    csv_path.write_text("timestamp,operation,operand_a,operand_b,result\nyesterday,add,1,1,2\n")
+    with pytest.raises(PersistenceError, match="Invalid timestamp"):
+        export_history()
+    csv_path.write_text("timestamp,operation,operand_a,operand_b,result\n2024-05-01T12:00:00,add,1\n")
+    with pytest.raises(PersistenceError, match="Malformed row"):
+        export_history()
+    csv_path.write_text("a,b\n")
+    with pytest.raises(PersistenceError, match="not a calculation history"):
+        export_history()
+    assert not os.path.exists(parquet_export_path())
+
+# --- Parquet autosave ---
+
+def test_parquet_autosave_buffers_part_files(monkeypatch):
+    """Tests that rows are written as one part file per flush_rows calculations."""
+    monkeypatch.setattr(CalculatorConfig, 'AUTO_SAVE_FORMAT', 'parquet')
+    observer = ParquetAutoSaveObserver(flush_rows=2)
+    for i in range(3):
+        calc = ArithmeticCalculation(Decimal(i), Decimal('2'), Operations.multiply)
+        calc.perform()
+        observer.update(calc)
+    assert len(os.listdir(parquet_parts_dir())) == 1
+    assert observer.pending == 1
+    assert observer.flush() is not None
+    assert observer.flush() is None
+    assert parquet_history_path() == parquet_parts_dir()
+    assert [r[4] for r in read_history(parquet_history_path())] == [0, 2, 4]
+
+    path, count = export_history()
+    assert count == 3
+    assert [r[2] for r in read_history(path)] == [0, 1, 2]
+
+def test_parquet_autosave_reads_buffered_rows_without_flushing(monkeypatch):
+    """Tests that queries see buffered rows, filtered, without writing part files."""
+    monkeypatch.setattr(CalculatorConfig, 'AUTO_SAVE_FORMAT', 'parquet')
+    observer = ParquetAutoSaveObserver(flush_rows=3)
+    for i, operation in enumerate((Operations.add, Operations.multiply, Operations.add, Operations.add)):
+        calc = ArithmeticCalculation(Decimal(i), Decimal('2'), operation)
+        calc.perform()
+        observer.update(calc)
+    assert len(os.listdir(parquet_parts_dir())) == 1
+    assert [r[2] for r in observer.read_history()] == [0, 1, 2, 3]
+    assert [r[2] for r in observer.read_history(operations=['add'])] == [0, 2, 3]
+    later = observer.read_history()[-1][0]
+    assert [r[2] for r in observer.read_history(since=later)] == [3]
+    assert observer.read_history(until=START) == []
+    assert observer.pending == 1
+    assert len(os.listdir(parquet_parts_dir())) == 1
+
+def test_export_includes_buffered_rows(monkeypatch):
+    """Tests that exporting in Parquet autosave mode includes the rows not flushed yet."""
+    monkeypatch.setattr(CalculatorConfig, 'AUTO_SAVE_FORMAT', 'parquet')
+    observer = ParquetAutoSaveObserver(flush_rows=3)
+    for i in range(4):
+        calc = ArithmeticCalculation(Decimal(i), Decimal('1'), Operations.add)
+        calc.perform()
+        observer.update(calc)
+    path, count = export_history(autosave=observer)
+    assert count == 4
+    assert [r[2] for r in read_history(path)] == [0, 1, 2, 3]
+    assert observer.pending == 1
+
+def test_parquet_autosave_keeps_rows_when_write_fails(monkeypatch):
+    """Tests that a failed flush is logged, keeps the rows buffered and is retried."""
+    observer = ParquetAutoSaveObserver(flush_rows=10)
+    calc = ArithmeticCalculation(Decimal('1'), Decimal('2'), Operations.add)
+    calc.perform()
+    observer.update(calc)
+    monkeypatch.setattr('app.parquet_history.write_history', lambda *args: (_ for _ in ()).throw(OSError("disk full")))
+    assert observer.flush() is None
+    assert observer.pending == 1
+    monkeypatch.setattr('app.parquet_history.write_history', write_history)
+    path = observer.flush()
+    assert observer.pending == 0
+    assert [r[4] for r in read_history(path)] == [Decimal('3')]
+
+def test_export_parquet_parts_empty(monkeypatch):
+    """Tests that compacting an empty parts directory raises PersistenceError."""
+    monkeypatch.setattr(CalculatorConfig, 'AUTO_SAVE_FORMAT', 'parquet')
+    ParquetAutoSaveObserver()
+    with pytest.raises(PersistenceError, match="No calculations"):
+        export_history()
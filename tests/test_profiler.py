@@ -0,0 +1,93 @@
+# tests/test_profiler.py
+
+import os
+import pytest
+from app.profiler import CommandProfiler, MemoryTracer
+from app.calculator_config import CalculatorConfig
+from app.exceptions import CalculatorError
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    """Redirects profiler output into a temporary log directory."""
+    monkeypatch.setattr(CalculatorConfig, 'LOG_DIR', str(tmp_path))
+    return tmp_path
+
+def _busy_work(n):
+    return sum(i * i for i in range(n))
+
+# --- Tests for CommandProfiler ---
+
+def test_profiler_passthrough_when_inactive():
+    """Tests that run() simply calls the function when profiling is off."""
+    profiler = CommandProfiler()
+    assert profiler.active is False
+    assert profiler.run(_busy_work, 10) == 285
+
+def test_profiler_start_dump_stop(log_dir):
+    """Tests that a profile is collected, dumped and reported."""
+    profiler = CommandProfiler()
+    profiler.start()
+    profiler.run(_busy_work, 1000)
+
+    path, report = profiler.dump(5)
+    assert os.path.exists(path) and path.endswith('.prof')
+    assert '_busy_work' in report
+    assert profiler.active is True
+
+    path, _ = profiler.stop()
+    assert os.path.exists(path)
+    assert profiler.active is False
+
+def test_profiler_can_be_stopped_from_within_run(log_dir):
+    """Tests that a profiled handler may stop the profiler itself."""
+    profiler = CommandProfiler()
+    profiler.start()
+    profiler.run(profiler.stop)
+    assert profiler.active is False
+
+def test_profiler_errors():
+    """Tests the errors for double start and dumping without a profile."""
+    profiler = CommandProfiler()
+    with pytest.raises(CalculatorError):
+        profiler.dump()
+    profiler.start()
+    with pytest.raises(CalculatorError):
+        profiler.start()
+
+# --- Tests for MemoryTracer ---
+
+def test_memory_tracer_snapshot_and_diff(log_dir):
+    """Tests snapshots are written and diffs report allocation growth."""
+    tracer = MemoryTracer()
+    tracer.start()
+    try:
+        path, stats = tracer.snapshot(3)
+        assert os.path.exists(path)
+        assert len(stats) <= 3
+        retained = [str(i) * 10 for i in range(10000)]
+        diff_path, diff = tracer.diff(5)
+        assert diff and 'test_profiler.py' in diff[0]
+        assert len(retained) == 10000
+        assert os.path.exists(diff_path) and diff_path != path
+        assert tracer._previous is not None
+        # Each diff is taken against the snapshot written by the one before.
+        second_path, _ = tracer.diff(5)
+        assert len({path, diff_path, second_path}) == 3
+    finally:
+        tracer.stop()
+    assert tracer.active is False
+    assert tracer._previous is None
+
+def test_memory_tracer_errors():
+    """Tests errors when tracing is not running or no snapshot exists."""
+    tracer = MemoryTracer()
+    with pytest.raises(CalculatorError):
+        tracer.snapshot()
+    tracer.start()
+    try:
+        with pytest.raises(CalculatorError):
+            tracer.diff()
+        with pytest.raises(CalculatorError):
+            tracer.start()
+    finally:
+        tracer.stop()
@@ -0,0 +1,74 @@
+# tests/test_reductions.py
+
+import pytest
+from decimal import Decimal, localcontext
+from app.reductions import Reductions, ReductionFactory, read_operands_file, _tree_reduce
+from app.calculation import ArithmeticCalculation, ReductionCalculation
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.exceptions import ValidationError
+
+VALUES = [Decimal(v) for v in ('1', '2.5', '-4', '10', '0.5')]
+
+@pytest.mark.parametrize("name, expected", [
+    ('sum', Decimal('10')),
+    ('product', Decimal('-50')),
+    ('min', Decimal('-4')),
+    ('max', Decimal('10')),
+    ('mean', Decimal('2')),
+])
+def test_reductions(name, expected):
+    """Tests every reduction through the factory."""
+    assert ReductionFactory.get_reduction(name)(VALUES) == expected
+
+def test_tree_reduce_order():
+    """Tests that pairwise reduction combines neighbours level by level."""
+    calls = []
+    def record(a, b):
+        calls.append((a, b))
+        return a + b
+    assert _tree_reduce(record, [1, 2, 3, 4, 5]) == 15
+    assert calls == [(1, 2), (3, 4), (3, 7), (10, 5)]
+
+def test_reductions_use_current_context(monkeypatch):
+    """Tests that reductions round like the binary operations, not to CalculatorConfig.PRECISION."""
+    monkeypatch.setattr(CalculatorConfig, 'PRECISION', 10)
+    assert Reductions.sum([Decimal('123456789.12'), Decimal('1')]) == Decimal('123456790.12')
+    with localcontext() as ctx:
+        ctx.prec = 5
+        assert Reductions.mean([Decimal('1'), Decimal('2'), Decimal('4')]) == Decimal('2.3333')
+        assert Reductions.sum([Decimal('1.234567'), Decimal('1')]) == Decimal('2.2346')
+
+def test_reduction_errors():
+    """Tests empty inputs and unknown reductions."""
+    with pytest.raises(ValidationError):
+        Reductions.sum([])
+    with pytest.raises(ValidationError, match="Invalid reduction"):
+        ReductionFactory.get_reduction('median')
+
+def test_read_operands_file(tmp_path):
+    """Tests reading numbers separated by newlines, spaces and commas."""
+    path = tmp_path / 'numbers.txt'
+    path.write_text("1\n2 3,4\n\n5.5\n")
+    assert read_operands_file(str(path)) == ['1', '2', '3', '4', '5.5']
+    with pytest.raises(ValidationError):
+        read_operands_file(str(tmp_path / 'missing.txt'))
+
+def test_reduction_calculation_is_a_single_history_entry():
+    """Tests that a reduction is executed and recorded as one history entry."""
+    calculator = Calculator()
+    calc = ReductionCalculation(VALUES, Reductions.sum)
+    assert calculator.execute_command(calc) == Decimal('10')
+    history = calculator.get_history()
+    assert len(history) == 2
+    assert history[-1].get_last_command() is calc
+    assert calc.a == Decimal('5') and calc.b == Decimal('0')
+    assert isinstance(calc, ArithmeticCalculation)
+    assert repr(calc) == "Calculation(Sum of 5 operands)"
+    assert calc.operands is None
+
+def test_reduction_calculation_error():
+    """Tests that reduction errors are logged and re-raised."""
+    calc = ReductionCalculation([Decimal('1'), Decimal('NaN')], Reductions.max)
+    with pytest.raises(ArithmeticError):
+        calc.perform()
@@ -0,0 +1,83 @@
+# tests/test_registers.py
+
+import pytest
+from decimal import Decimal
+from app.registers import RegisterSheet
+from app.exceptions import ValidationError, CircularReferenceError
+
+@pytest.fixture
+def sheet():
+    """Provides a sheet with x = 2 + 3, y = x * 10 and an unrelated w = 7."""
+    sheet = RegisterSheet()
+    sheet.define('x', ['add', '2', '3'])
+    sheet.define('y', ['multiply', 'x', '10'])
+    sheet.define('w', ['7'])
+    return sheet
+
+def test_define_constants_and_formulas(sheet):
+    """Tests that constants and formulas evaluate against other registers."""
+    assert sheet.get('x').value == Decimal('5')
+    assert sheet.get('y').value == Decimal('50')
+    assert sheet.get('w').value == Decimal('7')
+    assert sheet.get('y').formula() == 'multiply x 10'
+    assert 'x' in sheet and len(sheet) == 3
+    assert [r.name for r in sheet.registers()] == ['w', 'x', 'y']
+
+def test_redefinition_recomputes_only_dependents(sheet):
+    """Tests that a change re-evaluates the changed register and its dependents only."""
+    sheet.define('z', ['subtract', 'y', 'x'])
+    recomputed = sheet.define('x', ['1'])
+    assert [r.name for r in recomputed] == ['x', 'y', 'z']
+    assert sheet.get('y').value == Decimal('10')
+    assert sheet.get('z').value == Decimal('9')
+
+def test_diamond_dependencies_are_evaluated_in_topological_order(sheet):
+    """Tests that a register is recomputed after all of its dirty inputs."""
+    sheet.define('a', ['add', 'x', '1'])
+    sheet.define('b', ['add', 'x', 'y'])
+    sheet.define('c', ['multiply', 'a', 'b'])
+    recomputed = [r.name for r in sheet.define('x', ['2'])]
+    assert recomputed[0] == 'x'
+    assert recomputed.index('c') > max(recomputed.index('a'), recomputed.index('b'))
+    assert recomputed.index('b') > recomputed.index('y')
+    assert 'w' not in recomputed
+    assert sheet.get('c').value == Decimal('3') * Decimal('22')
+
+def test_circular_reference_is_rejected(sheet):
+    """Tests that cycles are rejected and the sheet is left unchanged."""
+    with pytest.raises(CircularReferenceError):
+        sheet.define('x', ['add', 'y', '1'])
+    with pytest.raises(CircularReferenceError):
+        sheet.define('w', ['add', 'w', '1'])
+    assert sheet.get('x').formula() == 'add 2 3'
+    assert sheet.get('y').value == Decimal('50')
+
+def test_errors_propagate_to_dependents(sheet):
+    """Tests that a failing formula marks its dependents as failed, and recovers."""
+    sheet.define('q', ['divide', 'y', 'x'])
+    sheet.define('x', ['0'])
+    assert sheet.get('q').value is None
+    assert 'Division by zero' in sheet.get('q').error
+    sheet.define('r', ['add', 'q', '1'])
+    assert "failed register 'q'" in sheet.get('r').error
+    sheet.define('x', ['5'])
+    assert sheet.get('q').value == Decimal('10')
+    assert sheet.get('r').value == Decimal('11')
+
+@pytest.mark.parametrize("name, tokens", [
+    ('add', ['1']),              # operation names are reserved
+    ('1x', ['1']),               # invalid identifier
+    ('v', ['missing']),          # unknown register
+    ('v', ['add', '1']),         # wrong arity
+    ('v', ['bogus', '1', '2']),  # unknown operation
+    ('v', ['abc!']),             # not a number
+])
+def test_invalid_definitions(sheet, name, tokens):
+    """Tests that malformed definitions raise ValidationError."""
+    with pytest.raises(ValidationError):
+        sheet.define(name, tokens)
+
+def test_get_unknown_register(sheet):
+    """Tests that looking up an unknown register raises ValidationError."""
+    with pytest.raises(ValidationError):
+        sheet.get('nope')
@@ -0,0 +1,95 @@
+# tests/test_workload.py
+
+import pytest
+from decimal import Decimal
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.operations import OperationFactory
+from benchmarks.workload import ERROR_KINDS, WorkloadGenerator, WorkloadProfile, parse_mix
+
+# --- Determinism ---
+
+def test_same_profile_and_seed_give_same_stream():
+    """Tests that a stream can be regenerated exactly from its profile and seed."""
+    profile = WorkloadProfile(error_rate=0.1, load_rate=0.05)
+    first = list(WorkloadGenerator(profile, seed=42).commands(500))
+    second = list(WorkloadGenerator(WorkloadProfile(error_rate=0.1, load_rate=0.05), seed=42).commands(500))
+    assert first == second
+
+def test_different_seeds_give_different_streams():
+    """Tests that the seed changes the generated commands."""
+    profile = WorkloadProfile()
+    assert list(WorkloadGenerator(profile, seed=1).commands(100)) != list(WorkloadGenerator(profile, seed=2).commands(100))
+
+# --- Generated commands ---
+
+def test_stream_follows_the_profile():
+    """Tests the operation mix, command kinds and operand format."""
+    profile = WorkloadProfile({'add': 1, 'divide': 0}, distribution='uniform', low=1, high=10,
+                              decimal_places=2, negative_fraction=0, undo_rate=0.5, redo_rate=0,
+                              history_rate=0, error_rate=0)
+    commands = list(WorkloadGenerator(profile, seed=3).commands(400))
+    assert all(c == 'undo' or c.startswith('add ') for c in commands)
+    assert 120 < commands.count('undo') < 280
+    for command in commands:
+        if command != 'undo':
+            for operand in command.split()[1:]:
+                assert 1 <= float(operand) <= 10
+                assert len(operand.partition('.')[2]) <= 2
+
+def test_every_operation_generates_valid_arity():
+    """Tests that each arithmetic command has two operands and power/root stay realistic."""
+    profile = WorkloadProfile({op: 1 for op in OperationFactory.OPERATION_MAP}, undo_rate=0, redo_rate=0,
+                              history_rate=0, error_rate=0)
+    for command in WorkloadGenerator(profile, seed=5).commands(300):
+        name, a, b = command.split()
+        if name in ('power', 'root'):
+            assert b.isdigit() and int(b) <= 4
+        if name == 'root':
+            assert not a.startswith('-')
+        if name in ('divide', 'modulus', 'int_divide', 'percent'):
+            assert float(b) != 0
+
+@pytest.mark.usefixtures('history_dir')
+@pytest.mark.parametrize("max_input", ['1e9', '1e20'])
+def test_every_error_kind_fails(monkeypatch, capsys, max_input):
+    """Tests that each deliberate error really fails in the REPL, whatever MAX_INPUT_VALUE is."""
+    import main
+    monkeypatch.setattr(CalculatorConfig, 'MAX_INPUT_VALUE', Decimal(max_input))
+    generator = WorkloadGenerator(WorkloadProfile(undo_rate=0, redo_rate=0, history_rate=0, error_rate=1), seed=7)
+    commands = list(generator.commands(200))
+    assert {command.split()[0] for command in commands} == {'add', 'multiply', 'divide', 'subtract', 'frobnicate'}
+    assert len(ERROR_KINDS) == 5
+    cli = main.Cli(Calculator())
+    for command in commands:
+        cli.dispatch(command)
+        assert "Error" in capsys.readouterr().out, command
+    assert cli.calculator.history_size() == 1
+
+# --- Validation and parsing ---
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({'operation_weights': {'frobnicate': 1}}, "Unknown operation"),
+    ({'operation_weights': {'add': 0}}, "positive weight"),
+    ({'distribution': 'normal'}, "Unknown distribution"),
+    ({'low': 0, 'distribution': 'loguniform'}, "Operand range"),
+    ({'low': 5, 'high': 1}, "Operand range"),
+    ({'undo_rate': -0.1}, "rates"),
+    ({'undo_rate': 0.6, 'error_rate': 0.6}, "rates"),
+])
+def test_profile_validation(kwargs, message):
+    """Tests that profiles that cannot generate a stream are rejected."""
+    with pytest.raises(ValueError, match=message):
+        WorkloadProfile(**kwargs)
+
+def test_describe_round_trips_profile():
+    """Tests that describe() reports every profile setting."""
+    profile = WorkloadProfile({'add': 2}, error_rate=0.25)
+    assert WorkloadProfile(**profile.describe()).describe() == profile.describe()
+
+def test_parse_mix():
+    """Tests mix parsing, default weights and invalid entries."""
+    assert parse_mix('add=3, divide=1.5,power') == {'add': 3.0, 'divide': 1.5, 'power': 1.0}
+    assert parse_mix('') == {}
+    with pytest.raises(ValueError, match="Invalid weight"):
+        parse_mix('add=lots')